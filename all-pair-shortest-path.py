@@ -1,45 +1,178 @@
-# src/analysis/aspl_calculator.py
-from typing import List, Tuple, Dict
-import networkx as nx
-import numpy as np
-from ..algorithms.distance_oracle import DistanceStorage
-
-class ASPLCalculator:
-    """Calculates Average Shortest Path Length metrics."""
-    
-    def __init__(
-        self,
-        oracle: DistanceOracle,
-        gene_pathways: Dict[str, Set[str]]
-    ):
-        self.oracle = oracle
-        self.gene_pathways = gene_pathways
-        
-    def calculate_gene_pair_aspl(
-        self,
-        gene1: str,
-        gene2: str
-    ) -> float:
-        """Calculates ASPL between two genes."""
-        return self.oracle.query_distance(gene1, gene2)
-        
-    def calculate_pathway_aspl(
-        self,
-        pathway: str
-    ) -> Tuple[float, List[Tuple[str, str, float]]]:
-        """Calculates average ASPL for genes in a pathway."""
-        pathway_genes = {
-            gene for gene, pathways in self.gene_pathways.items()
-            if pathway in pathways
-        }
-        
-        distances = []
-        for g1 in pathway_genes:
-            for g2 in pathway_genes:
-                if g1 >= g2:
-                    continue
-                dist = self.calculate_gene_pair_aspl(g1, g2)
-                distances.append((g1, g2, dist))
-                
-        avg_aspl = np.mean([d for _, _, d in distances])
-        return avg_aspl, distances
+# src/analysis/aspl_calculator.py
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+import numpy as np
+from ..algorithms.compact_graph import UNREACHABLE
+from ..algorithms.distance_storage import DistanceStorage
+from ..data.pathway_loader import PathwayIndex
+from ..utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+# Gene rows expanded per batch query in the blocked all-pairs computation
+DEFAULT_BLOCK_ROWS = 256
+
+class ASPLCalculator:
+    """Calculates Average Shortest Path Length metrics."""
+    
+    def __init__(
+        self,
+        oracle: DistanceStorage,
+        gene_pathways: Union[Dict[str, Set[str]], PathwayIndex],
+        instrumentation: Optional[Instrumentation] = None
+    ):
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.oracle = oracle
+        self.gene_pathways = gene_pathways
+        self.pathway_genes = self.build_pathway_index(gene_pathways)
+        
+    def build_pathway_index(
+        self,
+        gene_pathways: Union[Dict[str, Set[str]], PathwayIndex]
+    ) -> Dict[str, np.ndarray]:
+        """Inverts gene -> pathways into pathway -> sorted node ids.
+
+        Genes that are not nodes of the oracle's graph are skipped. A
+        PathwayIndex over the same graph already holds the pathway ->
+        node id CSR, which is used without scanning the genes.
+        """
+        if isinstance(gene_pathways, PathwayIndex):
+            if gene_pathways.num_nodes != self.oracle.graph.number_of_nodes():
+                raise ValueError(
+                    "PathwayIndex was built over a different graph"
+                )
+            return gene_pathways.pathway_gene_ids()
+        members: Dict[str, List[int]] = {}
+        node_index = self.oracle.graph.node_index
+        for gene, pathways in gene_pathways.items():
+            gene_id = node_index.get(gene)
+            if gene_id is None:
+                continue
+            for pathway in pathways:
+                members.setdefault(pathway, []).append(gene_id)
+        return {
+            pathway: np.unique(np.array(ids, dtype=np.int64))
+            for pathway, ids in members.items()
+        }
+        
+    def calculate_gene_pair_aspl(
+        self,
+        gene1: str,
+        gene2: str
+    ) -> float:
+        """Calculates ASPL between two genes."""
+        return self.oracle.query_distance(gene1, gene2)
+        
+    def pairwise_distances(
+        self,
+        gene_ids: np.ndarray,
+        block_rows: int = DEFAULT_BLOCK_ROWS
+    ) -> np.ndarray:
+        """Condensed all-pairs distance vector for ``gene_ids``.
+
+        Entries follow ``scipy.spatial.distance.squareform`` order (i < j)
+        and are filled by one batch oracle query per block of rows.
+        """
+        k = len(gene_ids)
+        condensed = np.empty(k * (k - 1) // 2, dtype=np.int32)
+        offset = 0
+        for start in range(0, max(k - 1, 0), block_rows):
+            rows = np.arange(start, min(start + block_rows, k - 1))
+            counts = k - 1 - rows
+            i = np.repeat(rows, counts)
+            # Column j runs from row + 1 to k - 1 within each row
+            row_starts = np.repeat(np.cumsum(counts) - counts, counts)
+            j = np.arange(len(i)) - row_starts + i + 1
+            condensed[offset:offset + len(i)] = self.oracle.query_distances(
+                gene_ids[i], gene_ids[j]
+            )
+            offset += len(i)
+        return condensed
+        
+    def calculate_pathway_stats(
+        self,
+        pathway: str,
+        return_pairs: bool = False,
+        block_rows: int = DEFAULT_BLOCK_ROWS
+    ) -> Dict[str, Any]:
+        """Distance statistics over all gene pairs of a pathway.
+
+        Returns mean/median/std over reachable pairs, pair counts and the
+        condensed distance vector (UNREACHABLE for unreachable pairs). The
+        ``(g1, g2, dist)`` tuple list is only built with ``return_pairs``.
+        """
+        gene_ids = self.pathway_genes.get(
+            pathway, np.empty(0, dtype=np.int64)
+        )
+        return self.calculate_gene_set_stats(
+            gene_ids, return_pairs, block_rows
+        )
+        
+    def calculate_gene_set_stats(
+        self,
+        gene_ids: np.ndarray,
+        return_pairs: bool = False,
+        block_rows: int = DEFAULT_BLOCK_ROWS
+    ) -> Dict[str, Any]:
+        """``calculate_pathway_stats`` for an explicit array of node ids."""
+        distances = self.pairwise_distances(gene_ids, block_rows)
+        self.instrumentation.count('aspl_pairs', len(distances))
+        reachable = distances[distances != UNREACHABLE]
+        stats: Dict[str, Any] = {
+            'num_genes': len(gene_ids),
+            'num_pairs': len(distances),
+            'num_unreachable': len(distances) - len(reachable),
+            'mean': float(reachable.mean()) if reachable.size else float('nan'),
+            'median': (
+                float(np.median(reachable)) if reachable.size else float('nan')
+            ),
+            'std': float(reachable.std()) if reachable.size else float('nan'),
+            'distances': distances,
+        }
+        if return_pairs:
+            names = self.oracle.graph.node_names[gene_ids].tolist()
+            k = len(names)
+            # Unreachable pairs are inf, as in calculate_gene_pair_aspl
+            values = np.where(
+                distances == UNREACHABLE, np.inf, distances.astype(float)
+            )
+            stats['pairs'] = [
+                (names[i], names[j], d)
+                for (i, j), d in zip(
+                    zip(*np.triu_indices(k, 1)), values.tolist()
+                )
+            ]
+        return stats
+        
+    def calculate_pathway_aspl(
+        self,
+        pathway: str,
+        return_pairs: bool = False
+    ) -> Tuple[float, Union[np.ndarray, List[Tuple[str, str, float]]]]:
+        """Calculates average ASPL for genes in a pathway.
+
+        Returns the mean and the condensed distance vector, or the
+        ``(g1, g2, dist)`` tuple list when ``return_pairs`` is set.
+        """
+        stats = self.calculate_pathway_stats(pathway, return_pairs)
+        if return_pairs:
+            return stats['mean'], stats['pairs']
+        return stats['mean'], stats['distances']
+        
+    def score_all_pathways(
+        self,
+        pathways: Optional[Iterable[str]] = None,
+        keep_distances: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """Scores every indexed pathway (or the given ones) in one pass."""
+        if pathways is None:
+            pathways = sorted(self.pathway_genes)
+        pathways = list(pathways)
+        scores = {}
+        with self.instrumentation.phase('pathway_aspl'):
+            for done, pathway in enumerate(pathways):
+                stats = self.calculate_pathway_stats(pathway)
+                if not keep_distances:
+                    del stats['distances']
+                scores[pathway] = stats
+                self.instrumentation.progress(
+                    'pathway_aspl', done + 1, len(pathways)
+                )
+        return scores
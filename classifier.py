@@ -1,55 +1,179 @@
-# src/analysis/relatedness_classifier.py
-from typing import List, Tuple, Dict
-import numpy as np
-from sklearn.metrics import precision_recall_fscore_support
-
-class RelatednessClassifier:
-    """Classifies gene pairs as related/unrelated based on ASPL."""
-    
-    def __init__(self, threshold: float = None):
-        self.threshold = threshold
-        
-    def fit_threshold(
-        self,
-        known_related: List[Tuple[str, str, float]],
-        known_unrelated: List[Tuple[str, str, float]]
-    ) -> None:
-        """Fits optimal threshold using known relations."""
-        related_aspls = [d for _, _, d in known_related]
-        unrelated_aspls = [d for _, _, d in known_unrelated]
-        
-        # Simple threshold as mean between averages
-        self.threshold = (
-            np.mean(related_aspls) + np.mean(unrelated_aspls)
-        ) / 2
-        
-    def predict_relatedness(
-        self,
-        gene_pairs: List[Tuple[str, str, float]]
-    ) -> List[bool]:
-        """Predicts if gene pairs are related based on ASPL."""
-        if self.threshold is None:
-            raise ValueError("Threshold not set. Call fit_threshold first.")
-            
-        return [
-            dist <= self.threshold
-            for _, _, dist in gene_pairs
-        ]
-        
-    def evaluate_performance(
-        self,
-        true_labels: List[bool],
-        predicted_labels: List[bool]
-    ) -> Dict[str, float]:
-        """Evaluates classification performance."""
-        precision, recall, f1, _ = precision_recall_fscore_support(
-            true_labels,
-            predicted_labels,
-            average='binary'
-        )
-        
-        return {
-            'precision': precision,
-            'recall': recall,
-            'f1_score': f1
-        }
+# src/analysis/relatedness_classifier.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from sklearn.metrics import precision_recall_fscore_support
+from ..algorithms.compact_graph import UNREACHABLE
+
+# Objectives maximized by RelatednessClassifier.fit
+THRESHOLD_CRITERIA = ('f1', 'youden')
+
+
+def as_distance_array(
+    distances: Union[np.ndarray, Sequence[float]]
+) -> np.ndarray:
+    """Float distances with UNREACHABLE batch-query entries mapped to inf."""
+    distances = np.asarray(distances)
+    if distances.dtype.kind in 'iu':
+        result = distances.astype(np.float64)
+        result[distances == UNREACHABLE] = np.inf
+        return result
+    return distances.astype(np.float64, copy=False)
+
+
+def threshold_curve(
+    distances: Union[np.ndarray, Sequence[float]],
+    labels: Union[np.ndarray, Sequence[bool]]
+) -> Dict[str, np.ndarray]:
+    """Confusion counts and metrics for every candidate threshold.
+
+    A pair is predicted related when its distance is ``<=`` the threshold.
+    One sort of the distances gives cumulative true/false positive counts;
+    candidates are the distinct finite distances plus ``-inf`` (predict
+    nothing related), so each entry is one achievable classifier.
+    """
+    distances = as_distance_array(distances)
+    labels = np.asarray(labels, dtype=bool)
+    if distances.shape != labels.shape:
+        raise ValueError("distances and labels must have the same length")
+    order = np.argsort(distances, kind='stable')
+    sorted_dists = distances[order]
+    sorted_labels = labels[order]
+    tp = np.cumsum(sorted_labels)
+    fp = np.cumsum(~sorted_labels)
+
+    # Last position of every distinct finite distance
+    last = np.flatnonzero(
+        np.append(sorted_dists[1:] != sorted_dists[:-1], True) &
+        np.isfinite(sorted_dists)
+    )
+    thresholds = np.concatenate([[-np.inf], sorted_dists[last]])
+    tp = np.concatenate([[0], tp[last]]).astype(np.float64)
+    fp = np.concatenate([[0], fp[last]]).astype(np.float64)
+    positives = float(labels.sum())
+    negatives = float(len(labels) - positives)
+
+    def ratio(num: np.ndarray, den: Union[np.ndarray, float]) -> np.ndarray:
+        den = np.broadcast_to(den, num.shape)
+        return np.divide(
+            num, den, out=np.zeros_like(num), where=den > 0
+        )
+
+    precision = ratio(tp, tp + fp)
+    # No positive predictions: precision is 1 by convention
+    precision[tp + fp == 0] = 1.0
+    recall = ratio(tp, positives)
+    fpr = ratio(fp, negatives)
+    return {
+        'thresholds': thresholds,
+        'tp': tp,
+        'fp': fp,
+        'precision': precision,
+        'recall': recall,
+        'fpr': fpr,
+        'tpr': recall,
+        'f1': ratio(2 * tp, tp + fp + positives),
+        'youden': recall - fpr,
+    }
+
+
+class RelatednessClassifier:
+    """Classifies gene pairs as related/unrelated based on ASPL.
+
+    Works on distance arrays as returned by batch oracle queries; a pair
+    is related when its distance is at most ``threshold``. ``fit`` keeps
+    the full threshold curve in ``curve``.
+    """
+
+    def __init__(self, threshold: float = None):
+        self.threshold = threshold
+        self.curve: Optional[Dict[str, np.ndarray]] = None
+
+    def fit(
+        self,
+        distances: Union[np.ndarray, Sequence[float]],
+        labels: Union[np.ndarray, Sequence[bool]],
+        criterion: str = 'f1'
+    ) -> 'RelatednessClassifier':
+        """Picks the threshold maximizing F1 or Youden's J in one sweep."""
+        if criterion not in THRESHOLD_CRITERIA:
+            raise ValueError(
+                f"Unknown criterion {criterion!r}, expected one of "
+                f"{THRESHOLD_CRITERIA}"
+            )
+        self.curve = threshold_curve(distances, labels)
+        best = int(np.argmax(self.curve[criterion]))
+        self.threshold = float(self.curve['thresholds'][best])
+        return self
+
+    def fit_threshold(
+        self,
+        known_related: List[Tuple[str, str, float]],
+        known_unrelated: List[Tuple[str, str, float]],
+        criterion: str = 'f1'
+    ) -> None:
+        """Fits optimal threshold using known relations."""
+        related = [d for _, _, d in known_related]
+        unrelated = [d for _, _, d in known_unrelated]
+        self.fit(
+            np.array(related + unrelated, dtype=np.float64),
+            np.arange(len(related) + len(unrelated)) < len(related),
+            criterion
+        )
+
+    def predict(
+        self,
+        distances: Union[np.ndarray, Sequence[float]]
+    ) -> np.ndarray:
+        """Boolean relatedness for an array of distances."""
+        if self.threshold is None:
+            raise ValueError("Threshold not set. Call fit_threshold first.")
+        return as_distance_array(distances) <= self.threshold
+
+    def predict_relatedness(
+        self,
+        gene_pairs: List[Tuple[str, str, float]]
+    ) -> List[bool]:
+        """Predicts if gene pairs are related based on ASPL."""
+        return self.predict(
+            np.array([dist for _, _, dist in gene_pairs], dtype=np.float64)
+        ).tolist()
+
+    def roc_curve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(fpr, tpr, thresholds)`` of the last fit, by rising threshold."""
+        curve = self._fitted_curve()
+        return curve['fpr'], curve['tpr'], curve['thresholds']
+
+    def pr_curve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(precision, recall, thresholds)`` of the last fit."""
+        curve = self._fitted_curve()
+        return curve['precision'], curve['recall'], curve['thresholds']
+
+    def roc_auc(self) -> float:
+        """Area under the ROC curve of the last fit (unreachable pairs last)."""
+        fpr, tpr, _ = self.roc_curve()
+        fpr, tpr = np.append(fpr, 1.0), np.append(tpr, 1.0)
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def _fitted_curve(self) -> Dict[str, np.ndarray]:
+        if self.curve is None:
+            raise ValueError("No curve available. Call fit first.")
+        return self.curve
+
+    def evaluate_performance(
+        self,
+        true_labels: Union[np.ndarray, List[bool]],
+        predicted_labels: Union[np.ndarray, List[bool]]
+    ) -> Dict[str, Any]:
+        """Evaluates classification performance."""
+        precision, recall, f1, _ = precision_recall_fscore_support(
+            np.asarray(true_labels, dtype=bool),
+            np.asarray(predicted_labels, dtype=bool),
+            average='binary',
+            zero_division=0
+        )
+
+        return {
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1
+        }
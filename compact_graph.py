@@ -0,0 +1,318 @@
+# src/algorithms/compact_graph.py
+from typing import (
+    Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+)
+import hashlib
+import numpy as np
+import networkx as nx
+
+# Distance value used in BFS result arrays for vertices that were not reached
+UNREACHABLE = -1
+
+
+def expand_frontier(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    frontier: np.ndarray
+) -> np.ndarray:
+    """Gathers the concatenated neighbor lists of all frontier vertices."""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    offsets += np.arange(total, dtype=offsets.dtype)
+    return indices[offsets]
+
+
+def bfs_distances(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    sources: Union[int, Sequence[int], np.ndarray],
+    max_depth: Optional[int] = None
+) -> np.ndarray:
+    """Level-synchronous BFS over CSR arrays.
+
+    Returns an int32 array of hop distances from the nearest source, with
+    UNREACHABLE for vertices beyond ``max_depth`` or in another component.
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, UNREACHABLE, dtype=np.int32)
+    frontier = np.unique(np.atleast_1d(np.asarray(sources, dtype=np.int64)))
+    dist[frontier] = 0
+    depth = 0
+    while frontier.size and (max_depth is None or depth < max_depth):
+        depth += 1
+        nbrs = expand_frontier(indptr, indices, frontier)
+        nbrs = nbrs[dist[nbrs] == UNREACHABLE]
+        if not nbrs.size:
+            break
+        frontier = np.unique(nbrs)
+        dist[frontier] = depth
+    return dist
+
+
+def truncated_bfs(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    source: int,
+    max_depth: Optional[int] = None,
+    max_size: Optional[int] = None,
+    visited: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """BFS from ``source`` that only touches the explored region.
+
+    Returns ``(nodes, dists, capped)`` with the vertices within ``max_depth``
+    hops in BFS order. With ``max_size`` only whole levels are kept, stopping
+    before the level that would push the total past the cap; ``capped`` tells
+    whether that happened. ``visited`` is an optional all-False boolean buffer
+    of length n, restored before returning.
+    """
+    if max_depth is not None and max_depth < 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), False
+    if visited is None:
+        visited = np.zeros(len(indptr) - 1, dtype=bool)
+    levels = [np.array([source], dtype=np.int64)]
+    visited[source] = True
+    total = 1
+    capped = False
+    frontier = levels[0]
+    try:
+        while max_depth is None or len(levels) <= max_depth:
+            nbrs = expand_frontier(indptr, indices, frontier)
+            nbrs = nbrs[~visited[nbrs]]
+            if not nbrs.size:
+                break
+            frontier = np.unique(nbrs)
+            if max_size is not None and total + frontier.size > max_size:
+                capped = True
+                break
+            visited[frontier] = True
+            levels.append(frontier)
+            total += frontier.size
+    finally:
+        for level in levels:
+            visited[level] = False
+    nodes = np.concatenate(levels)
+    dists = np.repeat(
+        np.arange(len(levels), dtype=np.int32),
+        [level.size for level in levels]
+    )
+    return nodes, dists, capped
+
+
+class CompactGraph:
+    """Undirected graph with integer node ids and NumPy CSR adjacency.
+
+    Node ``i`` has neighbors ``indices[indptr[i]:indptr[i + 1]]`` and gene
+    symbol ``node_names[i]``. Self-loops and parallel edges are dropped.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        node_names: Sequence[Hashable]
+    ):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.node_names = np.asarray(node_names, dtype=object)
+        self.node_index: Dict[Hashable, int] = {
+            name: i for i, name in enumerate(self.node_names.tolist())
+        }
+        self.n = len(self.node_names)
+        if len(self.indptr) != self.n + 1:
+            raise ValueError("indptr must have one entry per node plus one")
+
+    @classmethod
+    def from_edges(
+        cls,
+        src: np.ndarray,
+        dst: np.ndarray,
+        node_names: Sequence[Hashable]
+    ) -> 'CompactGraph':
+        """Builds a graph from integer edge endpoint arrays."""
+        n = len(node_names)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+
+        # Symmetrize, then deduplicate via packed (row, col) keys
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src])
+        keys = np.unique(rows * n + cols)
+        rows, cols = keys // n, keys % n
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(indptr, cols, node_names)
+
+    @classmethod
+    def from_edge_list(
+        cls,
+        gene1: Sequence[Hashable],
+        gene2: Sequence[Hashable]
+    ) -> 'CompactGraph':
+        """Builds a graph from parallel sequences of gene symbols."""
+        symbols = np.concatenate([
+            np.asarray(gene1, dtype=object), np.asarray(gene2, dtype=object)
+        ])
+        node_names, ids = np.unique(symbols, return_inverse=True)
+        ids = ids.reshape(-1)
+        half = len(ids) // 2
+        return cls.from_edges(ids[:half], ids[half:], node_names)
+
+    @classmethod
+    def from_networkx(cls, network: nx.Graph) -> 'CompactGraph':
+        """Adapts a NetworkX graph, keeping its node labels as names."""
+        node_names = list(network.nodes())
+        index = {name: i for i, name in enumerate(node_names)}
+        edges = np.array(
+            [(index[u], index[v]) for u, v in network.edges()],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        return cls.from_edges(edges[:, 0], edges[:, 1], node_names)
+
+    def to_networkx(self) -> nx.Graph:
+        """Converts back to a string-keyed NetworkX graph."""
+        G = nx.Graph()
+        G.add_nodes_from(self.node_names.tolist())
+        edges = self.edge_array()
+        G.add_edges_from(zip(
+            self.node_names[edges[:, 0]].tolist(),
+            self.node_names[edges[:, 1]].tolist()
+        ))
+        return G
+
+    def edge_array(self) -> np.ndarray:
+        """(m x 2) array of edges with the smaller endpoint first."""
+        rows = np.repeat(
+            np.arange(self.n, dtype=np.int64), np.diff(self.indptr)
+        )
+        upper = rows < self.indices
+        return np.stack([rows[upper], self.indices[upper]], axis=1)
+
+    def has_edge(self, u: int, v: int) -> bool:
+        nbrs = self.neighbors(u)
+        pos = int(np.searchsorted(nbrs, v))
+        return pos < len(nbrs) and nbrs[pos] == v
+
+    def with_edge_delta(
+        self,
+        added: np.ndarray,
+        removed: np.ndarray,
+        node_names: Optional[Sequence[Hashable]] = None
+    ) -> 'CompactGraph':
+        """New graph with ``added`` edges inserted and ``removed`` deleted.
+
+        ``node_names`` may extend the symbol table with new node ids
+        referenced by ``added``; existing ids keep their meaning.
+        """
+        names = self.node_names if node_names is None else node_names
+        n = len(names)
+        edges = self.edge_array()
+        added = np.sort(
+            np.asarray(added, dtype=np.int64).reshape(-1, 2), axis=1
+        )
+        removed = np.sort(
+            np.asarray(removed, dtype=np.int64).reshape(-1, 2), axis=1
+        )
+        keys = edges[:, 0] * n + edges[:, 1]
+        edges = edges[~np.isin(keys, removed[:, 0] * n + removed[:, 1])]
+        edges = np.concatenate([edges, added])
+        return CompactGraph.from_edges(edges[:, 0], edges[:, 1], names)
+
+    def fingerprint(self) -> str:
+        """SHA-256 digest of the adjacency and the node symbol table."""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(self.indptr, dtype=np.int64))
+        digest.update(np.ascontiguousarray(self.indices, dtype=np.int32))
+        digest.update('\n'.join(map(str, self.node_names)).encode())
+        return digest.hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the CSR arrays (node symbols excluded)."""
+        return self.indptr.nbytes + self.indices.nbytes
+
+    def number_of_nodes(self) -> int:
+        return self.n
+
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def nodes(self) -> List[Hashable]:
+        return self.node_names.tolist()
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __contains__(self, name: Hashable) -> bool:
+        return name in self.node_index
+
+    def degree(self) -> np.ndarray:
+        """Returns the degree of every node as an array."""
+        return np.diff(self.indptr)
+
+    def neighbors(self, node_id: int) -> np.ndarray:
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def id_of(self, name: Hashable) -> int:
+        return self.node_index[name]
+
+    def ids_of(self, names: Iterable[Hashable]) -> np.ndarray:
+        return np.fromiter(
+            (self.node_index[name] for name in names), dtype=np.int64
+        )
+
+    def bfs(
+        self,
+        sources: Union[int, Sequence[int], np.ndarray],
+        max_depth: Optional[int] = None
+    ) -> np.ndarray:
+        """Hop distances from ``sources`` to every node."""
+        return bfs_distances(self.indptr, self.indices, sources, max_depth)
+
+    def truncated_bfs(
+        self,
+        source: int,
+        max_depth: Optional[int] = None,
+        max_size: Optional[int] = None,
+        visited: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """Vertices within ``max_depth`` of ``source`` and their distances."""
+        return truncated_bfs(
+            self.indptr, self.indices, source, max_depth, max_size, visited
+        )
+
+    def shortest_path_length(self, source: int, target: int) -> int:
+        """Exact distance between two node ids by early-exit BFS."""
+        if source == target:
+            return 0
+        visited = np.zeros(self.n, dtype=bool)
+        visited[source] = True
+        frontier = np.array([source], dtype=np.int64)
+        depth = 0
+        while frontier.size:
+            depth += 1
+            nbrs = expand_frontier(self.indptr, self.indices, frontier)
+            nbrs = nbrs[~visited[nbrs]]
+            if not nbrs.size:
+                break
+            frontier = np.unique(nbrs)
+            if np.any(frontier == target):
+                return depth
+            visited[frontier] = True
+        raise ValueError(
+            f"No path between {self.node_names[source]} and "
+            f"{self.node_names[target]}"
+        )
+
+
+def as_compact_graph(network: Union[nx.Graph, CompactGraph]) -> CompactGraph:
+    """Returns ``network`` as a CompactGraph, adapting NetworkX input."""
+    if isinstance(network, CompactGraph):
+        return network
+    return CompactGraph.from_networkx(network)
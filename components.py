@@ -0,0 +1,133 @@
+# src/algorithms/components.py
+from typing import Tuple, Union
+import numpy as np
+from .compact_graph import CompactGraph
+
+# Components with at most this many nodes get exact all-pairs tables
+SMALL_COMPONENT_SIZE = 64
+
+
+class ComponentIndex:
+    """Connected-component id of every node, computed once per graph.
+
+    ``component_ids[v]`` is the component of node ``v``; components are
+    numbered by their smallest node id. Members of component ``c`` are
+    ``members[indptr[c]:indptr[c + 1]]`` in increasing order. Components
+    of at most ``small_size`` nodes are answered from exact tables instead
+    of landmarks and balls.
+    """
+
+    def __init__(
+        self,
+        component_ids: np.ndarray,
+        small_size: int = SMALL_COMPONENT_SIZE
+    ):
+        self.component_ids = np.asarray(component_ids, dtype=np.int32)
+        self.small_size = small_size
+        count = int(self.component_ids.max(initial=-1)) + 1
+        self.sizes = np.bincount(self.component_ids, minlength=count)
+        self.indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(self.sizes, out=self.indptr[1:])
+        self.members = np.argsort(self.component_ids, kind='stable').astype(
+            np.int32
+        )
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: CompactGraph,
+        small_size: int = SMALL_COMPONENT_SIZE
+    ) -> 'ComponentIndex':
+        """Labels components with one truncated BFS per component."""
+        n = graph.number_of_nodes()
+        component_ids = np.full(n, -1, dtype=np.int32)
+        visited = np.zeros(n, dtype=bool)
+        # Isolated nodes are their own components and need no search
+        isolated = graph.degree() == 0
+        component = 0
+        for v in range(n):
+            if component_ids[v] >= 0:
+                continue
+            if isolated[v]:
+                component_ids[v] = component
+            else:
+                nodes, _, _ = graph.truncated_bfs(v, visited=visited)
+                component_ids[nodes] = component
+            component += 1
+        return cls(component_ids, small_size)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.component_ids.nbytes + self.sizes.nbytes +
+            self.indptr.nbytes + self.members.nbytes
+        )
+
+    def nodes(self, component: int) -> np.ndarray:
+        return self.members[self.indptr[component]:self.indptr[component + 1]]
+
+    def is_small(self, component: int) -> bool:
+        return self.sizes[component] <= self.small_size
+
+    def large_components(self) -> np.ndarray:
+        """Ids of the components answered through landmarks and balls."""
+        return np.flatnonzero(self.sizes > self.small_size)
+
+    def small_components(self) -> np.ndarray:
+        return np.flatnonzero(
+            (self.sizes > 1) & (self.sizes <= self.small_size)
+        )
+
+    def same_component(
+        self,
+        a: Union[int, np.ndarray],
+        b: Union[int, np.ndarray]
+    ) -> Union[bool, np.ndarray]:
+        return self.component_ids[a] == self.component_ids[b]
+
+    def is_connected(self) -> bool:
+        return len(self) <= 1
+
+    def small_component_pairs(
+        self,
+        graph: CompactGraph
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Exact ``(a, b, dist)`` for every pair inside a small component.
+
+        Each unordered pair appears once, with ``a < b``.
+        """
+        visited = np.zeros(graph.number_of_nodes(), dtype=bool)
+        sources, others, values = [], [], []
+        for component in self.small_components():
+            if self.sizes[component] == 2:
+                a, b = self.nodes(component)
+                sources.append(np.array([a], dtype=np.int64))
+                others.append(np.array([b], dtype=np.int64))
+                values.append(np.array([1], dtype=np.int32))
+                continue
+            for v in self.nodes(component):
+                nodes, dists, _ = graph.truncated_bfs(int(v), visited=visited)
+                greater = nodes > v
+                sources.append(np.full(int(greater.sum()), v, dtype=np.int64))
+                others.append(nodes[greater])
+                values.append(dists[greater])
+        if not sources:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.int32)
+        return (
+            np.concatenate(sources), np.concatenate(others),
+            np.concatenate(values)
+        )
+
+
+def as_component_index(
+    graph: CompactGraph,
+    components: Union[ComponentIndex, None]
+) -> ComponentIndex:
+    """Returns ``components`` or labels the graph's components."""
+    if components is not None:
+        return components
+    return ComponentIndex.from_graph(graph)
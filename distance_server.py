@@ -0,0 +1,460 @@
+# src/service/distance_server.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import numpy as np
+from ..algorithms.compact_graph import UNREACHABLE
+from ..algorithms.distance_storage import DistanceStorage, LANDMARK_BOUNDS
+
+# Seconds a batch stays open for further requests before it is evaluated
+DEFAULT_WINDOW = 0.002
+
+# Pending pairs that trigger an immediate flush regardless of the window
+DEFAULT_MAX_BATCH = 65536
+
+# Largest accepted request line; batch requests with many pairs are long
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """Coalesces concurrent pair queries into one vectorized oracle call.
+
+    Requests submitted within ``window`` seconds of the first pending one
+    are concatenated per landmark bound and answered by a single
+    ``DistanceStorage.query_distances`` call.
+    """
+
+    def __init__(
+        self,
+        oracle: DistanceStorage,
+        window: float = DEFAULT_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH
+    ):
+        self.oracle = oracle
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.pairs = 0
+        self._pending: Dict[
+            str, List[Tuple[np.ndarray, np.ndarray, asyncio.Future]]
+        ] = {}
+        self._pending_pairs: Dict[str, int] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    async def submit(
+        self,
+        s_ids: np.ndarray,
+        t_ids: np.ndarray,
+        bound: str = 'nearest'
+    ) -> np.ndarray:
+        """Distances for the id pairs, evaluated with the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(bound, []).append((s_ids, t_ids, future))
+        self._pending_pairs[bound] = (
+            self._pending_pairs.get(bound, 0) + len(s_ids)
+        )
+        if self._pending_pairs[bound] >= self.max_batch:
+            self._flush(bound)
+        elif bound not in self._timers:
+            self._timers[bound] = loop.call_later(
+                self.window, self._flush, bound
+            )
+        return await future
+
+    def _flush(self, bound: str) -> None:
+        timer = self._timers.pop(bound, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._pending.pop(bound, [])
+        self._pending_pairs.pop(bound, None)
+        if not requests:
+            return
+        try:
+            dists = self.oracle.query_distances(
+                np.concatenate([s for s, _, _ in requests]),
+                np.concatenate([t for _, t, _ in requests]),
+                bound
+            )
+        except Exception:
+            # Answer requests one by one so a bad one fails on its own
+            self._flush_each(requests, bound)
+            return
+        self.batches += 1
+        self.pairs += len(dists)
+        offset = 0
+        for s_ids, _, future in requests:
+            if not future.done():
+                future.set_result(dists[offset:offset + len(s_ids)])
+            offset += len(s_ids)
+
+    def _flush_each(
+        self,
+        requests: List[Tuple[np.ndarray, np.ndarray, asyncio.Future]],
+        bound: str
+    ) -> None:
+        for s_ids, t_ids, future in requests:
+            if future.done():
+                continue
+            try:
+                dists = self.oracle.query_distances(s_ids, t_ids, bound)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self.batches += 1
+            self.pairs += len(dists)
+            future.set_result(dists)
+
+
+def _distance_value(dist: int) -> Optional[int]:
+    """JSON form of a distance: None for unreachable pairs."""
+    return None if dist == UNREACHABLE else int(dist)
+
+
+class DistanceServer:
+    """Serves a persisted oracle over a local TCP or Unix socket.
+
+    The protocol is newline-delimited JSON. Each request is an object with
+    an ``op`` and an optional ``id`` echoed in the response; requests on one
+    connection may be pipelined and are answered as they complete:
+
+    - ``{"op": "distance", "source": g1, "target": g2}``
+    - ``{"op": "distances", "sources": [...], "targets": [...]}``
+    - ``{"op": "aspl", "genes": [...]}``
+    - ``{"op": "info"}``
+
+    ``distance`` and ``distances`` take an optional ``bound`` (see
+    ``LANDMARK_BOUNDS``). Nodes are gene symbols or integer node ids.
+    Responses carry ``result`` or ``error``; unreachable distances are null.
+    """
+
+    def __init__(
+        self,
+        oracle: DistanceStorage,
+        window: float = DEFAULT_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH
+    ):
+        self.oracle = oracle
+        self.batcher = QueryBatcher(oracle, window, max_batch)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.requests = 0
+
+    async def start(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        unix_path: Optional[str] = None
+    ) -> Union[Tuple[str, int], str]:
+        """Starts listening and returns the bound address.
+
+        With ``unix_path`` the server listens on a Unix socket; otherwise on
+        ``host:port``, where port 0 picks a free port.
+        """
+        if unix_path is not None:
+            self.server = await asyncio.start_unix_server(
+                self.handle_connection, unix_path, limit=MAX_LINE_BYTES
+            )
+            return unix_path
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE_BYTES
+        )
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(
+                    self._respond(line, writer, write_lock)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self,
+        line: bytes,
+        writer: asyncio.StreamWriter,
+        write_lock: asyncio.Lock
+    ) -> None:
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {
+                'id': request_id, 'result': await self.dispatch(request)
+            }
+        except Exception as e:
+            response = {'id': request_id, 'error': f'{type(e).__name__}: {e}'}
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def dispatch(self, request: Dict[str, Any]) -> Any:
+        """Evaluates one decoded request and returns its JSON result."""
+        op = request.get('op')
+        bound = request.get('bound', 'nearest')
+        if bound not in LANDMARK_BOUNDS:
+            raise ValueError(
+                f"Unknown landmark bound {bound!r}, expected one of "
+                f"{LANDMARK_BOUNDS}"
+            )
+        if op == 'distance':
+            s_ids = self._node_ids([request['source']])
+            t_ids = self._node_ids([request['target']])
+            dists = await self.batcher.submit(s_ids, t_ids, bound)
+            return _distance_value(dists[0])
+        if op == 'distances':
+            s_ids = self._node_ids(request['sources'])
+            t_ids = self._node_ids(request['targets'])
+            if s_ids.shape != t_ids.shape:
+                raise ValueError(
+                    "sources and targets must have the same length"
+                )
+            if not len(s_ids):
+                return []
+            dists = await self.batcher.submit(s_ids, t_ids, bound)
+            return [_distance_value(d) for d in dists.tolist()]
+        if op == 'aspl':
+            return await self.aspl(request['genes'], bound)
+        if op == 'info':
+            graph = self.oracle.graph
+            return {
+                'num_nodes': graph.number_of_nodes(),
+                'num_edges': graph.number_of_edges(),
+                'requests': self.requests,
+                'batches': self.batcher.batches,
+                'pairs': self.batcher.pairs,
+            }
+        raise ValueError(f"Unknown op {op!r}")
+
+    def _node_ids(self, nodes: Sequence[Union[int, str]]) -> np.ndarray:
+        """Node ids of a request's genes, rejecting ids outside the graph.
+
+        Checked before batching: a coalesced batch is evaluated as one
+        array, where a bad id would fail or (negative) silently wrap.
+        """
+        ids = self.oracle._node_ids(nodes)
+        n = self.oracle.graph.number_of_nodes()
+        bad = (ids < 0) | (ids >= n)
+        if bad.any():
+            raise ValueError(
+                f"Node id {int(ids[bad][0])} out of range for {n} nodes"
+            )
+        return ids
+
+    async def aspl(
+        self,
+        genes: Sequence[Union[int, str]],
+        bound: str = 'nearest'
+    ) -> Dict[str, Any]:
+        """ASPL statistics over all pairs of distinct genes in ``genes``."""
+        gene_ids = np.unique(self._node_ids(genes))
+        i, j = np.triu_indices(len(gene_ids), 1)
+        if len(i):
+            distances = await self.batcher.submit(
+                gene_ids[i], gene_ids[j], bound
+            )
+        else:
+            distances = np.empty(0, dtype=np.int32)
+        reachable = distances[distances != UNREACHABLE]
+        return {
+            'num_genes': len(gene_ids),
+            'num_pairs': len(distances),
+            'num_unreachable': int(len(distances) - len(reachable)),
+            'mean': float(reachable.mean()) if reachable.size else None,
+            'median': float(np.median(reachable)) if reachable.size else None,
+            'std': float(reachable.std()) if reachable.size else None,
+        }
+
+
+class DistanceClient:
+    """Asyncio client for DistanceServer.
+
+    Requests may be issued concurrently from several tasks; they are
+    pipelined over one connection and matched to responses by id.
+    """
+
+    def __init__(self):
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count()
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._receiver: Optional[asyncio.Task] = None
+
+    async def connect(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        unix_path: Optional[str] = None
+    ) -> 'DistanceClient':
+        if unix_path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                unix_path, limit=MAX_LINE_BYTES
+            )
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                host, port, limit=MAX_LINE_BYTES
+            )
+        self._receiver = asyncio.ensure_future(self._receive())
+        return self
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._receiver is not None:
+            await self._receiver
+
+    async def __aenter__(self) -> 'DistanceClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _receive(self) -> None:
+        error: Exception = ConnectionError("Connection closed by server")
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(RuntimeError(response['error']))
+                else:
+                    future.set_result(response['result'])
+        except Exception as e:
+            error = e
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(error)
+        self._waiting.clear()
+
+    async def request(self, op: str, **params: Any) -> Any:
+        """Sends one request and waits for its result."""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(
+            json.dumps({'id': request_id, 'op': op, **params}).encode() + b'\n'
+        )
+        await self._writer.drain()
+        return await future
+
+    async def distance(
+        self,
+        source: Union[int, str],
+        target: Union[int, str],
+        bound: str = 'nearest'
+    ) -> Union[int, float]:
+        """Distance between two genes, ``float('inf')`` if unreachable."""
+        dist = await self.request(
+            'distance', source=source, target=target, bound=bound
+        )
+        return float('inf') if dist is None else dist
+
+    async def distances(
+        self,
+        sources: Sequence[Union[int, str]],
+        targets: Sequence[Union[int, str]],
+        bound: str = 'nearest'
+    ) -> np.ndarray:
+        """Batch distances as an int32 array with UNREACHABLE entries."""
+        dists = await self.request(
+            'distances', sources=_json_nodes(sources),
+            targets=_json_nodes(targets), bound=bound
+        )
+        return np.array(
+            [UNREACHABLE if d is None else d for d in dists], dtype=np.int32
+        )
+
+    async def aspl(
+        self,
+        genes: Sequence[Union[int, str]],
+        bound: str = 'nearest'
+    ) -> Dict[str, Any]:
+        return await self.request(
+            'aspl', genes=_json_nodes(genes), bound=bound
+        )
+
+    async def info(self) -> Dict[str, Any]:
+        return await self.request('info')
+
+
+def _json_nodes(nodes: Sequence[Union[int, str]]) -> List[Union[int, str]]:
+    """Node ids or symbols as JSON-serializable Python values."""
+    return np.asarray(nodes).tolist()
+
+
+async def serve(
+    index_path: str,
+    host: str = '127.0.0.1',
+    port: int = 7451,
+    unix_path: Optional[str] = None,
+    window: float = DEFAULT_WINDOW,
+    max_batch: int = DEFAULT_MAX_BATCH
+) -> None:
+    """Loads the index at ``index_path`` (memory-mapped) and serves it."""
+    oracle = DistanceStorage.load(index_path, mmap=True)
+    server = DistanceServer(oracle, window, max_batch)
+    address = await server.start(host, port, unix_path)
+    logger.info(f"Serving {index_path} on {address}")
+    await server.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve a persisted distance oracle over a local socket."
+    )
+    parser.add_argument(
+        'index_path', help="directory written by DistanceStorage.save"
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7451)
+    parser.add_argument('--unix', dest='unix_path', help="Unix socket path")
+    parser.add_argument(
+        '--window', type=float, default=DEFAULT_WINDOW,
+        help="request coalescing window in seconds"
+    )
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(
+        args.index_path, args.host, args.port, args.unix_path,
+        args.window, args.max_batch
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,61 +1,987 @@
-# src/algorithms/distance_storage.py
-from typing import Dict, Set, Tuple, Optional
-import networkx as nx
-
-class DistanceStorage:
-    """Main distance storage implementation."""
-    
-    def __init__(
-        self,
-        network: nx.Graph,
-        landmarks: Set[str],
-        balls: Dict[str, Set[str]],
-        landmark_distances: Dict[str, Dict[str, int]]
-    ):
-        self.network = network
-        self.landmarks = landmarks
-        self.balls = balls
-        self.landmark_distances = landmark_distances
-        self.exact_distances = {}
-        self.build_exact_distances()
-        
-    def build_exact_distances(self) -> None:
-        """Precomputes exact distances for vertices in same/intersecting balls."""
-        for center1, ball1 in self.balls.items():
-            for center2, ball2 in self.balls.items():
-                if center1 >= center2:
-                    continue
-                    
-                # Compute distances for intersecting balls
-                intersection = ball1.intersection(ball2)
-                if intersection:
-                    for v1 in ball1:
-                        for v2 in ball2:
-                            dist = nx.shortest_path_length(
-                                self.network, v1, v2
-                            )
-                            self.exact_distances[(v1, v2)] = dist
-                            self.exact_distances[(v2, v1)] = dist
-                            
-    def query_distance(self, s: str, t: str) -> int:
-        """Queries distance between two vertices."""
-        # Check if exact distance is available
-        if (s, t) in self.exact_distances:
-            return self.exact_distances[(s, t)]
-            
-        # Find nearest landmarks
-        s_landmark = min(
-            self.landmarks,
-            key=lambda l: self.landmark_distances[l].get(s, float('inf'))
-        )
-        t_landmark = min(
-            self.landmarks,
-            key=lambda l: self.landmark_distances[l].get(t, float('inf'))
-        )
-        
-        # Approximate distance using landmarks
-        return (
-            self.landmark_distances[s_landmark].get(s, 0) +
-            nx.shortest_path_length(self.network, s_landmark, t_landmark) +
-            self.landmark_distances[t_landmark].get(t, 0)
-        )
\ No newline at end of file
+# src/algorithms/distance_storage.py
+from pathlib import Path
+from typing import (
+    Any, Dict, Hashable, Iterable, Iterator, List, Sequence, Set, Tuple,
+    Optional, Union
+)
+import heapq
+import json
+import os
+import networkx as nx
+import numpy as np
+from .compact_graph import (
+    CompactGraph, UNREACHABLE, as_compact_graph, bfs_distances
+)
+from .components import ComponentIndex, as_component_index
+from .exact_search import BidirectionalSearch, DEFAULT_EXPANSION_BUDGET
+from .landmark_sampler import LandmarkTable, as_landmark_table, distance_dtype
+from .neighborhood_sampler import (
+    BallIndex, as_ball_index, ball_max_depth, ball_radius
+)
+from .pair_index import ExternalPairIndexBuilder, PairDistanceIndex, pack_pairs
+from .query_cache import QueryCache
+from .range_search import RANGE_SOURCES, RangeSearch
+from ..utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+# Bumped whenever the on-disk layout written by DistanceStorage.save changes
+INDEX_FORMAT_VERSION = 2
+
+# Landmark fallback estimates accepted by the query methods
+LANDMARK_BOUNDS = ('nearest', 'min')
+
+# Pairs per block when evaluating the min-over-landmarks bound
+MIN_BOUND_BLOCK = 4096
+
+# Exact-table BFS sources between two progress reports
+PROGRESS_INTERVAL = 1024
+
+class _BallPairPlan:
+    """Ball-membership bookkeeping behind the exact-distance table."""
+    
+    def __init__(
+        self,
+        vertex_balls: Dict[int, List[int]],
+        neighbors: List[Set[int]],
+        targets: List[np.ndarray],
+        depth: List[int]
+    ):
+        self.vertex_balls = vertex_balls
+        self.neighbors = neighbors
+        self.targets = targets
+        self.depth = depth
+        
+    def source_depth(self, v: int) -> int:
+        return max(self.depth[b] for b in self.vertex_balls[v])
+
+class DistanceStorage:
+    """Main distance storage implementation.
+
+    With ``exact_table_path`` the exact-distance table is built out of core:
+    pairs are spilled in sorted runs and merged into memory-mapped files in
+    that directory, keeping build memory near ``memory_budget`` bytes.
+
+    ``components`` labels the connected components (computed from the
+    graph when omitted). Queries across components are answered as
+    unreachable without touching any table, and components of at most
+    ``components.small_size`` nodes are stored as exact all-pairs tables,
+    so the whole interactome can be indexed without extracting the giant
+    component first.
+    """
+    
+    def __init__(
+        self,
+        network: Union[nx.Graph, CompactGraph],
+        landmarks: Set[str],
+        balls: Union[Dict[str, Set[str]], BallIndex],
+        landmark_distances: Union[Dict[str, Dict[str, int]], LandmarkTable],
+        instrumentation: Optional[Instrumentation] = None,
+        exact_table_path: Optional[Union[str, Path]] = None,
+        memory_budget: Optional[int] = None,
+        components: Optional[ComponentIndex] = None
+    ):
+        instrumentation = instrumentation or NULL_INSTRUMENTATION
+        graph = as_compact_graph(network)
+        with instrumentation.phase('components'):
+            components = as_component_index(graph, components)
+        self._init_state(
+            graph, components, landmarks, as_ball_index(graph, balls),
+            as_landmark_table(graph, landmark_distances), instrumentation,
+            exact_table_path, memory_budget
+        )
+        self.build_exact_distances()
+        
+    def _init_state(
+        self,
+        graph: CompactGraph,
+        components: ComponentIndex,
+        landmarks: Set[str],
+        ball_index: BallIndex,
+        landmark_table: LandmarkTable,
+        instrumentation: Optional[Instrumentation] = None,
+        exact_table_path: Optional[Union[str, Path]] = None,
+        memory_budget: Optional[int] = None
+    ) -> None:
+        """Sets every attribute but the exact table; shared with ``load``."""
+        if len(components.component_ids) != graph.number_of_nodes():
+            raise ValueError("components do not match the network")
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.exact_table_path = exact_table_path
+        self.memory_budget = memory_budget
+        self.graph = graph
+        self.components = components
+        self.landmarks = landmarks
+        self.ball_index = ball_index
+        self.landmark_table = landmark_table
+        self.landmark_pair_distances = landmark_table.pair_distances()
+        self.exact_index = PairDistanceIndex.empty()
+        self.query_cache: Optional[QueryCache] = None
+        
+    def build_exact_distances(self) -> None:
+        """Precomputes exact distances for vertices in same/intersecting balls.
+
+        Every vertex that belongs to some ball is the source of one BFS,
+        truncated at the longest distance any of its target pairs can have,
+        and each unordered pair is stored once in a packed-key table. Pairs
+        inside small components are added in full instead; ball members in
+        those components are not used as sources.
+        """
+        with self.instrumentation.phase('exact_table'):
+            plan = self._ball_pair_plan(self.ball_index)
+            in_small = self._small_component_nodes()
+            vertices = [v for v in plan.vertex_balls if not in_small[v]]
+            small = self.components.small_component_pairs(self.graph)
+            self.instrumentation.count('component_exact_pairs', len(small[0]))
+            if self.exact_table_path is None:
+                a, b, dists = (
+                    np.concatenate(arrays) for arrays in
+                    zip(self._exact_pairs(vertices, plan), small)
+                )
+                self.exact_index = PairDistanceIndex.from_arrays(
+                    a, b, dists, distance_dtype(int(dists.max(initial=0)))
+                )
+            else:
+                builder = ExternalPairIndexBuilder(
+                    self.exact_table_path, self.memory_budget
+                )
+                for a, b, dists in self._iter_exact_pairs(vertices, plan):
+                    builder.add(a, b, dists)
+                builder.add(*small)
+                self.instrumentation.count('exact_runs', len(builder.runs))
+                self.exact_index = builder.finish()
+        self.instrumentation.count('exact_pairs', len(self.exact_index))
+        
+    def _small_component_nodes(self) -> np.ndarray:
+        """Per-node flag: the node lies in a component with an exact table."""
+        components = self.components
+        return components.sizes[components.component_ids] <= (
+            components.small_size
+        )
+        
+    @staticmethod
+    def _ball_pair_plan(balls: BallIndex) -> '_BallPairPlan':
+        """Which pairs the exact table covers and how deep each BFS goes."""
+        members = [balls.ball(i)[0] for i in range(len(balls))]
+        reach = [
+            int(balls.ball(i)[1].max(initial=0)) for i in range(len(balls))
+        ]
+        
+        # Balls intersect when some vertex belongs to both of them
+        owner = np.repeat(np.arange(len(balls)), np.diff(balls.indptr))
+        vertex_balls: Dict[int, List[int]] = {}
+        for v, b in zip(balls.members.tolist(), owner.tolist()):
+            vertex_balls.setdefault(v, []).append(b)
+        neighbors = [{b} for b in range(len(balls))]
+        for shared in vertex_balls.values():
+            for b in shared:
+                neighbors[b].update(shared)
+                
+        # Targets of a ball are the members of every ball intersecting it
+        targets = [
+            np.unique(np.concatenate([members[c] for c in neighbors[b]]))
+            for b in range(len(balls))
+        ]
+        # d(v1, v2) <= d(v1, c1) + d(c1, x) + d(x, c2) + d(c2, v2) for x in
+        # the intersection, which bounds how deep each BFS must go
+        depth = [
+            max(2 * (reach[b] + reach[c]) for c in neighbors[b])
+            for b in range(len(balls))
+        ]
+        return _BallPairPlan(vertex_balls, neighbors, targets, depth)
+        
+    def _exact_pairs(
+        self,
+        vertices: Sequence[int],
+        plan: '_BallPairPlan',
+        greater_only: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """One truncated BFS per vertex, returning ``(a, b, dist)`` arrays.
+
+        With ``greater_only`` each vertex only emits targets with a larger
+        id, so a full pass produces every unordered pair exactly once.
+        """
+        sources, others, values = [], [], []
+        for a, b, dists in self._iter_exact_pairs(
+            vertices, plan, greater_only
+        ):
+            sources.append(a)
+            others.append(b)
+            values.append(dists)
+            
+        if not sources:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.int32)
+        return (
+            np.concatenate(sources), np.concatenate(others),
+            np.concatenate(values)
+        )
+        
+    def _iter_exact_pairs(
+        self,
+        vertices: Sequence[int],
+        plan: '_BallPairPlan',
+        greater_only: bool = True
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Yields the ``(a, b, dist)`` arrays of ``_exact_pairs`` per vertex."""
+        instrumentation = self.instrumentation
+        dist_buf = np.full(self.graph.number_of_nodes(), -1, dtype=np.int32)
+        visited = np.zeros(self.graph.number_of_nodes(), dtype=bool)
+        expansions = 0
+        for done, v in enumerate(vertices):
+            if done % PROGRESS_INTERVAL == 0:
+                instrumentation.progress('exact_table', done, len(vertices))
+            owners = plan.vertex_balls[v]
+            if len(owners) == 1:
+                v_targets = plan.targets[owners[0]]
+            else:
+                v_targets = np.unique(
+                    np.concatenate([plan.targets[b] for b in owners])
+                )
+            v_targets = v_targets[
+                v_targets > v if greater_only else v_targets != v
+            ]
+            if not v_targets.size:
+                continue
+            nodes, dists, _ = self.graph.truncated_bfs(
+                v, plan.source_depth(v), visited=visited
+            )
+            expansions += 1
+            dist_buf[nodes] = dists
+            found = dist_buf[v_targets]
+            dist_buf[nodes] = -1
+            reached = found >= 0
+            yield (
+                np.full(int(reached.sum()), v, dtype=np.int64),
+                v_targets[reached], found[reached]
+            )
+        instrumentation.progress('exact_table', len(vertices), len(vertices))
+        instrumentation.count('bfs_expansions', expansions)
+        
+    def apply_edge_delta(
+        self,
+        added: Iterable[Tuple[Hashable, Hashable]],
+        removed: Iterable[Tuple[Hashable, Hashable]]
+    ) -> Dict[str, int]:
+        """Updates the oracle in place for inserted and deleted edges.
+
+        Edges are gene symbol pairs; unknown symbols in ``added`` become new
+        nodes. Landmark rows are repaired by decrease-only propagation for
+        insertions and recomputed when a deleted edge lay on their BFS DAG.
+        Balls and exact-table sources are recomputed only when their
+        truncated BFS region can reach a changed edge or their ball overlap
+        structure changed. Landmarks and ball centers are kept, so the result
+        equals a fresh build from the same samples. Components are relabeled
+        and the small-component tables rebuilt; landmarks are not resampled,
+        so a large component split off by a deletion may be left without one
+        until the next full build. Returns update counts.
+        """
+        old_graph, old_balls = self.graph, self.ball_index
+        node_index = dict(old_graph.node_index)
+        names = old_graph.node_names.tolist()
+        
+        def node_id(name: Hashable) -> int:
+            if name not in node_index:
+                node_index[name] = len(names)
+                names.append(name)
+            return node_index[name]
+            
+        added_ids = {
+            (min(u, v), max(u, v))
+            for u, v in ((node_id(a), node_id(b)) for a, b in added)
+            if u != v and not (
+                max(u, v) < old_graph.n and old_graph.has_edge(u, v)
+            )
+        }
+        removed_ids = {
+            (min(u, v), max(u, v))
+            for u, v in (
+                (node_index.get(a, -1), node_index.get(b, -1))
+                for a, b in removed
+            )
+            if 0 <= u < old_graph.n and 0 <= v < old_graph.n
+            and old_graph.has_edge(u, v)
+        }
+        stats = {
+            'edges_added': len(added_ids),
+            'edges_removed': len(removed_ids),
+            'nodes_added': len(names) - old_graph.n,
+            'landmark_rows_recomputed': 0,
+            'landmark_rows_repaired': 0,
+            'balls_recomputed': 0,
+            'exact_sources_recomputed': 0,
+            'components': len(self.components),
+        }
+        if not added_ids and not removed_ids:
+            return stats
+        if self.query_cache is not None:
+            self.query_cache.clear()
+            
+        ea = np.array(sorted(added_ids), dtype=np.int64).reshape(-1, 2)
+        er = np.array(sorted(removed_ids), dtype=np.int64).reshape(-1, 2)
+        graph = old_graph.with_edge_delta(ea, er, names)
+        self.graph = graph
+        old_small = np.zeros(graph.number_of_nodes(), dtype=bool)
+        old_small[:old_graph.n] = self._small_component_nodes()
+        self.components = ComponentIndex.from_graph(
+            graph, self.components.small_size
+        )
+        stats['components'] = len(self.components)
+        in_small = self._small_component_nodes()
+        old_table = self.landmark_table
+        old_depths = [
+            ball_max_depth(d, old_table.sentinel)
+            for d in old_table.nearest_landmark_dist[old_balls.centers]
+        ]
+        self._update_landmark_rows(ea, er, stats)
+        
+        # Distances from the changed edges in old-or-new graph bound which
+        # truncated searches could have seen the change
+        union = old_graph.with_edge_delta(ea, np.empty((0, 2)), names)
+        near = union.bfs(np.unique(np.concatenate([ea.ravel(), er.ravel()])))
+        
+        def touches(v: int, depth: Optional[int]) -> bool:
+            if near[v] == UNREACHABLE:
+                return False
+            return depth is None or near[v] <= depth
+            
+        # Recompute balls whose radius changed or whose region saw the delta
+        table = self.landmark_table
+        visited = np.zeros(graph.number_of_nodes(), dtype=bool)
+        results, radii, capped, changed = [], [], [], []
+        for i, center in enumerate(old_balls.centers.tolist()):
+            depth = ball_max_depth(
+                table.nearest_landmark_dist[center], table.sentinel
+            )
+            old_depth = old_depths[i]
+            if depth == old_depth and not touches(
+                center, None if depth is None else max(depth, 0)
+            ):
+                results.append(old_balls.ball(i))
+                radii.append(int(old_balls.radii[i]))
+                capped.append(bool(old_balls.capped[i]))
+                continue
+            stats['balls_recomputed'] += 1
+            nodes, dists, was_capped = graph.truncated_bfs(
+                center, depth, old_balls.max_size, visited
+            )
+            old_nodes, old_dists = old_balls.ball(i)
+            if not (
+                np.array_equal(nodes, old_nodes) and
+                np.array_equal(dists, old_dists)
+            ):
+                changed.append(i)
+            results.append((nodes, dists))
+            radii.append(ball_radius(dists, was_capped, depth))
+            capped.append(was_capped)
+        balls = BallIndex.from_bfs_results(
+            old_balls.centers, np.array(radii), tuple(results),
+            np.array(capped)
+        )
+        balls.probability = old_balls.probability
+        balls.seed = old_balls.seed
+        balls.strategy = old_balls.strategy
+        balls.max_size = old_balls.max_size
+        self.ball_index = balls
+        
+        # Sources whose target sets changed or whose BFS region saw the delta
+        old_plan = self._ball_pair_plan(old_balls)
+        plan = self._ball_pair_plan(balls)
+        affected: Set[int] = set()
+        for i in changed:
+            for b in old_plan.neighbors[i] | plan.neighbors[i]:
+                affected.update(old_balls.ball(b)[0].tolist())
+                affected.update(balls.ball(b)[0].tolist())
+        affected.update(
+            v for v in plan.vertex_balls if touches(v, plan.source_depth(v))
+        )
+        affected.update(
+            v for v in old_plan.vertex_balls
+            if touches(v, old_plan.source_depth(v))
+        )
+        stats['exact_sources_recomputed'] = len(affected)
+        
+        # Small-component pairs are dropped and rebuilt wholesale
+        old_keys = np.asarray(self.exact_index.keys)
+        affected_ids = np.fromiter(affected, dtype=np.uint64)
+        first_ids = (old_keys >> np.uint64(32)).astype(np.int64)
+        second_ids = (old_keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        keep = ~(
+            np.isin(first_ids, affected_ids) |
+            np.isin(second_ids, affected_ids) |
+            old_small[first_ids] | in_small[first_ids]
+        )
+        a, b, dists = self._exact_pairs(
+            sorted(
+                v for v in affected
+                if v in plan.vertex_balls and not in_small[v]
+            ),
+            plan, greater_only=False
+        )
+        small_a, small_b, small_dists = (
+            self.components.small_component_pairs(graph)
+        )
+        keys = np.concatenate([
+            old_keys[keep], pack_pairs(a, b), pack_pairs(small_a, small_b)
+        ])
+        values = np.concatenate([
+            np.asarray(self.exact_index.values)[keep].astype(np.int64), dists,
+            small_dists
+        ])
+        keys, first = np.unique(keys, return_index=True)
+        self.exact_index = PairDistanceIndex(
+            keys,
+            values[first].astype(distance_dtype(int(values.max(initial=0))))
+        )
+        return stats
+        
+    def _update_landmark_rows(
+        self,
+        added: np.ndarray,
+        removed: np.ndarray,
+        stats: Dict[str, int]
+    ) -> None:
+        """Brings landmark rows up to date with ``self.graph``."""
+        old = self.landmark_table
+        n = self.graph.number_of_nodes()
+        distances = np.full(
+            (len(old.landmark_ids), n), old.sentinel, dtype=old.distances.dtype
+        )
+        distances[:, :old.distances.shape[1]] = old.distances
+        
+        def widen_for(max_distance: int) -> np.ndarray:
+            dtype = distance_dtype(max_distance)
+            if dtype.itemsize <= distances.dtype.itemsize:
+                return distances
+            wide = distances.astype(dtype)
+            wide[distances == old.sentinel] = np.iinfo(dtype).max
+            return wide
+            
+        # A deleted edge only matters to rows where it joins two BFS levels
+        # and its deeper endpoint is left without another parent
+        recompute = np.zeros(len(old.landmark_ids), dtype=bool)
+        if len(removed):
+            d_a = distances[:, removed[:, 0]].astype(np.int64)
+            d_b = distances[:, removed[:, 1]].astype(np.int64)
+            on_dag = (
+                (np.abs(d_a - d_b) == 1) &
+                (d_a != old.sentinel) & (d_b != old.sentinel)
+            )
+            for row, k in zip(*np.nonzero(on_dag)):
+                if recompute[row]:
+                    continue
+                u, v = removed[k]
+                deeper = u if d_a[row, k] > d_b[row, k] else v
+                parents = distances[row, self.graph.neighbors(deeper)]
+                depth = int(distances[row, deeper])
+                recompute[row] = not np.any(parents == depth - 1)
+        for row in np.flatnonzero(recompute):
+            dist = self.graph.bfs(old.landmark_ids[row])
+            distances = widen_for(int(dist.max(initial=0)))
+            sentinel = np.iinfo(distances.dtype).max
+            distances[row] = np.where(dist == UNREACHABLE, sentinel, dist)
+            stats['landmark_rows_recomputed'] += 1
+            
+        # Insertions only shorten paths: propagate decreases from endpoints
+        if len(added):
+            sentinel = np.iinfo(distances.dtype).max
+            d_a = distances[:, added[:, 0]].astype(np.int64)
+            d_b = distances[:, added[:, 1]].astype(np.int64)
+            d_a[d_a == sentinel] = np.iinfo(np.int64).max // 2
+            d_b[d_b == sentinel] = np.iinfo(np.int64).max // 2
+            stale = (np.abs(d_a - d_b) > 1) & ~recompute[:, None]
+            for row in np.flatnonzero(stale.any(axis=1)):
+                row_dist = distances[row].astype(np.int64)
+                row_dist[row_dist == sentinel] = np.iinfo(np.int64).max
+                heap = []
+                for k in np.flatnonzero(stale[row]):
+                    u, v = added[k]
+                    if row_dist[u] > row_dist[v]:
+                        u, v = v, u
+                    if row_dist[u] + 1 < row_dist[v]:
+                        row_dist[v] = row_dist[u] + 1
+                        heap.append((int(row_dist[v]), int(v)))
+                heapq.heapify(heap)
+                while heap:
+                    d, u = heapq.heappop(heap)
+                    if d > row_dist[u]:
+                        continue
+                    for w in self.graph.neighbors(u).tolist():
+                        if d + 1 < row_dist[w]:
+                            row_dist[w] = d + 1
+                            heapq.heappush(heap, (d + 1, w))
+                reached = row_dist != np.iinfo(np.int64).max
+                distances = widen_for(int(row_dist[reached].max(initial=0)))
+                sentinel = np.iinfo(distances.dtype).max
+                distances[row] = np.where(reached, row_dist, sentinel)
+                stats['landmark_rows_repaired'] += 1
+                
+        table = LandmarkTable(old.landmark_ids, distances)
+        table.probability = old.probability
+        table.seed = old.seed
+        table.strategy = old.strategy
+        self.landmark_table = table
+        self.landmark_pair_distances = table.pair_distances()
+        
+    def memory_breakdown(self) -> Dict[str, int]:
+        """Bytes held by each index component, excluding the graph."""
+        return {
+            'landmark_table': self.landmark_table.nbytes,
+            'landmark_pairs': self.landmark_pair_distances.nbytes,
+            'balls': self.ball_index.nbytes,
+            'exact_table': self.exact_index.nbytes,
+            'components': self.components.nbytes,
+        }
+        
+    @property
+    def nbytes(self) -> int:
+        return sum(self.memory_breakdown().values())
+        
+    def enable_query_cache(
+        self,
+        capacity: int = 100_000,
+        policy: str = 'lru'
+    ) -> QueryCache:
+        """Puts a bounded result cache in front of ``query_distance``.
+
+        The cache is keyed on the unordered node id pair and the landmark
+        bound, may be shared across threads, and is cleared whenever
+        ``apply_edge_delta`` changes the graph.
+        """
+        self.query_cache = QueryCache(capacity, policy)
+        return self.query_cache
+        
+    def disable_query_cache(self) -> None:
+        self.query_cache = None
+        
+    def query_distance(
+        self,
+        s: str,
+        t: str,
+        bound: str = 'nearest'
+    ) -> Union[int, float]:
+        """Queries distance between two vertices.
+
+        Pairs missing from the exact table are estimated through landmarks:
+        ``bound='nearest'`` routes via the nearest landmarks of ``s`` and
+        ``t``, ``bound='min'`` returns the tighter ``min_l d(s,l) + d(l,t)``.
+        Returns ``float('inf')`` for vertices in different components or
+        when either vertex has no reachable landmark.
+        """
+        self._check_bound(bound)
+        s_id, t_id = self.graph.id_of(s), self.graph.id_of(t)
+        if s_id == t_id:
+            return 0
+        component_ids = self.components.component_ids
+        if component_ids[s_id] != component_ids[t_id]:
+            return float('inf')
+            
+        cache = self.query_cache
+        if cache is None:
+            return self._query_ids(s_id, t_id, bound)
+        key = (min(s_id, t_id), max(s_id, t_id), bound)
+        result = cache.get(key)
+        if result is None:
+            result = self._query_ids(s_id, t_id, bound)
+            cache.put(key, result)
+        return result
+        
+    def _query_ids(
+        self,
+        s_id: int,
+        t_id: int,
+        bound: str
+    ) -> Union[int, float]:
+        # Check if exact distance is available
+        exact = self.exact_index.get(s_id, t_id)
+        if exact is not None:
+            return exact
+            
+        if bound == 'min':
+            estimate = int(self._min_bound(
+                np.array([s_id]), np.array([t_id])
+            )[0])
+            return float('inf') if estimate == UNREACHABLE else estimate
+            
+        # Look up nearest landmarks; the sentinel also covers no landmarks
+        table = self.landmark_table
+        if not len(table.landmark_ids):
+            return float('inf')
+        s_dist = table.nearest_landmark_dist[s_id]
+        t_dist = table.nearest_landmark_dist[t_id]
+        if table.sentinel in (s_dist, t_dist):
+            return float('inf')
+        between = self.landmark_pair_distances[
+            table.nearest_landmark[s_id], table.nearest_landmark[t_id]
+        ]
+        if between == table.sentinel:
+            return float('inf')
+            
+        # Approximate distance using landmarks
+        return int(s_dist) + int(between) + int(t_dist)
+        
+    def query_distances(
+        self,
+        sources: Union[np.ndarray, Sequence[Union[int, str]]],
+        targets: Union[np.ndarray, Sequence[Union[int, str]]],
+        bound: str = 'nearest'
+    ) -> np.ndarray:
+        """Vectorized ``query_distance`` over parallel source/target arrays.
+
+        Accepts node ids or gene symbols and returns an int32 array, with
+        UNREACHABLE for pairs in different components or where either vertex
+        has no reachable landmark.
+        """
+        self._check_bound(bound)
+        s_ids, t_ids = self._node_ids(sources), self._node_ids(targets)
+        if s_ids.shape != t_ids.shape:
+            raise ValueError("sources and targets must have the same length")
+            
+        result, found = self.exact_index.lookup(s_ids, t_ids)
+        result[s_ids == t_ids] = 0
+        component_ids = self.components.component_ids
+        crossing = component_ids[s_ids] != component_ids[t_ids]
+        result[crossing] = UNREACHABLE
+        miss = np.flatnonzero((s_ids != t_ids) & ~found & ~crossing)
+        if not miss.size:
+            return result
+        if bound == 'min':
+            result[miss] = self._min_bound(s_ids[miss], t_ids[miss])
+            return result
+            
+        # Landmark fallback: d(s, l_s) + d(l_s, l_t) + d(l_t, t)
+        table = self.landmark_table
+        result[miss] = UNREACHABLE
+        if not len(table.landmark_ids):
+            return result
+        s_miss, t_miss = s_ids[miss], t_ids[miss]
+        s_dist = table.nearest_landmark_dist[s_miss].astype(np.int32)
+        t_dist = table.nearest_landmark_dist[t_miss].astype(np.int32)
+        # Vertices without a reachable landmark have no row to look up
+        covered = (s_dist != table.sentinel) & (t_dist != table.sentinel)
+        miss, s_miss, t_miss = miss[covered], s_miss[covered], t_miss[covered]
+        s_dist, t_dist = s_dist[covered], t_dist[covered]
+        between = self.landmark_pair_distances[
+            table.nearest_landmark[s_miss], table.nearest_landmark[t_miss]
+        ].astype(np.int32)
+        approx = s_dist + between + t_dist
+        approx[between == table.sentinel] = UNREACHABLE
+        result[miss] = approx
+        return result
+        
+    def exact_distance(
+        self,
+        s: str,
+        t: str,
+        budget: Optional[int] = DEFAULT_EXPANSION_BUDGET
+    ) -> Tuple[Union[int, float], bool]:
+        """Exact distance between two vertices, as ``(distance, exact)``.
+
+        Pairs missing from the exact table are resolved by a bidirectional
+        BFS pruned with landmark bounds. When it runs out of ``budget``
+        vertex expansions the best upper bound found is returned with
+        ``exact=False``. Unreachable pairs give ``float('inf')``.
+        """
+        dists, exact = self.exact_distances(
+            np.array([self.graph.id_of(s)]), np.array([self.graph.id_of(t)]),
+            budget
+        )
+        dist = int(dists[0])
+        return (float('inf') if dist == UNREACHABLE else dist), bool(exact[0])
+        
+    def exact_distances(
+        self,
+        sources: Union[np.ndarray, Sequence[Union[int, str]]],
+        targets: Union[np.ndarray, Sequence[Union[int, str]]],
+        budget: Optional[int] = DEFAULT_EXPANSION_BUDGET
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch ``exact_distance`` returning ``(dists, exact)`` arrays.
+
+        ``dists`` is int32 with UNREACHABLE for disconnected pairs; pairs
+        with ``exact`` False hit the per-pair budget and hold an upper
+        bound. One search instance, and so one set of visited buffers, is
+        shared by every pair of the batch.
+        """
+        s_ids, t_ids = self._node_ids(sources), self._node_ids(targets)
+        if s_ids.shape != t_ids.shape:
+            raise ValueError("sources and targets must have the same length")
+            
+        result, found = self.exact_index.lookup(s_ids, t_ids)
+        result[s_ids == t_ids] = 0
+        component_ids = self.components.component_ids
+        crossing = component_ids[s_ids] != component_ids[t_ids]
+        result[crossing] = UNREACHABLE
+        exact = np.ones(len(s_ids), dtype=bool)
+        pending = np.flatnonzero((s_ids != t_ids) & ~found & ~crossing)
+        if not pending.size:
+            return result, exact
+            
+        search = BidirectionalSearch(self.graph, self.landmark_table, budget)
+        with self.instrumentation.phase('exact_search'):
+            bounds = search.batch_bounds(s_ids[pending], t_ids[pending])
+            for i, pair_bounds in zip(pending.tolist(), bounds):
+                result[i], exact[i] = search.distance(
+                    int(s_ids[i]), int(t_ids[i]), pair_bounds
+                )
+        instrumentation = self.instrumentation
+        instrumentation.count('exact_searches', len(pending))
+        instrumentation.count('exact_search_expansions', search.expansions)
+        instrumentation.count('exact_search_fallbacks', search.fallbacks)
+        return result, exact
+        
+    def genes_within(
+        self,
+        gene: str,
+        radius: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Genes within ``radius`` hops of ``gene`` and their distances.
+
+        Both arrays are sorted by distance, then node id; ``gene`` itself
+        is excluded. Landmarks answer from their distance row and ball
+        centers from their ball when it covers the radius; other genes run
+        a BFS truncated at the radius.
+        """
+        return self.genes_within_batch([gene], radius)[0]
+        
+    def nearest_genes(
+        self,
+        gene: str,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The ``k`` genes closest to ``gene`` and their distances.
+
+        Sorted like ``genes_within``, ties at the k-th distance going to
+        lower node ids. Uses landmark rows and balls like ``genes_within``
+        and otherwise a BFS stopped at the level completing the k nearest.
+        """
+        return self.nearest_genes_batch([gene], k)[0]
+        
+    def genes_within_batch(
+        self,
+        genes: Union[np.ndarray, Sequence[Union[int, str]]],
+        radius: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """``genes_within`` for many seeds, sharing one visited buffer."""
+        search = RangeSearch(self.graph, self.landmark_table, self.ball_index)
+        with self.instrumentation.phase('range_queries'):
+            results = [
+                self._named(*search.within(v, radius))
+                for v in self._node_ids(genes).tolist()
+            ]
+        self._count_range_sources(search)
+        return results
+        
+    def nearest_genes_batch(
+        self,
+        genes: Union[np.ndarray, Sequence[Union[int, str]]],
+        k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """``nearest_genes`` for many seeds, sharing one visited buffer."""
+        search = RangeSearch(self.graph, self.landmark_table, self.ball_index)
+        with self.instrumentation.phase('range_queries'):
+            results = [
+                self._named(*search.nearest(v, k))
+                for v in self._node_ids(genes).tolist()
+            ]
+        self._count_range_sources(search)
+        return results
+        
+    def expand_module(
+        self,
+        seeds: Union[np.ndarray, Sequence[Union[int, str]]],
+        radius: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Genes within ``radius`` of any seed, with distance to the nearest.
+
+        One multi-source BFS over the whole seed set, as used for disease
+        module expansion. Seeds are included at distance 0; results are
+        sorted by distance, then node id.
+        """
+        dist = bfs_distances(
+            self.graph.indptr, self.graph.indices, self._node_ids(seeds),
+            max_depth=max(radius, 0)
+        )
+        ids = np.flatnonzero(dist != UNREACHABLE)
+        order = np.argsort(dist[ids], kind='stable')
+        return self._named(ids[order], dist[ids][order])
+        
+    def _named(
+        self,
+        ids: np.ndarray,
+        dists: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return self.graph.node_names[ids], dists
+        
+    def _count_range_sources(self, search: RangeSearch) -> None:
+        for source in RANGE_SOURCES:
+            self.instrumentation.count(
+                f'range_from_{source}', search.sources[source]
+            )
+            
+    def _min_bound(self, s_ids: np.ndarray, t_ids: np.ndarray) -> np.ndarray:
+        """``min_l d(s,l) + d(l,t)`` per pair, evaluated in blocks."""
+        table = self.landmark_table
+        result = np.full(len(s_ids), UNREACHABLE, dtype=np.int32)
+        if not len(table.landmark_ids):
+            return result
+        for start in range(0, len(s_ids), MIN_BOUND_BLOCK):
+            block = slice(start, start + MIN_BOUND_BLOCK)
+            s_cols = table.distances[:, s_ids[block]].astype(np.int32)
+            t_cols = table.distances[:, t_ids[block]].astype(np.int32)
+            through = s_cols + t_cols
+            through[(s_cols == table.sentinel) | (t_cols == table.sentinel)] = (
+                np.iinfo(np.int32).max
+            )
+            best = through.min(axis=0)
+            best[best == np.iinfo(np.int32).max] = UNREACHABLE
+            result[block] = best
+        return result
+        
+    @staticmethod
+    def _check_bound(bound: str) -> None:
+        if bound not in LANDMARK_BOUNDS:
+            raise ValueError(
+                f"Unknown landmark bound {bound!r}, expected one of "
+                f"{LANDMARK_BOUNDS}"
+            )
+            
+    def _node_ids(
+        self,
+        nodes: Union[np.ndarray, Sequence[Union[int, str]]]
+    ) -> np.ndarray:
+        """Converts node ids or gene symbols to an int64 id array."""
+        nodes = np.asarray(nodes)
+        if nodes.dtype.kind in 'iu':
+            return nodes.astype(np.int64, copy=False)
+        return self.graph.ids_of(nodes.tolist())
+        
+    def save(self, path: Union[str, Path]) -> None:
+        """Writes the oracle as a versioned directory of flat .npy arrays.
+
+        ``header.json`` records the format version, the graph fingerprint and
+        the sampling probabilities and seeds used for landmarks and balls.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / 'header.json').unlink(missing_ok=True)
+        table, balls = self.landmark_table, self.ball_index
+        arrays = {
+            'graph_indptr': self.graph.indptr,
+            'graph_indices': self.graph.indices,
+            'node_names': np.array(self.graph.node_names.tolist(), dtype=str),
+            'landmark_ids': table.landmark_ids,
+            'landmark_distances': table.distances,
+            'nearest_landmark': table.nearest_landmark,
+            'nearest_landmark_dist': table.nearest_landmark_dist,
+            'ball_centers': balls.centers,
+            'ball_radii': balls.radii,
+            'ball_indptr': balls.indptr,
+            'ball_members': balls.members,
+            'ball_member_dists': balls.member_dists,
+            'ball_capped': balls.capped,
+            'exact_keys': self.exact_index.keys,
+            'exact_values': self.exact_index.values,
+            'component_ids': self.components.component_ids,
+        }
+        for name, array in arrays.items():
+            target = path / f'{name}.npy'
+            # Memory-mapped arrays may already live in this directory
+            filename = getattr(array, 'filename', None)
+            if filename and Path(filename).resolve() == target.resolve():
+                continue
+            # Replace rather than overwrite: a loaded index may still be
+            # reading the old file through a memory map
+            partial = path / f'{name}.npy.partial'
+            with open(partial, 'wb') as f:
+                np.save(f, np.asarray(array))
+            os.replace(partial, target)
+        header = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'graph_fingerprint': self.graph.fingerprint(),
+            'num_nodes': self.graph.number_of_nodes(),
+            'num_edges': self.graph.number_of_edges(),
+            'small_component_size': self.components.small_size,
+            'sampling': {
+                'landmark_probability': table.probability,
+                'landmark_seed': table.seed,
+                'landmark_strategy': table.strategy,
+                'neighborhood_probability': balls.probability,
+                'neighborhood_seed': balls.seed,
+                'neighborhood_strategy': balls.strategy,
+                'max_ball_size': balls.max_size,
+            },
+        }
+        # Header goes last so a partially written index is never loadable
+        with open(path / 'header.json', 'w') as f:
+            json.dump(header, f, indent=2)
+            
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        network: Optional[Union[nx.Graph, CompactGraph]] = None,
+        mmap: bool = True
+    ) -> 'DistanceStorage':
+        """Loads an index written by ``save``.
+
+        With ``mmap=True`` arrays are memory-mapped read-only, so loading is
+        near-instant and pages are shared between processes. If ``network``
+        is given, the index is rejected with ValueError when its graph
+        fingerprint does not match.
+        """
+        path = Path(path)
+        header = cls.read_header(path)
+        if header['format_version'] != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported index format {header['format_version']} "
+                f"in {path}, expected {INDEX_FORMAT_VERSION}"
+            )
+        mmap_mode = 'r' if mmap else None
+        
+        def array(name: str) -> np.ndarray:
+            return np.load(path / f'{name}.npy', mmap_mode=mmap_mode)
+            
+        if network is not None:
+            graph = as_compact_graph(network)
+            if graph.fingerprint() != header['graph_fingerprint']:
+                raise ValueError(f"Stale index at {path}: graph has changed")
+        else:
+            graph = CompactGraph(
+                array('graph_indptr'), array('graph_indices'),
+                np.load(path / 'node_names.npy').tolist()
+            )
+            
+        sampling = header['sampling']
+        table = LandmarkTable(
+            array('landmark_ids'), array('landmark_distances'),
+            array('nearest_landmark'), array('nearest_landmark_dist')
+        )
+        table.probability = sampling['landmark_probability']
+        table.seed = sampling['landmark_seed']
+        table.strategy = sampling.get('landmark_strategy')
+        balls = BallIndex(
+            array('ball_centers'), array('ball_radii'), array('ball_indptr'),
+            array('ball_members'), array('ball_member_dists'),
+            array('ball_capped')
+        )
+        balls.probability = sampling['neighborhood_probability']
+        balls.seed = sampling['neighborhood_seed']
+        balls.strategy = sampling.get('neighborhood_strategy')
+        balls.max_size = sampling.get('max_ball_size')
+        
+        oracle = cls.__new__(cls)
+        oracle._init_state(
+            graph,
+            ComponentIndex(
+                array('component_ids'), header['small_component_size']
+            ),
+            set(graph.node_names[table.landmark_ids].tolist()), balls, table
+        )
+        oracle.exact_index = PairDistanceIndex(
+            array('exact_keys'), array('exact_values')
+        )
+        return oracle
+        
+    @staticmethod
+    def read_header(path: Union[str, Path]) -> Dict[str, Any]:
+        """Reads the header of a saved index."""
+        with open(Path(path) / 'header.json') as f:
+            return json.load(f)
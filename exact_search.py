@@ -0,0 +1,193 @@
+# src/algorithms/exact_search.py
+from typing import List, Optional, Tuple
+import numpy as np
+from .compact_graph import CompactGraph, UNREACHABLE, expand_frontier
+from .landmark_sampler import LandmarkTable
+
+# Vertex expansions allowed per exact query before falling back
+DEFAULT_EXPANSION_BUDGET = 100_000
+
+# Landmarks whose triangle-inequality bounds prune each search
+DEFAULT_PRUNING_LANDMARKS = 4
+
+
+class BidirectionalSearch:
+    """Exact point-to-point distances by budgeted bidirectional BFS.
+
+    Each query grows level-synchronous BFS frontiers from both endpoints,
+    always expanding the one with fewer edges to scan, until the best
+    meeting found so far is provably shortest. Landmark distances bound the
+    search from both sides: ``min_l d(s,l) + d(l,t)`` is an upper bound
+    that ends it as soon as the explored depths rule out anything shorter,
+    and the lower bounds ``|d(v,l) - d(t,l)|`` of the ``pruning_landmarks``
+    most informative landmarks drop frontier vertices that cannot lie on a
+    shorter path.
+
+    After ``budget`` vertex expansions the search stops and returns its
+    best upper bound, flagged as not exact. The per-vertex distance
+    buffers are allocated once and reset after every query, so one
+    instance serves any number of queries; it is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        graph: CompactGraph,
+        landmark_table: Optional[LandmarkTable] = None,
+        budget: Optional[int] = DEFAULT_EXPANSION_BUDGET,
+        pruning_landmarks: int = DEFAULT_PRUNING_LANDMARKS
+    ):
+        self.graph = graph
+        self.landmark_table = landmark_table
+        self.budget = budget
+        self.pruning_landmarks = pruning_landmarks
+        n = graph.number_of_nodes()
+        self.degree = graph.degree()
+        self.dist_s = np.full(n, UNREACHABLE, dtype=np.int32)
+        self.dist_t = np.full(n, UNREACHABLE, dtype=np.int32)
+        self.expansions = 0
+        self.fallbacks = 0
+
+    def bounds(
+        self,
+        s: int,
+        t: int
+    ) -> Tuple[int, float, np.ndarray]:
+        """``(lower, upper, rows)`` landmark bounds on ``d(s, t)``.
+
+        ``rows`` are the landmark rows with the largest lower bounds, used
+        for pruning. ``upper`` is inf when no landmark reaches both ends.
+        """
+        table = self.landmark_table
+        if table is None or not len(table.landmark_ids):
+            return 0, float('inf'), np.empty(0, dtype=np.int64)
+        s_col = table.distances[:, s].astype(np.int64)
+        t_col = table.distances[:, t].astype(np.int64)
+        rows = np.flatnonzero(
+            (s_col != table.sentinel) & (t_col != table.sentinel)
+        )
+        if not rows.size:
+            return 0, float('inf'), rows
+        gaps = np.abs(s_col[rows] - t_col[rows])
+        upper = int((s_col[rows] + t_col[rows]).min())
+        if rows.size > self.pruning_landmarks:
+            best = np.argpartition(-gaps, self.pruning_landmarks)
+            rows = rows[best[:self.pruning_landmarks]]
+        return int(gaps.max()), upper, rows
+
+    def batch_bounds(
+        self,
+        s_ids: np.ndarray,
+        t_ids: np.ndarray,
+        block: int = 4096
+    ) -> List[Tuple[int, float, np.ndarray]]:
+        """``bounds`` for many pairs, evaluated in blocks of columns."""
+        table = self.landmark_table
+        if table is None or not len(table.landmark_ids):
+            return [self.bounds(s, t) for s, t in zip(s_ids, t_ids)]
+        k = min(self.pruning_landmarks, len(table.landmark_ids))
+        result = []
+        for start in range(0, len(s_ids), block):
+            s_cols = table.distances[:, s_ids[start:start + block]]
+            t_cols = table.distances[:, t_ids[start:start + block]]
+            s_cols, t_cols = s_cols.astype(np.int64), t_cols.astype(np.int64)
+            valid = (s_cols != table.sentinel) & (t_cols != table.sentinel)
+            gaps = np.where(valid, np.abs(s_cols - t_cols), -1)
+            through = np.where(valid, s_cols + t_cols, np.iinfo(np.int64).max)
+            uppers = through.min(axis=0)
+            lowers = gaps.max(axis=0)
+            if k < len(gaps):
+                tops = np.argpartition(-gaps, k, axis=0)[:k]
+            else:
+                tops = np.broadcast_to(
+                    np.arange(len(gaps))[:, None], gaps.shape
+                )
+            for j in range(s_cols.shape[1]):
+                if lowers[j] < 0:
+                    result.append(
+                        (0, float('inf'), np.empty(0, dtype=np.int64))
+                    )
+                    continue
+                rows = tops[:, j]
+                result.append((
+                    int(lowers[j]), int(uppers[j]),
+                    rows[valid[rows, j]]
+                ))
+        return result
+
+    def distance(
+        self,
+        s: int,
+        t: int,
+        bounds: Optional[Tuple[int, float, np.ndarray]] = None
+    ) -> Tuple[int, bool]:
+        """``(distance, exact)`` between node ids ``s`` and ``t``.
+
+        ``bounds`` takes precomputed ``bounds(s, t)`` output. The distance
+        is UNREACHABLE when no path exists, or when the budget ran out
+        before any path was found.
+        """
+        if s == t:
+            return 0, True
+        lower, upper, rows = self.bounds(s, t) if bounds is None else bounds
+        indptr, indices = self.graph.indptr, self.graph.indices
+        dist_s, dist_t = self.dist_s, self.dist_t
+        table = self.landmark_table
+        if rows.size:
+            s_pivot = table.distances[rows, s].astype(np.int64)
+            t_pivot = table.distances[rows, t].astype(np.int64)
+        dist_s[s] = 0
+        dist_t[t] = 0
+        frontiers = [np.array([s]), np.array([t])]
+        # Edges each frontier would scan if expanded next
+        work = [int(self.degree[s]), int(self.degree[t])]
+        depths = [0, 0]
+        touched = [[frontiers[0]], [frontiers[1]]]
+        best = float('inf')
+        expanded = 0
+        exact = True
+        while True:
+            answer = min(best, upper)
+            # Nothing shorter than depth_s + depth_t + 1 can be unseen
+            if answer <= max(depths[0] + depths[1] + 1, lower):
+                break
+            if not frontiers[0].size or not frontiers[1].size:
+                break
+            if self.budget is not None and expanded >= self.budget:
+                exact = False
+                self.fallbacks += 1
+                break
+
+            side = 0 if work[0] <= work[1] else 1
+            dist, other = (dist_s, dist_t) if side == 0 else (dist_t, dist_s)
+            frontier = frontiers[side]
+            expanded += frontier.size
+            if frontier.size == 1:
+                v = frontier[0]
+                nbrs = indices[indptr[v]:indptr[v + 1]]
+                new = nbrs[dist[nbrs] == UNREACHABLE]
+            else:
+                nbrs = expand_frontier(indptr, indices, frontier)
+                new = np.unique(nbrs[dist[nbrs] == UNREACHABLE])
+            depth = depths[side] + 1
+            dist[new] = depth
+            touched[side].append(new)
+            depths[side] = depth
+
+            met = other[new]
+            met = met[met != UNREACHABLE]
+            if met.size:
+                best = min(best, depth + int(met.min()))
+            if rows.size and new.size:
+                # Lower bound on the remaining distance to the far endpoint
+                target = t_pivot if side == 0 else s_pivot
+                pivots = table.distances[rows[:, None], new].astype(np.int64)
+                remaining = np.abs(pivots - target[:, None]).max(axis=0)
+                new = new[depth + remaining < min(best, upper)]
+            frontiers[side] = new
+            work[side] = int(self.degree[new].sum())
+
+        for side, dist in ((0, dist_s), (1, dist_t)):
+            dist[np.concatenate(touched[side])] = UNREACHABLE
+        self.expansions += expanded
+        answer = min(best, upper)
+        return (UNREACHABLE if answer == float('inf') else int(answer)), exact
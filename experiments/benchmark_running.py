@@ -1,101 +1,530 @@
-# src/experiments/benchmark_runner.py
-import time
-import psutil
-import pandas as pd
-from typing import Dict, Any, List
-import networkx as nx
-from ..algorithms.distance_oracle import DistanceOracle
-
-class BenchmarkRunner:
-    """Runs performance benchmarks on the implementation."""
-    
-    def __init__(self, network: nx.Graph, oracle: DistanceOracle):
-        self.network = network
-        self.oracle = oracle
-        self.results: Dict[str, List[float]] = {
-            'query_time': [],
-            'memory_usage': []
-        }
-        
-    def measure_query_time(
-        self,
-        num_queries: int = 1000
-    ) -> Dict[str, float]:
-        """Measures average query time."""
-        nodes = list(self.network.nodes())
-        pairs = [
-            (nodes[i], nodes[j])
-            for i in range(num_queries)
-            for j in range(i + 1, min(i + 2, len(nodes)))
-        ]
-        
-        start_time = time.time()
-        for s, t in pairs:
-            self.oracle.query_distance(s, t)
-        end_time = time.time()
-        
-        avg_query_time = (end_time - start_time) / len(pairs)
-        self.results['query_time'].append(avg_query_time)
-        
-        return {
-            'avg_query_time': avg_query_time,
-            'num_queries': len(pairs)
-        }
-        
-    def measure_memory_usage(self) -> Dict[str, float]:
-        """Measures memory usage of the oracle."""
-        process = psutil.Process()
-        memory_info = process.memory_info()
-        
-        memory_usage = memory_info.rss / 1024 / 1024  # Convert to MB
-        self.results['memory_usage'].append(memory_usage)
-        
-        return {
-            'memory_usage_mb': memory_usage
-        }
-        
-    def run_scalability_test(
-        self,
-        network_sizes: List[int]
-    ) -> pd.DataFrame:
-        """Tests scalability with different network sizes."""
-        results = []
-        
-        for size in network_sizes:
-            # Create subgraph of specified size
-            nodes = list(self.network.nodes())[:size]
-            subgraph = self.network.subgraph(nodes)
-            
-            # Initialize oracle for subgraph
-            from ..algorithms.landmark_sampler import LandmarkSampler
-            from ..algorithms.neighborhood_sampler import NeighborhoodSampler
-            
-            landmark_sampler = LandmarkSampler(subgraph)
-            landmarks = landmark_sampler.sample_landmarks()
-            landmark_distances = landmark_sampler.compute_landmark_distances()
-            
-            neighborhood_sampler = NeighborhoodSampler(
-                subgraph, landmarks, landmark_distances
-            )
-            neighborhood_vertices = (
-                neighborhood_sampler.sample_neighborhood_vertices()
-            )
-            balls = neighborhood_sampler.compute_balls(neighborhood_vertices)
-            
-            subgraph_oracle = DistanceOracle(
-                subgraph, landmarks, balls, landmark_distances
-            )
-            
-            # Measure performance
-            query_time = self.measure_query_time()['avg_query_time']
-            memory_usage = self.measure_memory_usage()['memory_usage_mb']
-            
-            results.append({
-                'network_size': size,
-                'query_time': query_time,
-                'memory_usage': memory_usage,
-                'num_landmarks': len(landmarks),
-                'num_balls': len(balls)
-            })
-            
-        return pd.DataFrame(results)
+# src/experiments/benchmark_runner.py
+import json
+import platform
+import random
+import time
+import pandas as pd
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import networkx as nx
+import numpy as np
+from ..algorithms.compact_graph import (
+    CompactGraph, UNREACHABLE, as_compact_graph
+)
+from ..algorithms.components import ComponentIndex
+from ..algorithms.landmark_sampler import LandmarkSampler
+from ..algorithms.neighborhood_sampler import NeighborhoodSampler
+from ..algorithms.distance_storage import DistanceStorage, LANDMARK_BOUNDS
+from ..algorithms.parallel_bfs import ParallelBFSEngine
+from ..algorithms.sampling_strategies import SamplingStrategy
+
+# Query workloads understood by BenchmarkRunner.measure_query_time
+WORKLOADS = ('random', 'pathway')
+
+# Latency percentiles reported for every workload
+LATENCY_PERCENTILES = (50, 95, 99)
+
+# Log-spaced latency histogram bin edges in microseconds (0.1us .. 100ms)
+LATENCY_BINS_US = np.logspace(-1, 5, 25)
+
+# Distinct BFS sources per ground-truth distance matrix block
+EXACT_BLOCK_ROWS = 256
+
+# Additive errors 0..MAX_REPORTED_ERROR-1 get their own histogram bucket
+MAX_REPORTED_ERROR = 8
+
+
+def barabasi_albert_graph(
+    n: int,
+    m: int = 3,
+    seed: Optional[int] = None
+) -> CompactGraph:
+    """Preferential-attachment graph by the Batagelj-Brandes edge copying.
+
+    Each new node attaches ``m`` edges to endpoints drawn uniformly from
+    all previous edge endpoints, i.e. proportionally to degree. Duplicate
+    edges and self-loops are dropped, so a few nodes end up with degree
+    below ``m``.
+    """
+    rng = np.random.default_rng(seed)
+    num_edges = max(n - 1, 0) * m
+    endpoints = np.empty(2 * num_edges, dtype=np.int64)
+    draws = rng.random(num_edges)
+    for e in range(num_edges):
+        v = e // m + 1
+        endpoints[2 * e] = v
+        # The first edge has no earlier endpoints: attach to node 0
+        endpoints[2 * e + 1] = endpoints[int(draws[e] * 2 * e)] if e else 0
+    return CompactGraph.from_edges(
+        endpoints[0::2], endpoints[1::2], [f'N{i}' for i in range(n)]
+    )
+
+
+def duplication_divergence_graph(
+    n: int,
+    retention: float = 0.4,
+    seed: Optional[int] = None
+) -> CompactGraph:
+    """Protein-network style duplication-divergence graph.
+
+    Each new node copies the edges of a uniformly chosen existing node and
+    keeps every copied edge with probability ``retention``. A duplicate
+    that keeps no edge is linked to its parent so the graph stays connected.
+    """
+    rng = random.Random(seed)
+    adjacency: List[List[int]] = [[1], [0]][:n]
+    for v in range(len(adjacency), n):
+        parent = rng.randrange(v)
+        nbrs = [u for u in adjacency[parent] if rng.random() < retention]
+        if not nbrs:
+            nbrs = [parent]
+        adjacency.append(nbrs)
+        for u in nbrs:
+            adjacency[u].append(v)
+    src = np.repeat(
+        np.arange(n, dtype=np.int64), [len(nbrs) for nbrs in adjacency]
+    )
+    dst = np.fromiter(
+        (u for nbrs in adjacency for u in nbrs), dtype=np.int64,
+        count=len(src)
+    )
+    return CompactGraph.from_edges(src, dst, [f'N{i}' for i in range(n)])
+
+
+# Synthetic graph generators by name, called as generator(n, seed=seed)
+GRAPH_GENERATORS: Dict[str, Callable[..., CompactGraph]] = {
+    'barabasi_albert': barabasi_albert_graph,
+    'duplication_divergence': duplication_divergence_graph,
+}
+
+
+def induced_subgraph(graph: CompactGraph, size: int) -> CompactGraph:
+    """Subgraph induced by the first ``size`` node ids."""
+    edges = graph.edge_array()
+    edges = edges[edges[:, 1] < size]
+    return CompactGraph.from_edges(
+        edges[:, 0], edges[:, 1], graph.node_names[:size]
+    )
+
+
+def _results_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Rows as a DataFrame with one ``latency_bin_<i>`` column per bin."""
+    flat = []
+    for row in rows:
+        row = dict(row)
+        counts = row.pop('latency_hist_counts', None)
+        if counts is not None:
+            row.update({
+                f'latency_bin_{i}': count for i, count in enumerate(counts)
+            })
+        flat.append(row)
+    return pd.DataFrame(flat)
+
+
+class BenchmarkRunner:
+    """Runs performance benchmarks on the implementation.
+
+    Every measurement is made against the oracle that was built for the
+    graph being measured. Memory is the exact size of the oracle's arrays
+    rather than process RSS, and query latencies are reported as
+    percentiles and a histogram per workload.
+    """
+
+    def __init__(
+        self,
+        network: Union[nx.Graph, CompactGraph],
+        oracle: Optional[DistanceStorage] = None,
+        max_workers: int = 1,
+        chunk_size: int = 1000,
+        seed: Optional[int] = None,
+        max_ball_size: Optional[int] = None,
+        landmark_strategy: Union[str, SamplingStrategy] = 'bernoulli',
+        neighborhood_strategy: Union[str, SamplingStrategy] = 'bernoulli'
+    ):
+        self.graph = as_compact_graph(network)
+        self.oracle = oracle
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.max_ball_size = max_ball_size
+        self.landmark_strategy = landmark_strategy
+        self.neighborhood_strategy = neighborhood_strategy
+        self.results: List[Dict[str, Any]] = []
+
+    def build_oracle(
+        self,
+        graph: CompactGraph,
+        landmark_probability: Optional[float] = None,
+        neighborhood_probability: Optional[float] = None
+    ) -> Tuple[DistanceStorage, Dict[str, float]]:
+        """Builds an oracle for ``graph`` and times each build phase.
+
+        The sampling probabilities default to n^(-1/3) and n^(-2/3) of
+        each connected component.
+        """
+        seed = self.seed
+        timings = {}
+
+        start = time.perf_counter()
+        components = ComponentIndex.from_graph(graph)
+        timings['components'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        landmark_sampler = LandmarkSampler(
+            graph, self.max_workers, self.chunk_size, seed,
+            self.landmark_strategy, components=components
+        )
+        landmarks = landmark_sampler.sample_landmarks(landmark_probability)
+        landmark_distances = landmark_sampler.compute_landmark_distances(
+            dense=True
+        )
+        timings['landmarks'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        neighborhood_sampler = NeighborhoodSampler(
+            graph, landmarks, landmark_distances,
+            self.max_workers, self.chunk_size,
+            None if seed is None else seed + 1, self.neighborhood_strategy,
+            components=components
+        )
+        balls = neighborhood_sampler.compute_balls(
+            neighborhood_sampler.sample_neighborhood_vertices(
+                neighborhood_probability
+            ),
+            max_ball_size=self.max_ball_size,
+            compact=True
+        )
+        timings['balls'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        oracle = DistanceStorage(
+            graph, landmarks, balls, landmark_distances,
+            components=components
+        )
+        timings['exact_table'] = time.perf_counter() - start
+        timings['total'] = sum(timings.values())
+        return oracle, timings
+
+    def query_pairs(
+        self,
+        graph: CompactGraph,
+        num_queries: int,
+        workload: str = 'random',
+        pathway_size: int = 50
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Node id pairs for a query workload.
+
+        ``random`` draws uniform pairs. ``pathway`` mimics pathway ASPL
+        scoring: all pairs within gene sets of about ``pathway_size``
+        nodes grown by BFS around random centers.
+        """
+        if workload not in WORKLOADS:
+            raise ValueError(
+                f"Unknown workload {workload!r}, expected one of {WORKLOADS}"
+            )
+        rng = np.random.default_rng(self.seed)
+        if workload == 'random':
+            return (
+                rng.integers(0, graph.n, num_queries),
+                rng.integers(0, graph.n, num_queries)
+            )
+
+        sources, targets = [], []
+        total = 0
+        visited = np.zeros(graph.n, dtype=bool)
+        for center in rng.integers(0, graph.n, 10 * num_queries + 1):
+            if total >= num_queries:
+                break
+            genes, _, _ = graph.truncated_bfs(
+                int(center), max_size=pathway_size, visited=visited
+            )
+            i, j = np.triu_indices(len(genes), 1)
+            sources.append(genes[i])
+            targets.append(genes[j])
+            total += len(i)
+        sources = np.concatenate(sources)[:num_queries]
+        targets = np.concatenate(targets)[:num_queries]
+        return sources, targets
+
+    def measure_query_time(
+        self,
+        oracle: Optional[DistanceStorage] = None,
+        num_queries: int = 1000,
+        workload: str = 'random'
+    ) -> Dict[str, Any]:
+        """Per-query latency percentiles and batch throughput.
+
+        Scalar ``query_distance`` calls are timed one by one; the same
+        pairs are then answered by a single ``query_distances`` batch.
+        ``latency_hist_counts`` counts the scalar latencies per
+        ``LATENCY_BINS_US`` bin.
+        """
+        oracle = self.oracle if oracle is None else oracle
+        s_ids, t_ids = self.query_pairs(oracle.graph, num_queries, workload)
+        names = oracle.graph.node_names
+        pairs = list(zip(names[s_ids].tolist(), names[t_ids].tolist()))
+
+        latencies = np.empty(len(pairs), dtype=np.float64)
+        for k, (s, t) in enumerate(pairs):
+            start = time.perf_counter_ns()
+            oracle.query_distance(s, t)
+            latencies[k] = time.perf_counter_ns() - start
+        latencies_us = latencies / 1000
+
+        start = time.perf_counter()
+        oracle.query_distances(s_ids, t_ids)
+        batch_time = time.perf_counter() - start
+
+        counts, _ = np.histogram(latencies_us, bins=LATENCY_BINS_US)
+        result: Dict[str, Any] = {
+            'workload': workload,
+            'num_queries': len(pairs),
+            'avg_query_time': (
+                float(latencies.mean()) / 1e9 if len(pairs) else 0.0
+            ),
+        }
+        for q, value in zip(
+            LATENCY_PERCENTILES,
+            np.percentile(latencies_us, LATENCY_PERCENTILES)
+            if len(pairs) else [0.0] * len(LATENCY_PERCENTILES)
+        ):
+            result[f'p{q}_us'] = float(value)
+        result['batch_qps'] = len(pairs) / batch_time if batch_time else 0.0
+        result['latency_hist_counts'] = counts.tolist()
+        return result
+
+    def measure_memory_usage(
+        self,
+        oracle: Optional[DistanceStorage] = None
+    ) -> Dict[str, float]:
+        """Exact memory held by the oracle, per component and in total."""
+        oracle = self.oracle if oracle is None else oracle
+        breakdown = oracle.memory_breakdown()
+        usage = {f'{name}_bytes': nbytes for name, nbytes in breakdown.items()}
+        usage['graph_bytes'] = oracle.graph.nbytes
+        usage['memory_usage_mb'] = oracle.nbytes / 1024 / 1024
+        return usage
+
+    def exact_distances(
+        self,
+        graph: CompactGraph,
+        s_ids: np.ndarray,
+        t_ids: np.ndarray
+    ) -> np.ndarray:
+        """Ground-truth distances by one BFS per distinct source.
+
+        Sources are expanded a block at a time into a distance matrix, so
+        memory stays at ``EXACT_BLOCK_ROWS x n`` regardless of the number
+        of pairs. Returns int32 with UNREACHABLE for disconnected pairs.
+        """
+        engine = ParallelBFSEngine(graph, self.max_workers, self.chunk_size)
+        sources, rows = np.unique(s_ids, return_inverse=True)
+        rows = rows.reshape(-1)
+        exact = np.empty(len(s_ids), dtype=np.int32)
+        for start in range(0, len(sources), EXACT_BLOCK_ROWS):
+            block = engine.distance_matrix(
+                sources[start:start + EXACT_BLOCK_ROWS]
+            )
+            sentinel = np.iinfo(block.dtype).max
+            pick = np.flatnonzero(
+                (rows >= start) & (rows < start + EXACT_BLOCK_ROWS)
+            )
+            dists = block[rows[pick] - start, t_ids[pick]].astype(np.int32)
+            dists[dists == sentinel] = UNREACHABLE
+            exact[pick] = dists
+        return exact
+
+    @staticmethod
+    def stretch_stats(
+        estimated: np.ndarray,
+        exact: np.ndarray
+    ) -> Dict[str, Any]:
+        """Summarizes oracle estimates against exact distances.
+
+        Additive error is ``estimate - exact`` over pairs that are connected
+        and got a finite estimate; ``missed`` counts connected pairs the
+        oracle reported as unreachable. ``underestimates`` should be zero.
+        """
+        connected = exact != UNREACHABLE
+        answered = connected & (estimated != UNREACHABLE)
+        error = (estimated[answered] - exact[answered]).astype(np.int64)
+        positive = exact[answered] > 0
+        ratio = estimated[answered][positive] / exact[answered][positive]
+        histogram = np.bincount(
+            np.clip(error, 0, MAX_REPORTED_ERROR),
+            minlength=MAX_REPORTED_ERROR + 1
+        )
+        return {
+            'num_pairs': len(exact),
+            'num_connected': int(connected.sum()),
+            'missed': int((connected & ~answered).sum()),
+            'false_paths': int(
+                (~connected & (estimated != UNREACHABLE)).sum()
+            ),
+            'underestimates': int((error < 0).sum()),
+            'exact_hit_rate': (
+                float((error == 0).mean()) if error.size else float('nan')
+            ),
+            'mean_additive_error': (
+                float(error.mean()) if error.size else float('nan')
+            ),
+            'max_additive_error': int(error.max(initial=0)),
+            'mean_stretch': (
+                float(ratio.mean()) if ratio.size else float('nan')
+            ),
+            'max_stretch': float(ratio.max()) if ratio.size else float('nan'),
+            'error_histogram': {
+                (f'{e}' if e < MAX_REPORTED_ERROR else f'{e}+'): int(count)
+                for e, count in enumerate(histogram)
+            },
+        }
+
+    def measure_accuracy(
+        self,
+        oracle: Optional[DistanceStorage] = None,
+        num_queries: int = 1000,
+        workload: str = 'random',
+        bounds: Tuple[str, ...] = LANDMARK_BOUNDS
+    ) -> List[Dict[str, Any]]:
+        """Stretch statistics per landmark bound on one query workload."""
+        oracle = self.oracle if oracle is None else oracle
+        s_ids, t_ids = self.query_pairs(oracle.graph, num_queries, workload)
+        exact = self.exact_distances(oracle.graph, s_ids, t_ids)
+        return [
+            {
+                'workload': workload,
+                'bound': bound,
+                **self.stretch_stats(
+                    oracle.query_distances(s_ids, t_ids, bound), exact
+                ),
+            }
+            for bound in bounds
+        ]
+
+    def run_accuracy_sweep(
+        self,
+        landmark_probabilities: List[Optional[float]],
+        neighborhood_probabilities: List[Optional[float]],
+        num_queries: int = 1000,
+        workloads: Tuple[str, ...] = WORKLOADS,
+        bounds: Tuple[str, ...] = LANDMARK_BOUNDS
+    ) -> pd.DataFrame:
+        """Accuracy against build cost over a grid of sampling probabilities.
+
+        Each (landmark, neighborhood) probability pair builds one oracle on
+        the runner's network; None keeps the default probability. Rows hold
+        build timings, memory and the stretch statistics of every workload
+        and bound.
+        """
+        results = []
+        for p1 in landmark_probabilities:
+            for p2 in neighborhood_probabilities:
+                oracle, timings = self.build_oracle(self.graph, p1, p2)
+                base = {
+                    'landmark_strategy': oracle.landmark_table.strategy,
+                    'neighborhood_strategy': oracle.ball_index.strategy,
+                    'landmark_probability': oracle.landmark_table.probability,
+                    'neighborhood_probability': oracle.ball_index.probability,
+                    'num_landmarks': len(oracle.landmark_table.landmark_ids),
+                    'num_balls': len(oracle.ball_index),
+                    'num_exact_pairs': len(oracle.exact_index),
+                    **{f'build_{phase}_s': t for phase, t in timings.items()},
+                    **self.measure_memory_usage(oracle),
+                }
+                for workload in workloads:
+                    for row in self.measure_accuracy(
+                        oracle, num_queries, workload, bounds
+                    ):
+                        histogram = row.pop('error_histogram')
+                        row.update({
+                            f'error_{e}': count
+                            for e, count in histogram.items()
+                        })
+                        results.append({**base, **row})
+        self.results.extend(results)
+        return pd.DataFrame(results)
+
+    def benchmark_graph(
+        self,
+        graph: CompactGraph,
+        num_queries: int = 1000,
+        workloads: Tuple[str, ...] = WORKLOADS,
+        **labels: Any
+    ) -> List[Dict[str, Any]]:
+        """Builds and measures one oracle, returning one row per workload."""
+        oracle, timings = self.build_oracle(graph)
+        base = {
+            **labels,
+            'num_nodes': graph.number_of_nodes(),
+            'num_edges': graph.number_of_edges(),
+            'num_landmarks': len(oracle.landmark_table.landmark_ids),
+            'num_balls': len(oracle.ball_index),
+            'num_exact_pairs': len(oracle.exact_index),
+            **{f'build_{phase}_s': t for phase, t in timings.items()},
+            **self.measure_memory_usage(oracle),
+        }
+        rows = []
+        for workload in workloads:
+            latency = self.measure_query_time(oracle, num_queries, workload)
+            rows.append({**base, **latency})
+        self.results.extend(rows)
+        return rows
+
+    def run_scalability_test(
+        self,
+        network_sizes: List[int],
+        num_queries: int = 1000
+    ) -> pd.DataFrame:
+        """Tests scalability on subgraphs of the runner's network."""
+        results = []
+        for size in network_sizes:
+            subgraph = induced_subgraph(self.graph, size)
+            results.extend(self.benchmark_graph(
+                subgraph, num_queries, network_size=size
+            ))
+        return _results_frame(results)
+
+    def run_synthetic_suite(
+        self,
+        network_sizes: List[int],
+        generators: Tuple[str, ...] = tuple(GRAPH_GENERATORS),
+        num_queries: int = 1000
+    ) -> pd.DataFrame:
+        """Benchmarks oracles on synthetic graphs of every size."""
+        results = []
+        for name in generators:
+            generator = GRAPH_GENERATORS[name]
+            for size in network_sizes:
+                start = time.perf_counter()
+                graph = generator(size, seed=self.seed)
+                generate_time = time.perf_counter() - start
+                results.extend(self.benchmark_graph(
+                    graph, num_queries, generator=name, network_size=size,
+                    generate_s=generate_time
+                ))
+        return _results_frame(results)
+
+    def write_results(self, path: Union[str, Path]) -> None:
+        """Writes all rows measured so far as JSON for run-to-run diffs.
+
+        Latency histograms stay in the rows as ``latency_hist_counts``; their
+        shared bin edges are written once, as ``latency_bin_edges_us``.
+        """
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'latency_bin_edges_us': LATENCY_BINS_US.tolist(),
+            'config': {
+                'max_workers': self.max_workers,
+                'chunk_size': self.chunk_size,
+                'seed': self.seed,
+                'max_ball_size': self.max_ball_size,
+                'landmark_strategy': repr(self.landmark_strategy),
+                'neighborhood_strategy': repr(self.neighborhood_strategy),
+            },
+            'results': self.results,
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -1,95 +1,616 @@
-
-# src/experiments/experiment_runner.py
-from typing import Dict, Any
-import yaml
-import logging
-from pathlib import Path
-from ..data.loader import BioGridLoader
-from ..algorithms.landmark_sampler import LandmarkSampler
-from ..algorithms.neighborhood_sampler import NeighborhoodSampler
-from ..algorithms.distance_oracle import DistanceOracle
-from ..analysis.aspl_calculator import ASPLCalculator
-from ..analysis.relatedness_classifier import RelatednessClassifier
-
-class ExperimentRunner:
-    """Runs the complete experimental pipeline."""
-    
-    def __init__(self, config_path: str):
-        self.config = self.load_config(config_path)
-        self.logger = logging.getLogger(__name__)
-        
-    def load_config(self, config_path: str) -> Dict[str, Any]:
-        """Loads experiment configuration."""
-        with open(config_path) as f:
-            return yaml.safe_load(f)
-            
-    def run_experiment(self) -> Dict[str, Any]:
-        """Executes the complete experimental pipeline."""
-        results = {}
-        
-        # Load and process data
-        loader = BioGridLoader(self.config['data_path'])
-        network, gene_pathways = loader.process_data()
-        self.logger.info(f"Loaded network with {network.number_of_nodes()} nodes")
-        
-        # Sample landmarks
-        landmark_sampler = LandmarkSampler(network)
-        landmarks = landmark_sampler.sample_landmarks()
-        landmark_distances = landmark_sampler.compute_landmark_distances()
-        self.logger.info(f"Sampled {len(landmarks)} landmarks")
-        
-        # Sample neighborhoods
-        neighborhood_sampler = NeighborhoodSampler(
-            network, landmarks, landmark_distances
-        )
-        neighborhood_vertices = neighborhood_sampler.sample_neighborhood_vertices()
-        balls = neighborhood_sampler.compute_balls(neighborhood_vertices)
-        self.logger.info(f"Created {len(balls)} neighborhood balls")
-        
-        # Build distance oracle
-        oracle = DistanceOracle(
-            network, landmarks, balls, landmark_distances
-        )
-        
-        # Calculate ASPLs
-        calculator = ASPLCalculator(oracle, gene_pathways)
-        classifier = RelatednessClassifier()
-        
-        # Run pathway analysis
-        pathway_results = {}
-        for pathway in self.config['pathways_to_analyze']:
-            avg_aspl, distances = calculator.calculate_pathway_aspl(pathway)
-            pathway_results[pathway] = {
-                'avg_aspl': avg_aspl,
-                'distances': distances
-            }
-            
-        results['pathway_results'] = pathway_results
-        
-        # Evaluate classification performance
-        if 'known_relations' in self.config:
-            known_related = [
-                (g1, g2, calculator.calculate_gene_pair_aspl(g1, g2))
-                for g1, g2 in self.config['known_relations']['related']
-            ]
-            known_unrelated = [
-                (g1, g2, calculator.calculate_gene_pair_aspl(g1, g2))
-                for g1, g2 in self.config['known_relations']['unrelated']
-            ]
-            
-            classifier.fit_threshold(known_related, known_unrelated)
-            
-            # Evaluate on test set
-            test_pairs = [
-                (g1, g2, calculator.calculate_gene_pair_aspl(g1, g2))
-                for g1, g2 in self.config['known_relations']['test']
-            ]
-            true_labels = self.config['known_relations']['test_labels']
-            predicted_labels = classifier.predict_relatedness(test_pairs)
-            
-            performance = classifier.evaluate_performance(
-                true_labels, predicted_labels
-            )
-            results['classification_performance'] = performance
-            
-        return results
+
+# src/experiments/experiment_runner.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import yaml
+import numpy as np
+import logging
+from pathlib import Path
+from ..data.loader import BioGridLoader
+from ..data.pathway_loader import PathwayIndex, PathwayLoader
+from ..algorithms.compact_graph import CompactGraph
+from ..algorithms.components import ComponentIndex, SMALL_COMPONENT_SIZE
+from ..algorithms.landmark_sampler import LandmarkSampler
+from ..algorithms.neighborhood_sampler import NeighborhoodSampler
+from ..algorithms.distance_storage import DistanceStorage
+from ..algorithms.sampling_strategies import as_sampling_strategy
+from ..analysis.aspl_calculator import ASPLCalculator
+from ..analysis.relatedness_classifier import RelatednessClassifier
+from ..utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+# Pipeline stages, in run order
+STAGES = ('load_data', 'build_oracle', 'pathway_analysis', 'classification')
+
+# Config keys each stage's output depends on, besides its upstream stages
+STAGE_CONFIG_KEYS = {
+    'load_data': (
+        'data_path', 'pathway_path', 'pathway_format', 'pathway_min_size',
+        'pathway_max_size'
+    ),
+    'build_oracle': (
+        'seed', 'max_ball_size', 'landmark_strategy', 'neighborhood_strategy',
+        'small_component_size', 'index_path'
+    ),
+    'pathway_analysis': ('pathways_to_analyze',),
+    'classification': (
+        'known_relations', 'landmark_bound', 'threshold_criterion'
+    ),
+}
+
+# Gene pairs per classification task sent to a worker
+PAIR_CHUNK = 100_000
+
+# Oracle and calculator loaded by each worker process in _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(index_path: str) -> None:
+    """Memory-maps the saved oracle, so workers share its pages."""
+    _set_worker_oracle(DistanceStorage.load(index_path, mmap=True))
+
+
+def _set_worker_oracle(oracle: DistanceStorage) -> None:
+    _worker_state['oracle'] = oracle
+    _worker_state['calculator'] = ASPLCalculator(oracle, {})
+
+
+def _pathway_task(
+    pathway: str,
+    gene_ids: np.ndarray,
+    distances_path: str
+) -> Dict[str, Any]:
+    """Scores one pathway, writing its condensed distances to disk."""
+    stats = _worker_state['calculator'].calculate_gene_set_stats(gene_ids)
+    partial = f'{distances_path}.partial'
+    with open(partial, 'wb') as f:
+        np.save(f, stats['distances'])
+    os.replace(partial, distances_path)
+    return {
+        'pathway': pathway,
+        'num_genes': stats['num_genes'],
+        'num_pairs': stats['num_pairs'],
+        'num_unreachable': stats['num_unreachable'],
+        'avg_aspl': stats['mean'],
+        'median_aspl': stats['median'],
+        'std_aspl': stats['std'],
+        'distances_path': distances_path,
+    }
+
+
+def _pairs_task(
+    group: str,
+    start: int,
+    sources: List[str],
+    targets: List[str],
+    bound: str
+) -> Tuple[str, int, np.ndarray]:
+    """Distances for one chunk of classification pairs."""
+    return group, start, _worker_state['oracle'].query_distances(
+        sources, targets, bound
+    )
+
+
+class ExperimentRunner:
+    """Runs the complete experimental pipeline.
+
+    The run is split into the named STAGES. Each stage writes its output to
+    ``checkpoint_dir/<stage>-<key>`` (next to the data file by default),
+    where the key hashes the config entries the stage depends on together
+    with its upstream stage's key (for data loading, the input files' size
+    and mtime), so a rerun with the same config resumes after the last
+    completed stage and a changed entry only invalidates the stages
+    downstream of it. Pathway results are appended to disk as each pathway
+    finishes, so an interrupted analysis also resumes where it stopped.
+    With ``performance.max_workers`` above 1, pathways and classification
+    pairs are spread over a process pool whose workers memory-map the saved
+    oracle read-only.
+    """
+    
+    def __init__(self, config_path: str):
+        self.config = self.load_config(config_path)
+        self.logger = logging.getLogger(__name__)
+        # Profiling is only switched on when a run report is requested
+        self.instrumentation = (
+            Instrumentation(progress=self.log_progress)
+            if self.config.get('report_path') else NULL_INSTRUMENTATION
+        )
+        
+    def load_config(self, config_path: str) -> Dict[str, Any]:
+        """Loads experiment configuration."""
+        with open(config_path) as f:
+            return yaml.safe_load(f)
+            
+    def log_progress(self, phase: str, done: int, total: int) -> None:
+        self.logger.info(f"{phase}: {done}/{total}")
+        
+    def build_oracle(
+        self,
+        network: CompactGraph,
+        index_path: Optional[Union[str, Path]] = None
+    ) -> DistanceStorage:
+        """Builds the distance oracle, reusing a persisted index if valid.
+
+        ``index_path`` defaults to the ``index_path`` config entry. A saved
+        index is only reused when it was built for the same graph with the
+        configured sampling settings.
+        """
+        index_path = index_path or self.config.get('index_path')
+        if index_path and Path(index_path, 'header.json').exists():
+            try:
+                self.check_index_header(
+                    DistanceStorage.read_header(index_path)
+                )
+                with self.instrumentation.phase('load_index'):
+                    oracle = DistanceStorage.load(index_path, network)
+                oracle.instrumentation = self.instrumentation
+                self.logger.info(f"Loaded oracle index from {index_path}")
+                return oracle
+            except ValueError as e:
+                self.logger.warning(f"Rebuilding oracle: {e}")
+                
+        performance = self.config.get('performance', {})
+        max_workers = performance.get('max_workers', 1)
+        chunk_size = performance.get('chunk_size', 1000)
+        seed = self.config.get('seed')
+        max_ball_size = self.config.get('max_ball_size')
+        
+        # A memory budget switches the exact table to an out-of-core build,
+        # written straight into the index directory unless told otherwise
+        memory_budget = performance.get('memory_budget')
+        exact_table_path = None
+        if memory_budget is not None:
+            exact_table_path = self.config.get('exact_table_path', index_path)
+            if exact_table_path is None:
+                raise ValueError(
+                    "performance.memory_budget requires index_path or "
+                    "exact_table_path"
+                )
+            if index_path:
+                # The old header must not vouch for half-rebuilt arrays
+                Path(index_path, 'header.json').unlink(missing_ok=True)
+        
+        # Label components once; sampling and queries work per component
+        with self.instrumentation.phase('components'):
+            components = ComponentIndex.from_graph(
+                network,
+                self.config.get('small_component_size', SMALL_COMPONENT_SIZE)
+            )
+        self.logger.info(
+            f"Network has {len(components)} components, "
+            f"{len(components.large_components())} indexed by landmarks"
+        )
+        
+        # Sample landmarks
+        landmark_sampler = LandmarkSampler(
+            network, max_workers, chunk_size, seed,
+            self.config.get('landmark_strategy', 'bernoulli'),
+            self.instrumentation, components
+        )
+        self.logger.info(
+            f"Expected landmark size: {landmark_sampler.expected_size()}"
+        )
+        landmarks = landmark_sampler.sample_landmarks()
+        landmark_distances = landmark_sampler.compute_landmark_distances(
+            dense=True
+        )
+        self.logger.info(f"Sampled {len(landmarks)} landmarks")
+        
+        # Sample neighborhoods
+        neighborhood_sampler = NeighborhoodSampler(
+            network, landmarks, landmark_distances,
+            max_workers, chunk_size, None if seed is None else seed + 1,
+            self.config.get('neighborhood_strategy', 'bernoulli'),
+            self.instrumentation, components
+        )
+        expected = neighborhood_sampler.expected_size(
+            max_ball_size=max_ball_size
+        )
+        self.logger.info(f"Expected neighborhood size: {expected}")
+        balls = neighborhood_sampler.compute_balls(
+            neighborhood_sampler.sample_neighborhood_vertices(),
+            max_ball_size=max_ball_size,
+            compact=True
+        )
+        self.logger.info(f"Created {len(balls)} neighborhood balls")
+        
+        # Build distance oracle
+        oracle = DistanceStorage(
+            network, landmarks, balls, landmark_distances,
+            self.instrumentation, exact_table_path, memory_budget,
+            components
+        )
+        if index_path:
+            with self.instrumentation.phase('save_index'):
+                oracle.save(index_path)
+            self.logger.info(f"Saved oracle index to {index_path}")
+        return oracle
+            
+    def check_index_header(self, header: Dict[str, Any]) -> None:
+        """Raises ValueError if a saved index was sampled differently."""
+        seed = self.config.get('seed')
+        expected = {
+            'landmark_seed': seed,
+            'landmark_strategy': repr(as_sampling_strategy(
+                self.config.get('landmark_strategy', 'bernoulli')
+            )),
+            'neighborhood_seed': None if seed is None else seed + 1,
+            'neighborhood_strategy': repr(as_sampling_strategy(
+                self.config.get('neighborhood_strategy', 'bernoulli')
+            )),
+            'max_ball_size': self.config.get('max_ball_size'),
+        }
+        sampling = header.get('sampling', {})
+        for key, value in expected.items():
+            if sampling.get(key) != value:
+                raise ValueError(
+                    f"index has {key}={sampling.get(key)!r}, "
+                    f"config wants {value!r}"
+                )
+        small_size = self.config.get(
+            'small_component_size', SMALL_COMPONENT_SIZE
+        )
+        if header.get('small_component_size') != small_size:
+            raise ValueError(
+                f"index has small_component_size="
+                f"{header.get('small_component_size')!r}, "
+                f"config wants {small_size!r}"
+            )
+            
+    def pair_distances(
+        self,
+        oracle: DistanceStorage,
+        pairs: List[Tuple[str, str]]
+    ) -> np.ndarray:
+        """Distances for gene symbol pairs from one batch oracle query."""
+        if not len(pairs):
+            return np.empty(0, dtype=np.int32)
+        sources, targets = zip(*pairs)
+        return oracle.query_distances(
+            list(sources), list(targets),
+            self.config.get('landmark_bound', 'nearest')
+        )
+        
+    def input_stamp(self) -> str:
+        """Path, size and mtime of every input file of the load_data stage."""
+        stamps = []
+        for key in ('data_path', 'pathway_path'):
+            path = self.config.get(key)
+            if path:
+                stat = os.stat(path)
+                stamps.append([str(path), stat.st_size, stat.st_mtime_ns])
+        return json.dumps(stamps)
+        
+    def load_data(self) -> Tuple[
+        CompactGraph, Union[Dict[str, Any], PathwayIndex], str
+    ]:
+        """Data loading stage: network, memberships and their content key.
+
+        The stage is keyed on the input files' size and mtime. Once it has
+        completed, the graph comes from the loader's cache and a configured
+        pathway file from the checkpointed PathwayIndex, so neither file is
+        parsed again and the membership fingerprint is not recomputed. The
+        returned key hashes the content, so downstream stages survive a
+        touched but unchanged input file.
+        """
+        stage_dir = self.stage_dir(
+            'load_data', self.stage_key('load_data', self.input_stamp())
+        )
+        summary = self.completed(stage_dir)
+        pathways_path = stage_dir / 'pathways.npz'
+        loader = BioGridLoader(self.config['data_path'])
+        network, gene_pathways = loader.process_data(compact=True)
+        if self.config.get('pathway_path'):
+            pathway_index = None
+            if summary is not None and pathways_path.exists():
+                pathway_index = PathwayIndex.load(pathways_path)
+            if (
+                pathway_index is None or
+                pathway_index.num_nodes != network.number_of_nodes()
+            ):
+                summary = None
+                pathway_index = self.load_pathways(network)
+                pathway_index.save(pathways_path)
+            gene_pathways = pathway_index
+        if summary is not None:
+            self.logger.info("Data loading restored from checkpoint")
+            return network, gene_pathways, summary['data_key']
+            
+        if isinstance(gene_pathways, PathwayIndex):
+            memberships = gene_pathways.fingerprint()
+        else:
+            memberships = hashlib.sha256(json.dumps(sorted(
+                (gene, sorted(pathways))
+                for gene, pathways in gene_pathways.items()
+            )).encode()).hexdigest()
+        data_key = self.stage_key(
+            'load_data', f'{network.fingerprint()}:{memberships}'
+        )
+        self.mark_complete(stage_dir, {
+            'num_nodes': network.number_of_nodes(),
+            'memberships': memberships,
+            'data_key': data_key,
+        })
+        return network, gene_pathways, data_key
+        
+    def checkpoint_dir(self) -> Path:
+        return Path(self.config.get(
+            'checkpoint_dir', f"{self.config['data_path']}.checkpoints"
+        ))
+        
+    def stage_key(self, stage: str, upstream: str) -> str:
+        """Hash of a stage's config entries and its upstream stage key."""
+        payload = {
+            'stage': stage,
+            'upstream': upstream,
+            'config': {
+                key: self.config.get(key) for key in STAGE_CONFIG_KEYS[stage]
+            },
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        
+    def stage_dir(self, stage: str, key: str) -> Path:
+        path = self.checkpoint_dir() / f'{stage}-{key}'
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+        
+    def completed(self, stage_dir: Path) -> Optional[Dict[str, Any]]:
+        """Summary recorded by a completed stage, or None."""
+        try:
+            with open(stage_dir / 'complete.json') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+            
+    def mark_complete(self, stage_dir: Path, summary: Dict[str, Any]) -> None:
+        partial = stage_dir / 'complete.json.partial'
+        with open(partial, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(partial, stage_dir / 'complete.json')
+        
+    def fan_out(
+        self,
+        oracle: DistanceStorage,
+        index_path: Union[str, Path],
+        task: Callable[..., Any],
+        args: Iterable[Tuple[Any, ...]]
+    ) -> Iterable[Any]:
+        """Yields ``task(*a)`` for every ``a`` in completion order.
+
+        Runs in-process with one worker; otherwise in a process pool whose
+        workers load the oracle from ``index_path`` with memory mapping.
+        """
+        max_workers = self.config.get('performance', {}).get('max_workers', 1)
+        if max_workers <= 1:
+            _set_worker_oracle(oracle)
+            for task_args in args:
+                yield task(*task_args)
+            return
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(str(index_path),)
+        ) as pool:
+            futures = [pool.submit(task, *task_args) for task_args in args]
+            for future in as_completed(futures):
+                yield future.result()
+                
+    def analyze_pathways(
+        self,
+        oracle: DistanceStorage,
+        index_path: Union[str, Path],
+        gene_pathways: Union[Dict[str, Any], PathwayIndex],
+        stage_dir: Path
+    ) -> Dict[str, Dict[str, Any]]:
+        """Pathway ASPL stage, streaming one JSON line per pathway.
+
+        Pathways already in ``results.jsonl`` are not recomputed; their
+        condensed distance vectors live under ``distances/``.
+        """
+        results_path = stage_dir / 'results.jsonl'
+        summaries: Dict[str, Dict[str, Any]] = {}
+        if results_path.exists():
+            with open(results_path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash is simply redone
+                        continue
+                    summaries[row['pathway']] = row
+        if summaries:
+            self.logger.info(
+                f"Resuming pathway analysis: {len(summaries)} done"
+            )
+            
+        pathways = self.config['pathways_to_analyze']
+        calculator = ASPLCalculator(oracle, gene_pathways)
+        (stage_dir / 'distances').mkdir(exist_ok=True)
+        empty = np.empty(0, dtype=np.int64)
+        tasks = [
+            (
+                pathway, calculator.pathway_genes.get(pathway, empty),
+                str(stage_dir / 'distances' / f'{i}.npy')
+            )
+            for i, pathway in enumerate(pathways)
+            if pathway not in summaries
+        ]
+        # Rewritten without any truncated tail before appending
+        with open(results_path, 'w') as f:
+            for row in summaries.values():
+                f.write(json.dumps(row) + '\n')
+        with open(results_path, 'a') as f:
+            for row in self.fan_out(oracle, index_path, _pathway_task, tasks):
+                f.write(json.dumps(row) + '\n')
+                f.flush()
+                summaries[row['pathway']] = row
+                self.instrumentation.count(
+                    'aspl_pairs', row['num_pairs']
+                )
+                self.instrumentation.progress(
+                    'pathway_aspl', len(summaries), len(pathways)
+                )
+        return {pathway: summaries[pathway] for pathway in pathways}
+        
+    def classify(
+        self,
+        oracle: DistanceStorage,
+        index_path: Union[str, Path],
+        pathway_index: Optional[PathwayIndex] = None
+    ) -> Dict[str, Any]:
+        """Classification stage: fits a threshold and scores the test set.
+
+        Without ``test_labels`` in ``known_relations``, a test pair counts
+        as related when its genes share a pathway of ``pathway_index``.
+        """
+        relations = self.config['known_relations']
+        test_labels = relations.get('test_labels')
+        if test_labels is None:
+            if pathway_index is None:
+                raise ValueError(
+                    "known_relations needs test_labels or a pathway_path"
+                )
+            test_labels = self.co_membership_labels(
+                oracle.graph, pathway_index, relations['test']
+            )
+        bound = self.config.get('landmark_bound', 'nearest')
+        groups = ('related', 'unrelated', 'test')
+        tasks = []
+        for group in groups:
+            pairs = relations[group]
+            for start in range(0, len(pairs), PAIR_CHUNK):
+                sources, targets = zip(*pairs[start:start + PAIR_CHUNK])
+                tasks.append(
+                    (group, start, list(sources), list(targets), bound)
+                )
+                
+        chunks: Dict[str, List[Tuple[int, np.ndarray]]] = {
+            group: [] for group in groups
+        }
+        for group, start, dists in self.fan_out(
+            oracle, index_path, _pairs_task, tasks
+        ):
+            chunks[group].append((start, dists))
+        distances = {
+            group: np.concatenate(
+                [d for _, d in sorted(chunks[group], key=lambda c: c[0])] +
+                [np.empty(0, dtype=np.int32)]
+            )
+            for group in groups
+        }
+        
+        classifier = RelatednessClassifier()
+        related, unrelated = distances['related'], distances['unrelated']
+        classifier.fit(
+            np.concatenate([related, unrelated]),
+            np.arange(len(related) + len(unrelated)) < len(related),
+            self.config.get('threshold_criterion', 'f1')
+        )
+        performance = classifier.evaluate_performance(
+            test_labels, classifier.predict(distances['test'])
+        )
+        performance = {k: float(v) for k, v in performance.items()}
+        performance['threshold'] = classifier.threshold
+        performance['roc_auc'] = classifier.roc_auc()
+        return performance
+        
+    def co_membership_labels(
+        self,
+        graph: CompactGraph,
+        pathway_index: PathwayIndex,
+        pairs: List[Tuple[str, str]]
+    ) -> np.ndarray:
+        """Shared-pathway labels for gene symbol pairs.
+
+        Genes that are not in the graph belong to no pathway.
+        """
+        node_index = graph.node_index
+        ids = np.array(
+            [[node_index.get(g, -1) for g in pair] for pair in pairs],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        known = (ids >= 0).all(axis=1)
+        labels = np.zeros(len(ids), dtype=bool)
+        labels[known] = pathway_index.co_membership(
+            ids[known, 0], ids[known, 1]
+        )
+        return labels
+        
+    def load_pathways(self, network: CompactGraph) -> PathwayIndex:
+        """Indexes the configured pathway file over ``network``."""
+        loader = PathwayLoader(
+            self.config['pathway_path'],
+            format=self.config.get('pathway_format'),
+            min_size=self.config.get('pathway_min_size', 1),
+            max_size=self.config.get('pathway_max_size')
+        )
+        pathway_index = loader.load(network)
+        self.logger.info(
+            f"Loaded {len(pathway_index)} pathways "
+            f"({loader.unmapped_genes} genes not in the network)"
+        )
+        return pathway_index
+        
+    def run_experiment(self) -> Dict[str, Any]:
+        """Executes the complete experimental pipeline, resuming if possible.
+
+        ``pathway_results`` holds per-pathway summaries; each condensed
+        distance vector is on disk at its ``distances_path``.
+        """
+        results = {}
+        
+        # Load and process data; the loader keeps its own graph cache
+        with self.instrumentation.phase('load_data'):
+            network, gene_pathways, data_key = self.load_data()
+        pathway_index = (
+            gene_pathways if isinstance(gene_pathways, PathwayIndex) else None
+        )
+        self.logger.info(
+            f"Loaded network with {network.number_of_nodes()} nodes"
+        )
+        
+        # Build or reload the oracle; workers map the saved index
+        oracle_key = self.stage_key('build_oracle', data_key)
+        stage_dir = self.stage_dir('build_oracle', oracle_key)
+        index_path = self.config.get('index_path') or stage_dir / 'index'
+        oracle = self.build_oracle(network, index_path)
+        self.mark_complete(stage_dir, {'index_path': str(index_path)})
+        
+        # Run pathway analysis
+        key = self.stage_key('pathway_analysis', oracle_key)
+        stage_dir = self.stage_dir('pathway_analysis', key)
+        summary = self.completed(stage_dir)
+        if summary is None:
+            with self.instrumentation.phase('pathway_aspl'):
+                summary = self.analyze_pathways(
+                    oracle, index_path, gene_pathways, stage_dir
+                )
+            self.mark_complete(stage_dir, summary)
+        else:
+            self.logger.info("Pathway analysis restored from checkpoint")
+        results['pathway_results'] = summary
+        
+        # Evaluate classification performance
+        if 'known_relations' in self.config:
+            key = self.stage_key('classification', oracle_key)
+            stage_dir = self.stage_dir('classification', key)
+            performance = self.completed(stage_dir)
+            if performance is None:
+                with self.instrumentation.phase('classification'):
+                    performance = self.classify(
+                        oracle, index_path, pathway_index
+                    )
+                self.mark_complete(stage_dir, performance)
+            else:
+                self.logger.info("Classification restored from checkpoint")
+            results['classification_performance'] = performance
+            
+        report_path = self.config.get('report_path')
+        if report_path:
+            self.instrumentation.write_report(report_path)
+            self.logger.info(f"Wrote run report to {report_path}")
+        return results
@@ -0,0 +1,172 @@
+# src/utils/instrumentation.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+import json
+import threading
+import time
+import numpy as np
+import psutil
+
+# Called as progress(phase, done, total) while a long phase runs
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class Instrumentation:
+    """Collects phase timings, counters, value distributions and memory.
+
+    Pipeline components take an optional ``instrumentation`` argument and
+    report through it; by default they get NULL_INSTRUMENTATION, whose
+    methods do nothing. Phases record wall time and process RSS at entry,
+    exit and (with ``memory_interval``) the peak sampled by a background
+    thread while the phase is open. ``report()`` returns everything as a
+    JSON-serializable dict.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        progress: Optional[ProgressCallback] = None,
+        memory_interval: Optional[float] = 0.05
+    ):
+        self.progress_callback = progress
+        self.memory_interval = memory_interval
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.distributions: Dict[str, Dict[str, float]] = {}
+        self.started = time.time()
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _rss(self) -> int:
+        return self._process.memory_info().rss
+
+    def _sample_memory(self, stop: threading.Event) -> None:
+        while not stop.wait(self.memory_interval):
+            rss = self._rss()
+            with self._lock:
+                for name, peak in self._active.items():
+                    self._active[name] = max(peak, rss)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator['Instrumentation']:
+        """Times the enclosed block and tracks its memory under ``name``.
+
+        Re-entering a phase name accumulates time and keeps the largest
+        peak; ``calls`` counts the entries.
+        """
+        rss_start = self._rss()
+        with self._lock:
+            self._active[name] = rss_start
+            if self.memory_interval and self._sampler is None:
+                self._stop = threading.Event()
+                self._sampler = threading.Thread(
+                    target=self._sample_memory, args=(self._stop,),
+                    daemon=True
+                )
+                self._sampler.start()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            rss_end = self._rss()
+            sampler = None
+            with self._lock:
+                peak = max(self._active.pop(name, rss_end), rss_end)
+                if not self._active and self._sampler is not None:
+                    self._stop.set()
+                    sampler, self._sampler = self._sampler, None
+                record = self.phases.setdefault(
+                    name, {'seconds': 0.0, 'calls': 0, 'peak_rss_bytes': 0}
+                )
+                record['seconds'] += elapsed
+                record['calls'] += 1
+                record['rss_start_bytes'] = rss_start
+                record['rss_end_bytes'] = rss_end
+                record['peak_rss_bytes'] = max(record['peak_rss_bytes'], peak)
+            if sampler is not None:
+                sampler.join()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Adds ``value`` to counter ``name``."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def observe(self, name: str, values: Union[float, np.ndarray]) -> None:
+        """Adds one value or an array of values to distribution ``name``."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not values.size:
+            return
+        with self._lock:
+            dist = self.distributions.setdefault(name, {
+                'count': 0, 'sum': 0.0, 'min': float('inf'),
+                'max': float('-inf')
+            })
+            dist['count'] += int(values.size)
+            dist['sum'] += float(values.sum())
+            dist['min'] = min(dist['min'], float(values.min()))
+            dist['max'] = max(dist['max'], float(values.max()))
+
+    def progress(self, phase: str, done: int, total: int) -> None:
+        """Forwards progress of a long phase to the progress callback."""
+        if self.progress_callback is not None:
+            self.progress_callback(phase, done, total)
+
+    def report(self) -> Dict[str, Any]:
+        """Structured run report."""
+        with self._lock:
+            distributions = {
+                name: {**dist, 'mean': dist['sum'] / dist['count']}
+                for name, dist in self.distributions.items()
+            }
+            return {
+                'started': time.strftime(
+                    '%Y-%m-%dT%H:%M:%S', time.localtime(self.started)
+                ),
+                'elapsed_seconds': time.time() - self.started,
+                'phases': {k: dict(v) for k, v in self.phases.items()},
+                'counters': dict(self.counters),
+                'distributions': distributions,
+                'rss_bytes': self._rss(),
+            }
+
+    def write_report(self, path: Union[str, Path]) -> None:
+        """Writes the run report to ``path`` as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, used when profiling is off."""
+
+    enabled = False
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.distributions = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator['Instrumentation']:
+        yield self
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def observe(self, name: str, values: Union[float, np.ndarray]) -> None:
+        pass
+
+    def progress(self, phase: str, done: int, total: int) -> None:
+        pass
+
+    def report(self) -> Dict[str, Any]:
+        return {'phases': {}, 'counters': {}, 'distributions': {}}
+
+
+# Shared default for components built without instrumentation
+NULL_INSTRUMENTATION = NullInstrumentation()
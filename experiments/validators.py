@@ -1,28 +1,53 @@
-# src/utils/validators.py
-from typing import Any, Dict, Set
-import networkx as nx
-
-def validate_network(network: nx.Graph) -> None:
-    """Validates network properties."""
-    if not isinstance(network, nx.Graph):
-        raise TypeError("Network must be a NetworkX Graph")
-        
-    if not nx.is_connected(network):
-        raise ValueError("Network must be connected")
-        
-def validate_landmarks(
-    landmarks: Set[str],
-    network: nx.Graph
-) -> None:
-    """Validates landmark properties."""
-    if not landmarks.issubset(network.nodes()):
-        raise ValueError("Landmarks must be nodes in the network")
-        
-def validate_config(config: Dict[str, Any]) -> None:
-    """Validates configuration parameters."""
-    required_keys = {'data_path', 'pathways_to_analyze'}
-    if not all(key in config for key in required_keys):
-        raise ValueError(f"Missing required config keys: {required_keys}")
-        
-    if not isinstance(config['pathways_to_analyze'], list):
-        raise TypeError("pathways_to_analyze must be a list")
\ No newline at end of file
+# src/utils/validators.py
+from typing import Any, Dict, Optional, Set, Union
+import networkx as nx
+import numpy as np
+from ..algorithms.compact_graph import CompactGraph, as_compact_graph
+from ..algorithms.components import ComponentIndex
+
+def validate_network(
+    network: Union[nx.Graph, CompactGraph],
+    require_connected: bool = False
+) -> None:
+    """Validates network properties.
+
+    Disconnected networks are accepted: the oracle indexes every component
+    and answers cross-component queries as unreachable.
+    """
+    if not isinstance(network, (nx.Graph, CompactGraph)):
+        raise TypeError("Network must be a NetworkX Graph or CompactGraph")
+        
+    if not network.number_of_nodes():
+        raise ValueError("Network must not be empty")
+        
+    if require_connected and not ComponentIndex.from_graph(
+        as_compact_graph(network)
+    ).is_connected():
+        raise ValueError("Network must be connected")
+        
+def validate_landmarks(
+    landmarks: Set[str],
+    network: Union[nx.Graph, CompactGraph],
+    components: Optional[ComponentIndex] = None
+) -> None:
+    """Validates landmark properties.
+
+    With ``components`` every large component must hold a landmark.
+    """
+    if not landmarks.issubset(network.nodes()):
+        raise ValueError("Landmarks must be nodes in the network")
+        
+    if components is not None:
+        graph = as_compact_graph(network)
+        covered = components.component_ids[graph.ids_of(landmarks)]
+        if not np.isin(components.large_components(), covered).all():
+            raise ValueError("Every large component must hold a landmark")
+        
+def validate_config(config: Dict[str, Any]) -> None:
+    """Validates configuration parameters."""
+    required_keys = {'data_path', 'pathways_to_analyze'}
+    if not all(key in config for key in required_keys):
+        raise ValueError(f"Missing required config keys: {required_keys}")
+        
+    if not isinstance(config['pathways_to_analyze'], list):
+        raise TypeError("pathways_to_analyze must be a list")
@@ -1,31 +1,239 @@
-# src/algorithms/landmark_sampler.py
-from typing import Set, List
-import random
-import networkx as nx
-import numpy as np
-
-class LandmarkSampler:
-    """Implements first-level landmark sampling strategy."""
-    
-    def __init__(self, network: nx.Graph):
-        self.network = network
-        self.n = network.number_of_nodes()
-        self.landmarks: Set[str] = set()
-        
-    def sample_landmarks(self) -> Set[str]:
-        """Samples landmarks with probability n^(-1/3)."""
-        p1 = self.n ** (-1/3)
-        self.landmarks = {
-            node for node in self.network.nodes()
-            if random.random() < p1
-        }
-        return self.landmarks
-        
-    def compute_landmark_distances(self) -> Dict[str, Dict[str, int]]:
-        """Computes shortest paths from landmarks to all nodes."""
-        distances = {}
-        for landmark in self.landmarks:
-            distances[landmark] = nx.single_source_shortest_path_length(
-                self.network, landmark
-            )
-        return distances
\ No newline at end of file
+# src/algorithms/landmark_sampler.py
+from typing import Any, Callable, Dict, Optional, Set, Union
+import networkx as nx
+import numpy as np
+from .compact_graph import CompactGraph, as_compact_graph
+from .components import ComponentIndex
+from .parallel_bfs import ParallelBFSEngine
+from .sampling_strategies import (
+    SamplingStrategy, as_sampling_strategy, expected_component_size,
+    sample_components
+)
+from ..utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+def distance_dtype(max_distance: int) -> np.dtype:
+    """Smallest unsigned dtype holding ``max_distance`` plus a sentinel."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_distance < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError(f"Distance {max_distance} too large to store")
+
+class LandmarkTable:
+    """Dense landmark-to-node distance matrix.
+
+    Row ``i`` of ``distances`` holds hop distances from node
+    ``landmark_ids[i]`` to every node, with ``sentinel`` (the dtype maximum)
+    marking unreachable nodes. ``nearest_landmark`` holds, per node, the row
+    of its closest landmark and ``nearest_landmark_dist`` that distance.
+    ``probability``, ``seed`` and ``strategy`` record how the landmarks were
+    sampled.
+    """
+    
+    def __init__(
+        self,
+        landmark_ids: np.ndarray,
+        distances: np.ndarray,
+        nearest_landmark: Optional[np.ndarray] = None,
+        nearest_landmark_dist: Optional[np.ndarray] = None
+    ):
+        self.landmark_ids = np.asarray(landmark_ids, dtype=np.int64)
+        self.distances = distances
+        self.sentinel = np.iinfo(distances.dtype).max
+        self.row_of: Dict[int, int] = {
+            int(l): i for i, l in enumerate(self.landmark_ids)
+        }
+        self.probability: Optional[float] = None
+        self.seed: Optional[int] = None
+        self.strategy: Optional[str] = None
+        n = distances.shape[1]
+        if nearest_landmark is not None:
+            self.nearest_landmark = nearest_landmark
+            self.nearest_landmark_dist = nearest_landmark_dist
+        elif len(self.landmark_ids):
+            self.nearest_landmark = distances.argmin(axis=0)
+            self.nearest_landmark_dist = distances[
+                self.nearest_landmark, np.arange(n)
+            ]
+        else:
+            self.nearest_landmark = np.zeros(n, dtype=np.int64)
+            self.nearest_landmark_dist = np.full(
+                n, self.sentinel, dtype=distances.dtype
+            )
+            
+    @classmethod
+    def from_bfs(
+        cls,
+        graph: CompactGraph,
+        landmark_ids: np.ndarray,
+        max_workers: int = 1,
+        chunk_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> 'LandmarkTable':
+        """Runs one BFS per landmark and packs the rows into a matrix."""
+        engine = ParallelBFSEngine(graph, max_workers, chunk_size)
+        return cls(
+            landmark_ids,
+            engine.distance_matrix(landmark_ids, progress=progress)
+        )
+        
+    @classmethod
+    def from_dict(
+        cls,
+        graph: CompactGraph,
+        landmark_distances: Dict[str, Dict[str, int]]
+    ) -> 'LandmarkTable':
+        """Packs dict-of-dicts landmark distances into a matrix."""
+        landmarks = sorted(landmark_distances, key=graph.id_of)
+        max_distance = max(
+            (max(d.values(), default=0) for d in landmark_distances.values()),
+            default=0
+        )
+        dtype = distance_dtype(max_distance)
+        distances = np.full(
+            (len(landmarks), graph.number_of_nodes()),
+            np.iinfo(dtype).max,
+            dtype=dtype
+        )
+        for row, landmark in enumerate(landmarks):
+            row_dists = landmark_distances[landmark]
+            distances[row, graph.ids_of(row_dists.keys())] = list(
+                row_dists.values()
+            )
+        return cls(graph.ids_of(landmarks), distances)
+        
+    def to_dict(self, graph: CompactGraph) -> Dict[str, Dict[str, int]]:
+        """Expands the matrix back into dict-of-dicts form."""
+        distances = {}
+        for row, landmark in enumerate(self.landmark_ids):
+            reached = np.flatnonzero(self.distances[row] != self.sentinel)
+            distances[graph.node_names[landmark]] = dict(zip(
+                graph.node_names[reached].tolist(),
+                self.distances[row, reached].tolist()
+            ))
+        return distances
+        
+    def pair_distances(self) -> np.ndarray:
+        """(L x L) landmark-to-landmark distances, in row order."""
+        return np.ascontiguousarray(self.distances[:, self.landmark_ids])
+        
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.distances.nbytes + self.nearest_landmark.nbytes +
+            self.nearest_landmark_dist.nbytes
+        )
+
+def as_landmark_table(
+    graph: CompactGraph,
+    landmark_distances: Union[Dict[str, Dict[str, int]], LandmarkTable]
+) -> LandmarkTable:
+    """Returns landmark distances as a LandmarkTable, packing dicts."""
+    if isinstance(landmark_distances, LandmarkTable):
+        return landmark_distances
+    return LandmarkTable.from_dict(graph, landmark_distances)
+
+class LandmarkSampler:
+    """Implements first-level landmark sampling strategy.
+
+    ``strategy`` picks the landmarks (a SamplingStrategy or one of the
+    names in SAMPLING_STRATEGIES); ``seed`` makes the choice reproducible.
+    With ``components`` landmarks are sampled per connected component:
+    each large component at its own n_c^(-1/3) with at least one landmark,
+    small components (answered exactly) not at all.
+    """
+    
+    def __init__(
+        self,
+        network: Union[nx.Graph, CompactGraph],
+        max_workers: int = 1,
+        chunk_size: int = 1000,
+        seed: Optional[int] = None,
+        strategy: Union[str, SamplingStrategy] = 'bernoulli',
+        instrumentation: Optional[Instrumentation] = None,
+        components: Optional[ComponentIndex] = None
+    ):
+        self.graph = as_compact_graph(network)
+        self.n = self.graph.number_of_nodes()
+        self.landmarks: Set[str] = set()
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.strategy = as_sampling_strategy(strategy)
+        self.rng = np.random.default_rng(seed)
+        self.probability: Optional[float] = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.components = components
+        
+    def default_probability(self) -> float:
+        return self.n ** (-1/3) if self.n else 0.0
+        
+    def sample_landmarks(self, probability: Optional[float] = None) -> Set[str]:
+        """Samples landmarks with probability n^(-1/3) unless overridden."""
+        p1 = self.default_probability() if probability is None else probability
+        self.probability = p1
+        with self.instrumentation.phase('landmark_sampling'):
+            if self.components is None:
+                ids = self.strategy.sample(self.graph, p1, self.rng)
+            else:
+                ids = sample_components(
+                    self.strategy, self.graph, self.components, self.rng,
+                    -1/3, probability, at_least_one=True
+                )
+        self.instrumentation.count('landmarks', len(ids))
+        self.landmarks = set(self.graph.node_names[ids].tolist())
+        return self.landmarks
+        
+    def expected_size(
+        self,
+        probability: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Expected landmark count and table size before building.
+
+        Byte counts assume uint8 distances, which holds for any graph with
+        diameter below 255.
+        """
+        p1 = self.default_probability() if probability is None else probability
+        if self.components is None:
+            k = self.strategy.expected_size(self.graph, p1)
+        else:
+            k = expected_component_size(
+                self.strategy, self.graph, self.components, -1/3,
+                probability, at_least_one=True
+            )
+        return {
+            'strategy': repr(self.strategy),
+            'probability': p1,
+            'landmarks': k,
+            'landmark_table_bytes': int(
+                k * self.n + self.n * (np.dtype(np.intp).itemsize + 1)
+            ),
+            'landmark_pair_bytes': int(k * k),
+        }
+        
+    def compute_landmark_distances(
+        self,
+        dense: bool = False
+    ) -> Union[Dict[str, Dict[str, int]], LandmarkTable]:
+        """Computes shortest paths from landmarks to all nodes.
+
+        With ``dense=True`` returns a LandmarkTable instead of dicts.
+        """
+        instrumentation = self.instrumentation
+        landmark_ids = np.sort(self.graph.ids_of(self.landmarks))
+        progress = None
+        if instrumentation.enabled:
+            def progress(done: int, total: int) -> None:
+                instrumentation.progress('landmark_distances', done, total)
+                
+        with instrumentation.phase('landmark_distances'):
+            table = LandmarkTable.from_bfs(
+                self.graph, landmark_ids, self.max_workers, self.chunk_size,
+                progress
+            )
+        instrumentation.count('bfs_expansions', len(landmark_ids))
+        table.probability = self.probability
+        table.seed = self.seed
+        table.strategy = repr(self.strategy)
+        if dense:
+            return table
+        return table.to_dict(self.graph)
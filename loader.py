@@ -1,53 +1,274 @@
-
-
-# src/data/loader.py
-import pandas as pd
-import networkx as nx
-from pathlib import Path
-from typing import Tuple, Dict, Set
-
-class BioGridLoader:
-    """Loads and processes BioGRID interaction data."""
-    
-    def __init__(self, data_path: str):
-        self.data_path = Path(data_path)
-        self.validate_path()
-        
-    def validate_path(self) -> None:
-        """Validates that the data path exists."""
-        if not self.data_path.exists():
-            raise FileNotFoundError(f"Data path not found: {self.data_path}")
-            
-    def load_interactions(self) -> pd.DataFrame:
-        """Loads raw interaction data from BioGRID."""
-        df = pd.read_csv(self.data_path, sep='\t')
-        required_cols = ['Gene1', 'Gene2', 'Interaction_Type']
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError(f"Missing required columns: {required_cols}")
-        return df
-        
-    def filter_direct_interactions(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Filters for direct physical interactions."""
-        direct_types = {'physical', 'direct interaction'}
-        return df[df['Interaction_Type'].str.lower().isin(direct_types)]
-        
-    def build_network(self, df: pd.DataFrame) -> nx.Graph:
-        """Constructs NetworkX graph from interaction data."""
-        G = nx.Graph()
-        for _, row in df.iterrows():
-            G.add_edge(row['Gene1'], row['Gene2'])
-        return G
-        
-    def process_data(self) -> Tuple[nx.Graph, Dict[str, Set[str]]]:
-        """Main processing pipeline for BioGRID data."""
-        df = self.load_interactions()
-        df = self.filter_direct_interactions(df)
-        
-        # Create gene-pathway mappings
-        gene_pathways = {}
-        for gene in set(df['Gene1']).union(set(df['Gene2'])):
-            # In practice, you'd load this from KEGG/Reactome
-            gene_pathways[gene] = set()
-            
-        network = self.build_network(df)
-        return network, gene_pathways
\ No newline at end of file
+
+
+# src/data/loader.py
+import hashlib
+import json
+import os
+import pandas as pd
+import networkx as nx
+import numpy as np
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Dict, Set, Union
+from ..algorithms.compact_graph import CompactGraph
+from .pathway_loader import PathwayIndex, PathwayLoader
+
+# Columns read from the BioGRID TAB file; all others are never parsed
+REQUIRED_COLUMNS = ['Gene1', 'Gene2', 'Interaction_Type']
+
+# Interaction types kept by default (compared case-insensitively)
+DIRECT_INTERACTION_TYPES = frozenset({'physical', 'direct interaction'})
+
+# Bumped whenever parsing changes in a way that invalidates graph caches
+LOADER_VERSION = 1
+
+class BioGridLoader:
+    """Loads and processes BioGRID interaction data."""
+    
+    def __init__(
+        self,
+        data_path: str,
+        interaction_types: Iterable[str] = DIRECT_INTERACTION_TYPES,
+        chunk_size: int = 500_000,
+        cache_path: Optional[str] = None,
+        pathway_path: Optional[str] = None
+    ):
+        self.data_path = Path(data_path)
+        self.cache_path = Path(
+            cache_path if cache_path is not None
+            else f'{data_path}.graph-cache.npz'
+        )
+        self.interaction_types = frozenset(
+            t.lower() for t in interaction_types
+        )
+        self.chunk_size = chunk_size
+        self.pathway_loader = (
+            PathwayLoader(pathway_path) if pathway_path is not None else None
+        )
+        self.validate_path()
+        
+    def validate_path(self) -> None:
+        """Validates that the data path exists."""
+        if not self.data_path.exists():
+            raise FileNotFoundError(f"Data path not found: {self.data_path}")
+            
+    def load_interactions(self) -> pd.DataFrame:
+        """Loads raw interaction data from BioGRID."""
+        df = pd.read_csv(self.data_path, sep='\t')
+        self.validate_columns(df.columns)
+        return df
+        
+    def validate_columns(self, columns: Iterable[str]) -> None:
+        """Validates that the interaction file has the required columns."""
+        if not set(REQUIRED_COLUMNS).issubset(columns):
+            raise ValueError(f"Missing required columns: {REQUIRED_COLUMNS}")
+            
+    def filter_direct_interactions(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filters for direct physical interactions."""
+        return df[
+            df['Interaction_Type'].str.lower().isin(self.interaction_types)
+        ]
+        
+    def build_network(self, df: pd.DataFrame) -> nx.Graph:
+        """Constructs NetworkX graph from interaction data."""
+        G = nx.Graph()
+        G.add_edges_from(zip(df['Gene1'], df['Gene2']))
+        return G
+        
+    def stream_edges(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Parses the interaction file chunk by chunk into integer edges.
+
+        Only the required columns are read, as categoricals, so each chunk
+        is filtered and mapped to node ids through its (small) category
+        tables instead of per-row Python. Returns ``(src, dst, node_names)``.
+        """
+        self.validate_columns(
+            pd.read_csv(self.data_path, sep='\t', nrows=0).columns
+        )
+        node_index: Dict[str, int] = {}
+        src: List[np.ndarray] = []
+        dst: List[np.ndarray] = []
+        chunks = pd.read_csv(
+            self.data_path,
+            sep='\t',
+            usecols=REQUIRED_COLUMNS,
+            dtype={col: 'category' for col in REQUIRED_COLUMNS},
+            chunksize=self.chunk_size
+        )
+        for chunk in chunks:
+            types = chunk['Interaction_Type'].cat
+            keep_type = np.array([
+                str(t).lower() in self.interaction_types
+                for t in types.categories
+            ], dtype=bool)
+            codes = types.codes.to_numpy()
+            keep = (codes >= 0) & keep_type[np.maximum(codes, 0)]
+            
+            endpoints = []
+            for col in ('Gene1', 'Gene2'):
+                genes = chunk[col].cat
+                ids = np.array([
+                    node_index.setdefault(gene, len(node_index))
+                    for gene in genes.categories
+                ] + [-1], dtype=np.int64)
+                endpoints.append(ids[genes.codes.to_numpy()])
+            keep &= (endpoints[0] >= 0) & (endpoints[1] >= 0)
+            src.append(endpoints[0][keep].astype(np.int32))
+            dst.append(endpoints[1][keep].astype(np.int32))
+            
+        # Only genes that take part in a kept interaction become nodes
+        src_all = np.concatenate(src) if src else np.empty(0, dtype=np.int32)
+        dst_all = np.concatenate(dst) if dst else np.empty(0, dtype=np.int32)
+        used = np.zeros(len(node_index), dtype=bool)
+        used[src_all] = True
+        used[dst_all] = True
+        remap = np.cumsum(used) - 1
+        names = np.array(list(node_index), dtype=object)[used].tolist()
+        return remap[src_all], remap[dst_all], names
+        
+    def build_compact_network(self, df: pd.DataFrame) -> CompactGraph:
+        """Constructs a CSR graph with integer node ids from interaction data."""
+        return CompactGraph.from_edge_list(
+            df['Gene1'].to_numpy(), df['Gene2'].to_numpy()
+        )
+        
+    def source_hash(self) -> str:
+        """SHA-256 of the raw interaction file."""
+        digest = hashlib.sha256()
+        with open(self.data_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+        
+    def cache_key(self, source_hash: str) -> Dict[str, object]:
+        """Everything a cached graph depends on."""
+        return {
+            'loader_version': LOADER_VERSION,
+            'source_sha256': source_hash,
+            'interaction_types': sorted(self.interaction_types),
+        }
+        
+    def load_cache(
+        self
+    ) -> Optional[Tuple[CompactGraph, Dict[str, Set[str]]]]:
+        """Returns the cached graph and pathways, or None if stale/missing.
+
+        The source is only rehashed when its size or mtime differ from the
+        values recorded with the cache; if the hash still matches, the cache
+        is rewritten with the new values so the next load skips the hash.
+        """
+        if not self.cache_path.exists():
+            return None
+        try:
+            cache = np.load(self.cache_path, allow_pickle=False)
+            meta = json.loads(str(cache['meta']))
+        except (OSError, ValueError, KeyError):
+            return None
+        stat = self.data_path.stat()
+        source_hash = meta['key']['source_sha256']
+        restamp = [stat.st_size, stat.st_mtime_ns] != meta['source_stat']
+        if restamp:
+            source_hash = self.source_hash()
+        if meta['key'] != self.cache_key(source_hash):
+            return None
+            
+        names = cache['node_names'].tolist()
+        network = CompactGraph(cache['indptr'], cache['indices'], names)
+        pathway_names = cache['pathway_names'].tolist()
+        membership_indptr = cache['membership_indptr']
+        membership = cache['membership']
+        gene_pathways = {
+            gene: {
+                pathway_names[p] for p in membership[
+                    membership_indptr[i]:membership_indptr[i + 1]
+                ]
+            }
+            for i, gene in enumerate(names)
+        }
+        if restamp:
+            self.save_cache(network, gene_pathways, source_hash)
+        return network, gene_pathways
+        
+    def save_cache(
+        self,
+        network: CompactGraph,
+        gene_pathways: Dict[str, Set[str]],
+        source_hash: Optional[str] = None
+    ) -> None:
+        """Writes the graph and pathway memberships as compressed arrays.
+
+        ``source_hash`` skips rehashing a source that was just hashed.
+        """
+        stat = self.data_path.stat()
+        if source_hash is None:
+            source_hash = self.source_hash()
+        meta = {
+            'key': self.cache_key(source_hash),
+            'source_stat': [stat.st_size, stat.st_mtime_ns],
+        }
+        pathway_names = sorted(set().union(*gene_pathways.values()))
+        pathway_ids = {p: i for i, p in enumerate(pathway_names)}
+        names = network.node_names.tolist()
+        memberships = [
+            sorted(pathway_ids[p] for p in gene_pathways.get(gene, ()))
+            for gene in names
+        ]
+        membership_indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum([len(m) for m in memberships], out=membership_indptr[1:])
+        
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                meta=np.array(json.dumps(meta)),
+                indptr=network.indptr,
+                indices=network.indices,
+                node_names=np.array(names, dtype=str),
+                pathway_names=np.array(pathway_names, dtype=str),
+                membership_indptr=membership_indptr,
+                membership=np.array(
+                    [p for m in memberships for p in m], dtype=np.int32
+                )
+            )
+        os.replace(tmp_path, self.cache_path)
+        
+    def load_pathways(self, network: CompactGraph) -> PathwayIndex:
+        """Indexes the pathway file's gene sets over ``network``."""
+        if self.pathway_loader is None:
+            raise ValueError("No pathway_path was given to BioGridLoader")
+        return self.pathway_loader.load(network)
+        
+    def process_data(
+        self,
+        compact: bool = False,
+        use_cache: bool = True
+    ) -> Tuple[Union[nx.Graph, CompactGraph], Dict[str, Set[str]]]:
+        """Main processing pipeline for BioGRID data.
+
+        With ``use_cache`` a binary cache next to the data file is reused
+        while the source content, interaction-type filter and loader version
+        are unchanged, and rewritten otherwise. With a ``pathway_path``
+        the memberships come from that file, which is reread on every
+        call; otherwise every gene maps to an empty set.
+        """
+        cached = self.load_cache() if use_cache else None
+        if cached is not None:
+            network, gene_pathways = cached
+        else:
+            src, dst, names = self.stream_edges()
+            network = CompactGraph.from_edges(src, dst, names)
+            
+            # Create gene-pathway mappings
+            gene_pathways = {}
+            for gene in names:
+                gene_pathways[gene] = set()
+                
+            if use_cache:
+                self.save_cache(network, gene_pathways)
+                
+        if self.pathway_loader is not None:
+            gene_pathways = self.load_pathways(network).to_gene_pathways(
+                network
+            )
+        if not compact:
+            return network.to_networkx(), gene_pathways
+        return network, gene_pathways
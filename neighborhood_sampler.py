@@ -1,49 +1,301 @@
-# src/algorithms/neighborhood_sampler.py
-from typing import Dict, Set
-import random
-import networkx as nx
-
-class NeighborhoodSampler:
-    """Implements second-level neighborhood sampling strategy."""
-    
-    def __init__(
-        self, 
-        network: nx.Graph,
-        landmarks: Set[str],
-        landmark_distances: Dict[str, Dict[str, int]]
-    ):
-        self.network = network
-        self.landmarks = landmarks
-        self.landmark_distances = landmark_distances
-        self.n = network.number_of_nodes()
-        
-    def sample_neighborhood_vertices(self) -> Set[str]:
-        """Samples vertices with probability n^(-2/3)."""
-        p2 = self.n ** (-2/3)
-        return {
-            node for node in self.network.nodes()
-            if random.random() < p2
-        }
-        
-    def compute_balls(
-        self, 
-        sampled_vertices: Set[str]
-    ) -> Dict[str, Set[str]]:
-        """Computes neighborhood balls for sampled vertices."""
-        balls = {}
-        for vertex in sampled_vertices:
-            nearest_landmark_dist = min(
-                self.landmark_distances[l].get(vertex, float('inf'))
-                for l in self.landmarks
-            )
-            
-            # Collect vertices closer than nearest landmark
-            ball = {
-                v for v in self.network.nodes()
-                if nx.shortest_path_length(
-                    self.network, vertex, v
-                ) < nearest_landmark_dist
-            }
-            balls[vertex] = ball
-            
-        return balls
+# src/algorithms/neighborhood_sampler.py
+from typing import Any, Dict, Optional, Set, Tuple, Union
+import networkx as nx
+import numpy as np
+from .compact_graph import CompactGraph, as_compact_graph
+from .components import ComponentIndex
+from .landmark_sampler import LandmarkTable, as_landmark_table, distance_dtype
+from .parallel_bfs import ParallelBFSEngine
+from .sampling_strategies import (
+    SamplingStrategy, as_sampling_strategy, expected_component_size,
+    sample_components
+)
+from ..utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+# Vertices probed by truncated BFS when estimating the expected ball size
+DEFAULT_SIZE_PROBES = 64
+
+class BallIndex:
+    """Flat CSR storage of neighborhood balls and in-ball distances.
+
+    Ball ``i`` is centered at ``centers[i]`` and holds the vertices
+    ``members[indptr[i]:indptr[i + 1]]`` in BFS order, with their distances
+    from the center in ``member_dists``. ``radii[i]`` is the exclusive radius
+    actually covered (-1 when unbounded) and ``capped[i]`` marks balls cut
+    short by the size cap. ``probability``, ``seed`` and ``strategy`` record
+    how the centers were sampled and ``max_size`` the size cap they were
+    grown with.
+    """
+    
+    def __init__(
+        self,
+        centers: np.ndarray,
+        radii: np.ndarray,
+        indptr: np.ndarray,
+        members: np.ndarray,
+        member_dists: np.ndarray,
+        capped: np.ndarray
+    ):
+        self.centers = np.asarray(centers, dtype=np.int64)
+        self.radii = np.asarray(radii, dtype=np.int32)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.members = np.asarray(members, dtype=np.int32)
+        self.member_dists = member_dists
+        self.capped = np.asarray(capped, dtype=bool)
+        self.probability: Optional[float] = None
+        self.seed: Optional[int] = None
+        self.strategy: Optional[str] = None
+        self.max_size: Optional[int] = None
+        
+    @classmethod
+    def from_bfs_results(
+        cls,
+        centers: np.ndarray,
+        radii: np.ndarray,
+        results: Tuple[Tuple[np.ndarray, np.ndarray], ...],
+        capped: np.ndarray
+    ) -> 'BallIndex':
+        """Concatenates per-center ``(nodes, dists)`` BFS results."""
+        sizes = [len(nodes) for nodes, _ in results]
+        indptr = np.zeros(len(results) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        members = (
+            np.concatenate([nodes for nodes, _ in results])
+            if results else np.empty(0, dtype=np.int32)
+        )
+        dists = (
+            np.concatenate([dists for _, dists in results])
+            if results else np.empty(0, dtype=np.int32)
+        )
+        dtype = distance_dtype(int(dists.max(initial=0)))
+        return cls(centers, radii, indptr, members, dists.astype(dtype), capped)
+        
+    @classmethod
+    def from_dict(
+        cls,
+        graph: CompactGraph,
+        balls: Dict[str, Set[str]]
+    ) -> 'BallIndex':
+        """Packs set-valued balls, recovering in-ball distances by BFS."""
+        centers = np.sort(graph.ids_of(balls.keys()))
+        results = []
+        radii = []
+        for center in centers:
+            members = graph.ids_of(balls[graph.node_names[center]])
+            dist = graph.bfs(center)[members]
+            order = np.lexsort((members, dist))
+            results.append((members[order], dist[order]))
+            radii.append(int(dist.max(initial=-1)) + 1)
+        return cls.from_bfs_results(
+            centers, np.array(radii), tuple(results),
+            np.zeros(len(centers), dtype=bool)
+        )
+        
+    def __len__(self) -> int:
+        return len(self.centers)
+        
+    def ball(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Members of ball ``i`` and their distances from its center."""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.members[start:end], self.member_dists[start:end]
+        
+    def to_dict(self, graph: CompactGraph) -> Dict[str, Set[str]]:
+        """Expands the index into center symbol -> member symbols."""
+        return {
+            graph.node_names[center]: set(
+                graph.node_names[self.ball(i)[0]].tolist()
+            )
+            for i, center in enumerate(self.centers)
+        }
+        
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes for a in (
+                self.centers, self.radii, self.indptr, self.members,
+                self.member_dists, self.capped
+            )
+        )
+
+def ball_radius(
+    dists: np.ndarray,
+    capped: bool,
+    max_depth: Optional[int]
+) -> int:
+    """Exclusive radius covered by a truncated BFS ball (-1 if unbounded)."""
+    if capped:
+        return int(dists.max(initial=-1)) + 1
+    return -1 if max_depth is None else max_depth + 1
+
+def ball_max_depth(nearest_landmark_dist: int, sentinel: int) -> Optional[int]:
+    """BFS depth of a ball whose center has the given landmark distance."""
+    if nearest_landmark_dist == sentinel:
+        return None
+    return int(nearest_landmark_dist) - 1
+
+def as_ball_index(
+    graph: CompactGraph,
+    balls: Union[Dict[str, Set[str]], BallIndex]
+) -> BallIndex:
+    """Returns balls as a BallIndex, packing dict input."""
+    if isinstance(balls, BallIndex):
+        return balls
+    return BallIndex.from_dict(graph, balls)
+
+class NeighborhoodSampler:
+    """Implements second-level neighborhood sampling strategy.
+
+    ``strategy`` picks the ball centers (a SamplingStrategy or one of the
+    names in SAMPLING_STRATEGIES); ``seed`` makes the choice reproducible.
+    With ``components`` each large component is sampled at its own
+    n_c^(-2/3) and small components get no balls.
+    """
+    
+    def __init__(
+        self, 
+        network: Union[nx.Graph, CompactGraph],
+        landmarks: Set[str],
+        landmark_distances: Union[Dict[str, Dict[str, int]], LandmarkTable],
+        max_workers: int = 1,
+        chunk_size: int = 1000,
+        seed: Optional[int] = None,
+        strategy: Union[str, SamplingStrategy] = 'bernoulli',
+        instrumentation: Optional[Instrumentation] = None,
+        components: Optional[ComponentIndex] = None
+    ):
+        self.graph = as_compact_graph(network)
+        self.landmarks = landmarks
+        self.landmark_table = as_landmark_table(self.graph, landmark_distances)
+        self.n = self.graph.number_of_nodes()
+        self.ball_index: Optional[BallIndex] = None
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.strategy = as_sampling_strategy(strategy)
+        self.rng = np.random.default_rng(seed)
+        self.probability: Optional[float] = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.components = components
+        
+    def default_probability(self) -> float:
+        return self.n ** (-2/3) if self.n else 0.0
+        
+    def sample_neighborhood_vertices(
+        self,
+        probability: Optional[float] = None
+    ) -> Set[str]:
+        """Samples vertices with probability n^(-2/3) unless overridden."""
+        p2 = self.default_probability() if probability is None else probability
+        self.probability = p2
+        with self.instrumentation.phase('neighborhood_sampling'):
+            if self.components is None:
+                ids = self.strategy.sample(self.graph, p2, self.rng)
+            else:
+                ids = sample_components(
+                    self.strategy, self.graph, self.components, self.rng,
+                    -2/3, probability
+                )
+        return set(self.graph.node_names[ids].tolist())
+        
+    def expected_size(
+        self,
+        probability: Optional[float] = None,
+        max_ball_size: Optional[int] = None,
+        num_probes: int = DEFAULT_SIZE_PROBES
+    ) -> Dict[str, Any]:
+        """Expected ball count and storage before the balls are grown.
+
+        The mean ball size is estimated from truncated BFS around
+        ``num_probes`` uniformly drawn vertices, using the landmark table
+        exactly as ``compute_balls`` does. ``exact_pairs_min`` counts only
+        pairs inside a single ball, a lower bound on the exact table.
+        """
+        p2 = self.default_probability() if probability is None else probability
+        if self.components is None:
+            count = self.strategy.expected_size(self.graph, p2)
+            candidates = np.arange(self.n)
+        else:
+            count = expected_component_size(
+                self.strategy, self.graph, self.components, -2/3, probability
+            )
+            candidates = np.concatenate([
+                self.components.nodes(c)
+                for c in self.components.large_components()
+            ] + [np.empty(0, dtype=np.int32)])
+        table = self.landmark_table
+        probes = candidates[np.random.default_rng(self.seed).integers(
+            0, max(len(candidates), 1), min(num_probes, len(candidates))
+        )]
+        visited = np.zeros(self.n, dtype=bool)
+        sizes = [
+            len(self.graph.truncated_bfs(
+                int(v),
+                ball_max_depth(table.nearest_landmark_dist[v], table.sentinel),
+                max_ball_size, visited
+            )[0])
+            for v in probes
+        ]
+        mean_size = float(np.mean(sizes)) if sizes else 0.0
+        return {
+            'strategy': repr(self.strategy),
+            'probability': p2,
+            'balls': count,
+            'mean_ball_size': mean_size,
+            'ball_bytes': int(count * (mean_size * 5 + 21)),
+            'exact_pairs_min': int(count * mean_size * (mean_size - 1) / 2),
+        }
+        
+    def compute_balls(
+        self, 
+        sampled_vertices: Set[str],
+        max_ball_size: Optional[int] = None,
+        compact: bool = False
+    ) -> Union[Dict[str, Set[str]], BallIndex]:
+        """Computes neighborhood balls for sampled vertices.
+
+        Each ball is grown by one BFS from its center, truncated at the
+        nearest landmark distance minus one and, if ``max_ball_size`` is set,
+        at the last whole BFS level that fits under the cap. The result is
+        kept in ``self.ball_index``; ``compact=True`` returns it directly.
+        """
+        table = self.landmark_table
+        centers = np.sort(self.graph.ids_of(sampled_vertices))
+        nearest = table.nearest_landmark_dist[centers]
+        max_depths = [ball_max_depth(d, table.sentinel) for d in nearest]
+        
+        # Collect vertices closer than nearest landmark
+        instrumentation = self.instrumentation
+        progress = None
+        if instrumentation.enabled:
+            def progress(done: int, total: int) -> None:
+                instrumentation.progress('balls', done, total)
+                
+        engine = ParallelBFSEngine(
+            self.graph, self.max_workers, self.chunk_size
+        )
+        with instrumentation.phase('balls'):
+            bfs_results = engine.truncated_balls(
+                centers, max_depths, max_ball_size, progress
+            )
+        results = []
+        radii = np.empty(len(centers), dtype=np.int32)
+        capped = np.zeros(len(centers), dtype=bool)
+        for i, (nodes, dists, capped[i]) in enumerate(bfs_results):
+            radii[i] = ball_radius(dists, capped[i], max_depths[i])
+            results.append((nodes, dists))
+            
+        self.ball_index = BallIndex.from_bfs_results(
+            centers, radii, tuple(results), capped
+        )
+        self.ball_index.probability = self.probability
+        self.ball_index.seed = self.seed
+        self.ball_index.strategy = repr(self.strategy)
+        self.ball_index.max_size = max_ball_size
+        instrumentation.count('balls', len(centers))
+        instrumentation.count('capped_balls', int(capped.sum()))
+        instrumentation.count('bfs_expansions', len(centers))
+        if instrumentation.enabled:
+            instrumentation.observe('ball_size', np.diff(self.ball_index.indptr))
+        if compact:
+            return self.ball_index
+        return self.ball_index.to_dict(self.graph)
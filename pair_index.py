@@ -0,0 +1,218 @@
+# src/algorithms/pair_index.py
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import shutil
+import numpy as np
+from .compact_graph import UNREACHABLE
+from .landmark_sampler import distance_dtype
+
+# Memory budget for out-of-core index builds when none is given (bytes)
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Bytes per buffered pair: uint64 key, int32 value and sort workspace
+BUFFERED_PAIR_BYTES = 36
+
+
+def pack_pairs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Packs unordered node id pairs into uint64 ``(min << 32) | max`` keys."""
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+    return (np.minimum(a, b) << np.uint64(32)) | np.maximum(a, b)
+
+
+class PairDistanceIndex:
+    """Exact distances for unordered node pairs, stored once per pair.
+
+    ``keys`` is a sorted array of packed pair keys (see ``pack_pairs``) and
+    ``values`` the matching distances; lookups are binary searches.
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray):
+        self.keys = keys
+        self.values = values
+
+    @classmethod
+    def from_arrays(
+        cls,
+        a: np.ndarray,
+        b: np.ndarray,
+        dists: np.ndarray,
+        dtype: np.dtype = np.uint8
+    ) -> 'PairDistanceIndex':
+        """Builds the index from parallel id/distance arrays.
+
+        Duplicate pairs (in either orientation) keep their first distance.
+        """
+        keys = pack_pairs(a, b)
+        keys, first = np.unique(keys, return_index=True)
+        values = np.asarray(dists)[first].astype(dtype)
+        return cls(keys, values)
+
+    @classmethod
+    def empty(cls) -> 'PairDistanceIndex':
+        return cls(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.values.nbytes
+
+    def lookup(
+        self,
+        a: np.ndarray,
+        b: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized lookup returning ``(dists, found)``.
+
+        Missing pairs get UNREACHABLE in ``dists`` and False in ``found``.
+        """
+        keys = pack_pairs(a, b)
+        dists = np.full(keys.shape, UNREACHABLE, dtype=np.int32)
+        if not len(self.keys):
+            return dists, np.zeros(keys.shape, dtype=bool)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        found = self.keys[pos] == keys
+        dists[found] = self.values[pos[found]]
+        return dists, found
+
+    def get(self, a: int, b: int) -> Optional[int]:
+        """Distance between ``a`` and ``b`` or None if not stored."""
+        a, b = int(a), int(b)
+        key = np.uint64((min(a, b) << 32) | max(a, b))
+        pos = int(self.keys.searchsorted(key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return int(self.values[pos])
+        return None
+
+
+class ExternalPairIndexBuilder:
+    """Builds a memory-mapped PairDistanceIndex larger than memory.
+
+    Pairs passed to ``add`` are buffered until ``memory_budget`` would be
+    exceeded, then sorted and spilled as a run of .npy files. ``finish``
+    merges the runs block by block into ``exact_keys.npy`` and
+    ``exact_values.npy`` under ``directory`` (the file names
+    ``DistanceStorage.save`` uses) and returns an index that reads them
+    through the page cache. Peak memory stays near the budget regardless
+    of the number of pairs. Each unordered pair may be added only once.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        memory_budget: Optional[int] = None
+    ):
+        self.directory = Path(directory)
+        self.memory_budget = memory_budget or DEFAULT_MEMORY_BUDGET
+        self.capacity = max(1, self.memory_budget // BUFFERED_PAIR_BYTES)
+        self.run_dir = self.directory / 'runs'
+        self.runs: List[Tuple[Path, Path]] = []
+        self.max_distance = 0
+        self._keys: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+        self._buffered = 0
+
+    def add(self, a: np.ndarray, b: np.ndarray, dists: np.ndarray) -> None:
+        """Buffers pairs ``(a[i], b[i])`` with distances ``dists[i]``."""
+        keys = pack_pairs(a, b)
+        dists = np.asarray(dists, dtype=np.int32)
+        for start in range(0, len(keys), self.capacity):
+            chunk = slice(start, start + self.capacity)
+            self._keys.append(keys[chunk])
+            self._values.append(dists[chunk])
+            self._buffered += len(self._keys[-1])
+            if self._buffered >= self.capacity:
+                self._spill()
+
+    def _spill(self) -> None:
+        if not self._buffered:
+            return
+        keys = np.concatenate(self._keys)
+        values = np.concatenate(self._values)
+        self._keys, self._values, self._buffered = [], [], 0
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        max_distance = int(values.max(initial=0))
+        self.max_distance = max(self.max_distance, max_distance)
+
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        run = len(self.runs)
+        key_path = self.run_dir / f'run{run}_keys.npy'
+        value_path = self.run_dir / f'run{run}_values.npy'
+        np.save(key_path, keys)
+        np.save(value_path, values.astype(distance_dtype(max_distance)))
+        self.runs.append((key_path, value_path))
+
+    def finish(self) -> PairDistanceIndex:
+        """Merges all runs into the final memory-mapped index."""
+        self._spill()
+        runs = [
+            (np.load(k, mmap_mode='r'), np.load(v, mmap_mode='r'))
+            for k, v in self.runs
+        ]
+        total = sum(len(keys) for keys, _ in runs)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key_path = self.directory / 'exact_keys.npy'
+        value_path = self.directory / 'exact_values.npy'
+        out_keys = np.lib.format.open_memmap(
+            key_path, mode='w+', dtype=np.uint64, shape=(total,)
+        )
+        out_values = np.lib.format.open_memmap(
+            value_path, mode='w+', dtype=distance_dtype(self.max_distance),
+            shape=(total,)
+        )
+
+        # Every buffer holds the next block of one run. All buffered keys up
+        # to the smallest buffer tail are final, so each round writes those
+        # and fully drains at least one buffer.
+        block = max(1, self.capacity // (2 * max(len(runs), 1)))
+        positions = [0] * len(runs)
+        buffers = [
+            (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32))
+        ] * len(runs)
+        written = 0
+        last_key = None
+        while written < total:
+            for r, (keys, values) in enumerate(runs):
+                if not len(buffers[r][0]) and positions[r] < len(keys):
+                    end = positions[r] + block
+                    buffers[r] = (
+                        np.array(keys[positions[r]:end]),
+                        np.array(values[positions[r]:end], dtype=np.int32)
+                    )
+                    positions[r] = min(end, len(keys))
+            bound = min(keys[-1] for keys, _ in buffers if len(keys))
+            parts_keys, parts_values = [], []
+            for r, (keys, values) in enumerate(buffers):
+                cut = int(np.searchsorted(keys, bound, side='right'))
+                parts_keys.append(keys[:cut])
+                parts_values.append(values[:cut])
+                buffers[r] = (keys[cut:], values[cut:])
+            keys = np.concatenate(parts_keys)
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            if (
+                np.any(keys[1:] == keys[:-1]) or
+                (last_key is not None and keys[0] == last_key)
+            ):
+                raise ValueError("Pair added more than once")
+            out_keys[written:written + len(keys)] = keys
+            out_values[written:written + len(keys)] = (
+                np.concatenate(parts_values)[order]
+            )
+            written += len(keys)
+            last_key = keys[-1]
+
+        out_keys.flush()
+        out_values.flush()
+        del out_keys, out_values, runs
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        self.runs = []
+        return PairDistanceIndex(
+            np.load(key_path, mmap_mode='r'),
+            np.load(value_path, mmap_mode='r')
+        )
+
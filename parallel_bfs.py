@@ -0,0 +1,242 @@
+# src/algorithms/parallel_bfs.py
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import numpy as np
+from .compact_graph import (
+    CompactGraph, UNREACHABLE, bfs_distances, truncated_bfs
+)
+
+# Picklable description of an array living in a shared memory block
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+# Called as progress(done, total) after each finished chunk of sources
+ChunkProgress = Callable[[int, int], None]
+
+# Arrays attached by each worker process in _init_worker
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, ArraySpec]:
+    """Copies ``array`` into a new shared memory block."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(spec: ArraySpec) -> np.ndarray:
+    """Maps a shared array described by ``spec`` without copying."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_blocks.append(shm)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _init_worker(specs: Dict[str, ArraySpec]) -> None:
+    for key, spec in specs.items():
+        _worker_arrays[key] = _attach(spec)
+
+
+def _fill_rows(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    out: np.ndarray,
+    sources: np.ndarray,
+    start: int,
+    end: int
+) -> int:
+    """Writes BFS rows for ``sources[start:end]`` and returns the max distance."""
+    sentinel = np.iinfo(out.dtype).max
+    max_distance = 0
+    for row in range(start, end):
+        dist = bfs_distances(indptr, indices, sources[row])
+        max_distance = max(max_distance, int(dist.max(initial=0)))
+        out[row] = np.where(
+            dist == UNREACHABLE, sentinel, np.minimum(dist, sentinel)
+        )
+    return max_distance
+
+
+def _rows_task(bounds: Tuple[int, int]) -> int:
+    arrays = _worker_arrays
+    return _fill_rows(
+        arrays['indptr'], arrays['indices'], arrays['out'],
+        arrays['sources'], bounds[0], bounds[1]
+    )
+
+
+def _balls_task(
+    task: Tuple[np.ndarray, Sequence[Optional[int]], Optional[int]]
+) -> List[Tuple[np.ndarray, np.ndarray, bool]]:
+    centers, max_depths, max_size = task
+    indptr, indices = _worker_arrays['indptr'], _worker_arrays['indices']
+    visited = np.zeros(len(indptr) - 1, dtype=bool)
+    results = []
+    for center, max_depth in zip(centers, max_depths):
+        nodes, dists, capped = truncated_bfs(
+            indptr, indices, center, max_depth, max_size, visited
+        )
+        results.append((nodes.astype(np.int32), dists, capped))
+    return results
+
+
+class ParallelBFSEngine:
+    """Runs independent BFS searches over a process pool.
+
+    The CSR arrays are placed in shared memory once and mapped zero-copy by
+    every worker; landmark rows are written straight into a shared output
+    matrix. With ``max_workers <= 1`` everything runs in-process.
+    ``chunk_size`` bounds the number of sources handed to a worker per task;
+    an optional ``progress`` callback is invoked after every chunk.
+    """
+
+    def __init__(
+        self,
+        graph: CompactGraph,
+        max_workers: int = 1,
+        chunk_size: int = 1000
+    ):
+        self.graph = graph
+        self.max_workers = max(1, int(max_workers))
+        self.chunk_size = max(1, int(chunk_size))
+
+    def _chunks(self, count: int) -> List[Tuple[int, int]]:
+        """Splits ``count`` sources so every worker gets several tasks."""
+        size = min(
+            self.chunk_size, math.ceil(count / (self.max_workers * 4)) or 1
+        )
+        return [(i, min(i + size, count)) for i in range(0, count, size)]
+
+    def distance_matrix(
+        self,
+        sources: np.ndarray,
+        dtype: np.dtype = np.uint8,
+        progress: Optional[ChunkProgress] = None
+    ) -> np.ndarray:
+        """(len(sources) x n) BFS distances, dtype max marking unreachable.
+
+        Falls back to a wider dtype if a distance does not fit in ``dtype``.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        dtype = np.dtype(dtype)
+        shape = (len(sources), self.graph.number_of_nodes())
+        if self.max_workers == 1 or len(sources) <= 1:
+            out = np.empty(shape, dtype=dtype)
+            max_distance = 0
+            for start, end in self._chunks(len(sources)):
+                max_distance = max(max_distance, _fill_rows(
+                    self.graph.indptr, self.graph.indices, out,
+                    sources, start, end
+                ))
+                if progress is not None:
+                    progress(end, len(sources))
+        else:
+            out, max_distance = self._parallel_matrix(
+                sources, shape, dtype, progress
+            )
+        if max_distance >= np.iinfo(dtype).max:
+            wider = np.dtype(np.uint16 if dtype == np.uint8 else np.uint32)
+            return self.distance_matrix(sources, wider, progress)
+        return out
+
+    def _parallel_matrix(
+        self,
+        sources: np.ndarray,
+        shape: Tuple[int, int],
+        dtype: np.dtype,
+        progress: Optional[ChunkProgress] = None
+    ) -> Tuple[np.ndarray, int]:
+        blocks = []
+        try:
+            specs = {}
+            for key, array in (
+                ('indptr', self.graph.indptr),
+                ('indices', self.graph.indices),
+                ('sources', sources)
+            ):
+                shm, specs[key] = _share(array)
+                blocks.append(shm)
+            out_shm = shared_memory.SharedMemory(
+                create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1)
+            )
+            blocks.append(out_shm)
+            specs['out'] = (out_shm.name, shape, dtype.str)
+
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(specs,)
+            ) as pool:
+                chunks = self._chunks(len(sources))
+                max_distance = 0
+                for (_, end), chunk_max in zip(
+                    chunks, pool.map(_rows_task, chunks)
+                ):
+                    max_distance = max(max_distance, chunk_max)
+                    if progress is not None:
+                        progress(end, len(sources))
+            out = np.ndarray(shape, dtype=dtype, buffer=out_shm.buf).copy()
+            return out, max_distance
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    def truncated_balls(
+        self,
+        centers: np.ndarray,
+        max_depths: Sequence[Optional[int]],
+        max_size: Optional[int] = None,
+        progress: Optional[ChunkProgress] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, bool]]:
+        """Truncated BFS ``(nodes, dists, capped)`` for every center."""
+        centers = np.asarray(centers, dtype=np.int64)
+        max_depths = list(max_depths)
+        if self.max_workers == 1 or len(centers) <= 1:
+            visited = np.zeros(self.graph.number_of_nodes(), dtype=bool)
+            results = []
+            for start, end in self._chunks(len(centers)):
+                results.extend(
+                    self.graph.truncated_bfs(
+                        center, max_depths[i], max_size, visited
+                    )
+                    for i, center in enumerate(centers[start:end], start)
+                )
+                if progress is not None:
+                    progress(end, len(centers))
+            return results
+
+        blocks = []
+        try:
+            specs = {}
+            for key, array in (
+                ('indptr', self.graph.indptr),
+                ('indices', self.graph.indices)
+            ):
+                shm, specs[key] = _share(array)
+                blocks.append(shm)
+            chunks = self._chunks(len(centers))
+            tasks = [
+                (centers[start:end], max_depths[start:end], max_size)
+                for start, end in chunks
+            ]
+            results = []
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(specs,)
+            ) as pool:
+                for (_, end), chunk in zip(
+                    chunks, pool.map(_balls_task, tasks)
+                ):
+                    results.extend(chunk)
+                    if progress is not None:
+                        progress(end, len(centers))
+            return results
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
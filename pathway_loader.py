@@ -0,0 +1,321 @@
+# src/data/pathway_loader.py
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from ..algorithms.compact_graph import CompactGraph
+
+# File layouts understood by PathwayLoader
+PATHWAY_FORMATS = ('gmt', 'table')
+
+# Set bits per byte value, for counting bits in uint8 bitsets
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Gene pairs per block when intersecting bitset rows
+BITSET_BLOCK = 65536
+
+
+def _bitset(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int]):
+    """uint8 bitset matrix with bit ``c & 7`` of byte ``c >> 3`` set."""
+    bits = np.zeros((shape[0], (shape[1] + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(
+        bits, (rows, cols >> 3), np.left_shift(1, cols & 7).astype(np.uint8)
+    )
+    return bits
+
+
+class PathwayIndex:
+    """Gene/pathway memberships over a graph's integer node ids.
+
+    Pathway ``p`` (``pathway_names[p]``) holds the sorted node ids
+    ``pathway_genes[pathway_indptr[p]:pathway_indptr[p + 1]]``; node ``v``
+    belongs to the sorted pathways
+    ``gene_pathways[gene_indptr[v]:gene_indptr[v + 1]]``. ``gene_bits``
+    (nodes x pathways) and ``pathway_bits`` (pathways x nodes) hold the
+    same memberships as packed bitsets, so overlaps and co-membership of
+    many pairs reduce to AND plus bit counting.
+    """
+
+    def __init__(
+        self,
+        pathway_names: Sequence[str],
+        num_nodes: int,
+        gene_ids: np.ndarray,
+        pathway_ids: np.ndarray
+    ):
+        self.pathway_names = np.asarray(pathway_names, dtype=object)
+        self.num_nodes = num_nodes
+        num_pathways = len(self.pathway_names)
+        self.pathway_index: Dict[str, int] = {
+            name: i for i, name in enumerate(self.pathway_names.tolist())
+        }
+        # Unique (pathway, gene) keys, sorted by pathway then gene
+        keys = np.unique(
+            np.asarray(pathway_ids, dtype=np.int64) * max(num_nodes, 1) +
+            np.asarray(gene_ids, dtype=np.int64)
+        )
+        pathways = keys // max(num_nodes, 1)
+        genes = keys % max(num_nodes, 1)
+
+        self.pathway_indptr = np.zeros(num_pathways + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(pathways, minlength=num_pathways),
+            out=self.pathway_indptr[1:]
+        )
+        self.pathway_genes = genes.astype(np.int32)
+        order = np.lexsort((pathways, genes))
+        self.gene_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(genes, minlength=num_nodes),
+            out=self.gene_indptr[1:]
+        )
+        self.gene_pathways = pathways[order].astype(np.int32)
+        self.gene_bits = _bitset(genes, pathways, (num_nodes, num_pathways))
+        self.pathway_bits = _bitset(
+            pathways, genes, (num_pathways, num_nodes)
+        )
+
+    def __len__(self) -> int:
+        return len(self.pathway_names)
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """Number of graph genes in every pathway."""
+        return np.diff(self.pathway_indptr)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.pathway_indptr, self.pathway_genes, self.gene_indptr,
+            self.gene_pathways, self.gene_bits, self.pathway_bits
+        ))
+
+    def genes_of(self, pathway: Union[int, str]) -> np.ndarray:
+        """Sorted node ids of a pathway, by index or name."""
+        if isinstance(pathway, str):
+            pathway = self.pathway_index[pathway]
+        start, end = self.pathway_indptr[pathway:pathway + 2]
+        return self.pathway_genes[start:end]
+
+    def pathways_of(self, gene_id: int) -> np.ndarray:
+        """Sorted pathway indices of a node."""
+        start, end = self.gene_indptr[gene_id:gene_id + 2]
+        return self.gene_pathways[start:end]
+
+    def pathway_gene_ids(self) -> Dict[str, np.ndarray]:
+        """Pathway name -> sorted node ids, as views into the CSR arrays."""
+        return {
+            name: self.genes_of(i)
+            for i, name in enumerate(self.pathway_names.tolist())
+        }
+
+    def to_gene_pathways(self, graph: CompactGraph) -> Dict[str, Set[str]]:
+        """Gene symbol -> pathway names for every node of ``graph``."""
+        names = self.pathway_names
+        return {
+            gene: set(names[self.pathways_of(v)].tolist())
+            for v, gene in enumerate(graph.node_names.tolist())
+        }
+
+    def shared_pathways(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Number of pathways containing both genes, per node id pair."""
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        result = np.empty(len(a), dtype=np.int32)
+        for start in range(0, len(a), BITSET_BLOCK):
+            block = slice(start, start + BITSET_BLOCK)
+            both = self.gene_bits[a[block]] & self.gene_bits[b[block]]
+            result[block] = POPCOUNT[both].sum(axis=1, dtype=np.int32)
+        return result
+
+    def co_membership(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Whether the genes of each node id pair share any pathway.
+
+        These are the related/unrelated labels RelatednessClassifier is
+        fitted and evaluated against.
+        """
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        result = np.empty(len(a), dtype=bool)
+        for start in range(0, len(a), BITSET_BLOCK):
+            block = slice(start, start + BITSET_BLOCK)
+            both = self.gene_bits[a[block]] & self.gene_bits[b[block]]
+            result[block] = both.any(axis=1)
+        return result
+
+    def pathway_overlap(self, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Number of shared genes per pathway index pair."""
+        p, q = np.asarray(p, dtype=np.int64), np.asarray(q, dtype=np.int64)
+        result = np.empty(len(p), dtype=np.int32)
+        # Pathway rows are n / 8 bytes, so blocks hold fewer pairs
+        rows = max(1, BITSET_BLOCK * 8 // max(self.pathway_bits.shape[1], 1))
+        for start in range(0, len(p), rows):
+            block = slice(start, start + rows)
+            both = self.pathway_bits[p[block]] & self.pathway_bits[q[block]]
+            result[block] = POPCOUNT[both].sum(axis=1, dtype=np.int32)
+        return result
+
+    def overlap_matrix(self) -> np.ndarray:
+        """Dense (pathways x pathways) shared-gene counts.
+
+        Built from the gene -> pathway CSR: every gene adds one to each
+        ordered pair of its pathways, so the cost is the sum of squared
+        per-gene pathway counts. The diagonal holds the pathway sizes.
+        """
+        num_pathways = len(self)
+        counts = np.diff(self.gene_indptr)
+        squares = counts * counts
+        total = int(squares.sum())
+        within = np.arange(total, dtype=np.int64) - np.repeat(
+            np.cumsum(squares) - squares, squares
+        )
+        width = np.repeat(counts, squares)
+        start = np.repeat(self.gene_indptr[:-1], squares)
+        first = self.gene_pathways[start + within // width].astype(np.int64)
+        second = self.gene_pathways[start + within % width].astype(np.int64)
+        return np.bincount(
+            first * num_pathways + second,
+            minlength=num_pathways * num_pathways
+        ).reshape(num_pathways, num_pathways).astype(np.int32)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Writes the pathway -> gene CSR as one .npz file.
+
+        The gene CSR and bitsets are derived from it again on ``load``.
+        """
+        path = Path(path)
+        partial = path.with_name(path.name + '.partial')
+        with open(partial, 'wb') as f:
+            np.savez(
+                f,
+                pathway_names=np.array(self.pathway_names.tolist(), dtype=str),
+                num_nodes=np.array(self.num_nodes),
+                pathway_indptr=self.pathway_indptr,
+                pathway_genes=self.pathway_genes
+            )
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'PathwayIndex':
+        """Reads an index written by ``save``."""
+        with np.load(path, allow_pickle=False) as arrays:
+            indptr = arrays['pathway_indptr']
+            return cls(
+                arrays['pathway_names'].tolist(), int(arrays['num_nodes']),
+                arrays['pathway_genes'],
+                np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+            )
+
+    def fingerprint(self) -> str:
+        """SHA-256 of the memberships, for cache and checkpoint keys."""
+        digest = hashlib.sha256()
+        digest.update('\0'.join(self.pathway_names.tolist()).encode())
+        digest.update(self.pathway_indptr.tobytes())
+        digest.update(self.pathway_genes.tobytes())
+        return digest.hexdigest()
+
+
+class PathwayLoader:
+    """Loads pathway gene sets from a local GMT or tabular file.
+
+    GMT files (MSigDB, Reactome's ReactomePathways.gmt) hold one pathway
+    per line: name, description, then gene symbols, tab-separated.
+    Tabular files hold one (gene, pathway) membership per row, as in
+    exported KEGG or Reactome mappings; ``gene_column`` and
+    ``pathway_column`` name the columns, or give their positions when
+    ``header`` is False. The format is guessed from the ``.gmt`` suffix
+    unless given. Symbols are matched against the graph's node names;
+    pathways left with fewer than ``min_size`` or more than ``max_size``
+    graph genes are dropped.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        format: Optional[str] = None,
+        gene_column: Union[str, int] = 'Gene',
+        pathway_column: Union[str, int] = 'Pathway',
+        sep: str = '\t',
+        header: bool = True,
+        min_size: int = 1,
+        max_size: Optional[int] = None
+    ):
+        self.path = Path(path)
+        if format is None:
+            format = 'gmt' if self.path.suffix.lower() == '.gmt' else 'table'
+        if format not in PATHWAY_FORMATS:
+            raise ValueError(
+                f"Unknown pathway format {format!r}, expected one of "
+                f"{PATHWAY_FORMATS}"
+            )
+        if not self.path.exists():
+            raise FileNotFoundError(f"Pathway file not found: {self.path}")
+        self.format = format
+        self.gene_column = gene_column
+        self.pathway_column = pathway_column
+        self.sep = sep
+        self.header = header
+        self.min_size = min_size
+        self.max_size = max_size
+        self.unmapped_genes = 0
+
+    def read_memberships(self) -> Tuple[List[str], List[str]]:
+        """Parallel gene symbol and pathway name lists from the file."""
+        if self.format == 'gmt':
+            genes, pathways = [], []
+            with open(self.path) as f:
+                for line in f:
+                    fields = line.rstrip('\r\n').split('\t')
+                    if len(fields) < 3:
+                        continue
+                    members = [g for g in fields[2:] if g]
+                    genes.extend(members)
+                    pathways.extend([fields[0]] * len(members))
+            return genes, pathways
+        df = pd.read_csv(
+            self.path, sep=self.sep, header=0 if self.header else None,
+            usecols=[self.gene_column, self.pathway_column], dtype=str
+        ).dropna()
+        return (
+            df[self.gene_column].tolist(), df[self.pathway_column].tolist()
+        )
+
+    def load(self, graph: CompactGraph) -> PathwayIndex:
+        """Builds the PathwayIndex of the file's pathways over ``graph``."""
+        genes, pathways = self.read_memberships()
+        names = sorted(set(pathways))
+        pathway_ids = {name: i for i, name in enumerate(names)}
+        node_index = graph.node_index
+        gene_ids = np.fromiter(
+            (node_index.get(g, -1) for g in genes), dtype=np.int64,
+            count=len(genes)
+        )
+        pathway_idx = np.fromiter(
+            (pathway_ids[p] for p in pathways), dtype=np.int64,
+            count=len(pathways)
+        )
+        mapped = gene_ids >= 0
+        self.unmapped_genes = len(
+            set(np.asarray(genes, dtype=object)[~mapped].tolist())
+        )
+        index = PathwayIndex(
+            names, graph.number_of_nodes(), gene_ids[mapped],
+            pathway_idx[mapped]
+        )
+
+        # Size filters apply to the genes present in the graph
+        sizes = index.sizes
+        keep = sizes >= self.min_size
+        if self.max_size is not None:
+            keep &= sizes <= self.max_size
+        if keep.all():
+            return index
+        remap = np.full(len(names), -1, dtype=np.int64)
+        remap[keep] = np.arange(int(keep.sum()))
+        owners = np.repeat(np.arange(len(names)), sizes)
+        kept = keep[owners]
+        return PathwayIndex(
+            np.asarray(names, dtype=object)[keep].tolist(),
+            graph.number_of_nodes(), index.pathway_genes[kept],
+            remap[owners[kept]]
+        )
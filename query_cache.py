@@ -0,0 +1,117 @@
+# src/algorithms/query_cache.py
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Optional
+import threading
+
+# Eviction policies understood by QueryCache
+CACHE_POLICIES = ('lru', 'lfu')
+
+
+class QueryCache:
+    """Bounded, thread-safe result cache with LRU or LFU eviction.
+
+    All operations are O(1). Hit, miss and eviction counters are kept for
+    ``stats()``; a single lock makes the cache safe to share across threads.
+    """
+
+    def __init__(self, capacity: int = 100_000, policy: str = 'lru'):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if policy not in CACHE_POLICIES:
+            raise ValueError(
+                f"Unknown cache policy {policy!r}, expected one of "
+                f"{CACHE_POLICIES}"
+            )
+        self.capacity = capacity
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._init_storage()
+
+    def _init_storage(self) -> None:
+        # LRU: key -> value in recency order
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        # LFU: key -> use count, count -> keys in recency order
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, 'OrderedDict[Hashable, None]'] = (
+            defaultdict(OrderedDict)
+        )
+        self._min_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for ``key``, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.policy == 'lru':
+                self._entries.move_to_end(key)
+            else:
+                self._touch(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores ``value``, evicting one entry if the cache is full."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = value
+                if self.policy == 'lru':
+                    self._entries.move_to_end(key)
+                else:
+                    self._touch(key)
+                return
+            if len(self._entries) >= self.capacity:
+                self._evict()
+            self._entries[key] = value
+            if self.policy == 'lfu':
+                self._counts[key] = 1
+                self._buckets[1][key] = None
+                self._min_count = 1
+
+    def _touch(self, key: Hashable) -> None:
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def _evict(self) -> None:
+        if self.policy == 'lru':
+            self._entries.popitem(last=False)
+        else:
+            bucket = self._buckets[self._min_count]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_count]
+            del self._counts[key]
+            del self._entries[key]
+        self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops all entries, keeping the counters."""
+        with self._lock:
+            self._init_storage()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for export to logs or metrics systems."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'policy': self.policy,
+                'capacity': self.capacity,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
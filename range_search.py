@@ -0,0 +1,160 @@
+# src/algorithms/range_search.py
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .compact_graph import CompactGraph, expand_frontier, truncated_bfs
+from .landmark_sampler import LandmarkTable
+from .neighborhood_sampler import BallIndex
+
+# Where RangeSearch found its answers, as counted in ``RangeSearch.sources``
+RANGE_SOURCES = ('landmark', 'ball', 'bfs')
+
+
+def _empty() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+
+class RangeSearch:
+    """Radius and k-nearest queries around a single vertex.
+
+    Answers come from the cheapest index that holds them completely:
+
+    * the landmark row, when the query vertex is a landmark;
+    * the vertex's own ball, when its exclusive radius covers the query
+      (members are stored with exact distances in BFS order);
+    * otherwise a BFS from the vertex, stopped at the radius or at the
+      level that completes the k nearest.
+
+    Results exclude the query vertex and are sorted by distance, then id.
+    The visited buffer is reused across queries; not thread-safe.
+    """
+
+    def __init__(
+        self,
+        graph: CompactGraph,
+        landmark_table: Optional[LandmarkTable] = None,
+        ball_index: Optional[BallIndex] = None
+    ):
+        self.graph = graph
+        self.landmark_table = landmark_table
+        self.ball_index = ball_index
+        self.visited = np.zeros(graph.number_of_nodes(), dtype=bool)
+        self.sources: Dict[str, int] = {source: 0 for source in RANGE_SOURCES}
+
+    def _landmark_row(self, v: int) -> Optional[np.ndarray]:
+        table = self.landmark_table
+        if table is None or v not in table.row_of:
+            return None
+        self.sources['landmark'] += 1
+        return table.distances[table.row_of[v]]
+
+    def _ball(self, v: int) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+        """``(members, dists, radius)`` of the ball centered at ``v``.
+
+        ``radius`` is exclusive: every vertex closer than it is a member.
+        It is None for unbounded balls, which hold the whole component.
+        """
+        balls = self.ball_index
+        if balls is None or not len(balls):
+            return None
+        i = int(np.searchsorted(balls.centers, v))
+        if i == len(balls) or balls.centers[i] != v:
+            return None
+        members, dists = balls.ball(i)
+        radius = int(balls.radii[i])
+        return members, dists, None if radius < 0 else radius
+
+    def within(self, v: int, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances of all vertices within ``radius`` of ``v``."""
+        if radius < 1:
+            return _empty()
+        row = self._landmark_row(v)
+        if row is not None:
+            limit = min(radius, int(self.landmark_table.sentinel) - 1)
+            ids = np.flatnonzero(row <= limit)
+            ids = ids[ids != v]
+            dists = row[ids].astype(np.int32)
+            order = np.argsort(dists, kind='stable')
+            return ids[order], dists[order]
+
+        ball = self._ball(v)
+        if ball is not None and (ball[2] is None or radius < ball[2]):
+            members, dists, _ = ball
+            self.sources['ball'] += 1
+            end = int(np.searchsorted(dists, radius, side='right'))
+            return (
+                members[1:end].astype(np.int64), dists[1:end].astype(np.int32)
+            )
+
+        self.sources['bfs'] += 1
+        nodes, dists, _ = truncated_bfs(
+            self.graph.indptr, self.graph.indices, v, radius,
+            visited=self.visited
+        )
+        return nodes[1:], dists[1:]
+
+    def nearest(self, v: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances of the ``k`` vertices closest to ``v``.
+
+        Ties at the k-th distance go to the smaller ids. Fewer than ``k``
+        are returned when the component of ``v`` is smaller than k + 1.
+        """
+        if k < 1:
+            return _empty()
+        row = self._landmark_row(v)
+        if row is not None:
+            sentinel = self.landmark_table.sentinel
+            if k + 1 < len(row):
+                cutoff = np.partition(row, k)[k]
+                ids = np.flatnonzero(row <= cutoff)
+            else:
+                ids = np.arange(len(row))
+            ids = ids[(ids != v) & (row[ids] != sentinel)]
+            dists = row[ids].astype(np.int32)
+            order = np.argsort(dists, kind='stable')[:k]
+            return ids[order], dists[order]
+
+        ball = self._ball(v)
+        if ball is not None:
+            members, dists, radius = ball
+            complete = len(members) if radius is None else int(
+                np.searchsorted(dists, radius)
+            )
+            if complete > k or radius is None:
+                self.sources['ball'] += 1
+                end = min(complete, k + 1)
+                return (
+                    members[1:end].astype(np.int64),
+                    dists[1:end].astype(np.int32)
+                )
+
+        self.sources['bfs'] += 1
+        return self._bfs_nearest(v, k)
+
+    def _bfs_nearest(self, v: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Whole BFS levels around ``v`` until they hold k vertices."""
+        indptr, indices = self.graph.indptr, self.graph.indices
+        visited = self.visited
+        levels = [np.array([v], dtype=np.int64)]
+        visited[v] = True
+        found = 0
+        try:
+            while found < k:
+                nbrs = expand_frontier(indptr, indices, levels[-1])
+                nbrs = nbrs[~visited[nbrs]]
+                if not nbrs.size:
+                    break
+                frontier = np.unique(nbrs)
+                visited[frontier] = True
+                levels.append(frontier)
+                found += frontier.size
+        finally:
+            for level in levels:
+                visited[level] = False
+        if len(levels) == 1:
+            return _empty()
+        nodes = np.concatenate(levels[1:])[:k]
+        dists = np.repeat(
+            np.arange(1, len(levels), dtype=np.int32),
+            [level.size for level in levels[1:]]
+        )[:k]
+        return nodes, dists
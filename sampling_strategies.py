@@ -0,0 +1,256 @@
+# src/algorithms/sampling_strategies.py
+from typing import Dict, Optional, Type, Union
+import numpy as np
+from .compact_graph import CompactGraph, UNREACHABLE, bfs_distances
+from .components import ComponentIndex
+
+
+def candidate_count(graph: CompactGraph, nodes: Optional[np.ndarray]) -> int:
+    """Number of vertices a strategy samples from."""
+    return graph.number_of_nodes() if nodes is None else len(nodes)
+
+
+class SamplingStrategy:
+    """Chooses a vertex subset of a graph at a target sampling probability.
+
+    ``probability`` is the per-vertex rate of the paper's scheme, so every
+    strategy selects about ``n * probability`` vertices; strategies differ
+    in which vertices they favour. All randomness comes from the NumPy
+    generator passed in, so a seed reproduces the sample exactly. With
+    ``nodes`` the sample is drawn from that vertex subset only (a connected
+    component, for per-component sampling) at the same rate.
+    """
+
+    name = 'base'
+
+    def sample(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        rng: np.random.Generator,
+        nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Sorted ids of the selected vertices."""
+        raise NotImplementedError
+
+    def expected_size(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        nodes: Optional[np.ndarray] = None
+    ) -> float:
+        """Expected number of selected vertices."""
+        return candidate_count(graph, nodes) * min(max(probability, 0.0), 1.0)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}()'
+
+
+class BernoulliSampling(SamplingStrategy):
+    """Keeps every vertex independently with the same probability."""
+
+    name = 'bernoulli'
+
+    def sample(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        rng: np.random.Generator,
+        nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        keep = rng.random(candidate_count(graph, nodes)) < probability
+        if nodes is None:
+            return np.flatnonzero(keep)
+        return np.sort(nodes[keep]).astype(np.int64)
+
+
+class DegreeBiasedSampling(SamplingStrategy):
+    """Bernoulli sampling with inclusion probability proportional to degree.
+
+    Vertex ``i`` is kept with probability ``min(1, c * deg(i) ** exponent)``,
+    with ``c`` calibrated so the expected sample size matches uniform
+    sampling at the same rate. On scale-free networks hub landmarks are
+    close to most vertices, which shrinks nearest-landmark distances and
+    therefore the balls. Isolated vertices are never selected.
+    """
+
+    name = 'degree'
+
+    def __init__(self, exponent: float = 1.0):
+        self.exponent = exponent
+
+    def inclusion_probabilities(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Per-vertex inclusion probabilities, aligned with ``nodes``."""
+        degree = graph.degree() if nodes is None else graph.degree()[nodes]
+        weights = degree.astype(np.float64) ** self.exponent
+        weights[degree == 0] = 0.0
+        target = len(weights) * min(max(probability, 0.0), 1.0)
+        positive = int((weights > 0).sum())
+        if target >= positive:
+            return (weights > 0).astype(np.float64)
+
+        # Water-filling: the j heaviest vertices are capped at 1 and the
+        # remaining mass target - j is spread proportionally to weight
+        order = np.argsort(-weights, kind='stable')
+        sorted_weights = weights[order]
+        suffix = np.cumsum(sorted_weights[::-1])[::-1]
+        j = np.arange(len(weights))
+        scale = (target - j) / np.maximum(suffix, np.finfo(np.float64).tiny)
+        first = int(np.argmax(scale * sorted_weights <= 1.0))
+        result = np.minimum(scale[first] * weights, 1.0)
+        result[order[:first]] = 1.0
+        return result
+
+    def sample(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        rng: np.random.Generator,
+        nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        p = self.inclusion_probabilities(graph, probability, nodes)
+        keep = rng.random(len(p)) < p
+        if nodes is None:
+            return np.flatnonzero(keep)
+        return np.sort(nodes[keep]).astype(np.int64)
+
+    def expected_size(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        nodes: Optional[np.ndarray] = None
+    ) -> float:
+        p = self.inclusion_probabilities(graph, probability, nodes)
+        return float(p.sum())
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(exponent={self.exponent})'
+
+
+class FarthestPointSampling(SamplingStrategy):
+    """Greedy coverage: repeatedly picks the vertex farthest from the sample.
+
+    Selects exactly ``round(n * probability)`` vertices (at least one),
+    starting from a random vertex; unreached components count as infinitely
+    far, so every component gets a vertex before any is covered twice.
+    Costs one full BFS per selected vertex.
+    """
+
+    name = 'farthest_point'
+
+    def sample(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        rng: np.random.Generator,
+        nodes: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        k = int(self.expected_size(graph, probability, nodes))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        if nodes is None:
+            nodes = np.arange(graph.number_of_nodes())
+        far = np.iinfo(np.int32).max
+        cover = np.full(len(nodes), far, dtype=np.int32)
+        picked = [int(nodes[rng.integers(len(nodes))])]
+        while True:
+            dist = bfs_distances(graph.indptr, graph.indices, picked[-1])
+            dist = dist[nodes]
+            reached = dist != UNREACHABLE
+            np.minimum(cover, np.where(reached, dist, far), out=cover)
+            if len(picked) == k:
+                break
+            picked.append(int(nodes[np.argmax(cover)]))
+        return np.sort(np.array(picked, dtype=np.int64))
+
+    def expected_size(
+        self,
+        graph: CompactGraph,
+        probability: float,
+        nodes: Optional[np.ndarray] = None
+    ) -> float:
+        n = candidate_count(graph, nodes)
+        if not n or probability <= 0:
+            return 0
+        return min(n, max(1, int(round(n * probability))))
+
+
+# Strategies selectable by name
+SAMPLING_STRATEGIES: Dict[str, Type[SamplingStrategy]] = {
+    cls.name: cls
+    for cls in (BernoulliSampling, DegreeBiasedSampling, FarthestPointSampling)
+}
+
+
+def as_sampling_strategy(
+    strategy: Union[str, SamplingStrategy]
+) -> SamplingStrategy:
+    """Resolves a strategy name to an instance, passing instances through."""
+    if isinstance(strategy, SamplingStrategy):
+        return strategy
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(
+            f"Unknown sampling strategy {strategy!r}, expected one of "
+            f"{tuple(SAMPLING_STRATEGIES)}"
+        )
+    return SAMPLING_STRATEGIES[strategy]()
+
+
+def component_probability(
+    size: int,
+    exponent: float,
+    probability: Optional[float] = None
+) -> float:
+    """Sampling rate of a component: ``size ** exponent`` unless fixed."""
+    return size ** exponent if probability is None else probability
+
+
+def sample_components(
+    strategy: SamplingStrategy,
+    graph: CompactGraph,
+    components: ComponentIndex,
+    rng: np.random.Generator,
+    exponent: float,
+    probability: Optional[float] = None,
+    at_least_one: bool = False
+) -> np.ndarray:
+    """Samples every large component independently at its own rate.
+
+    Component ``c`` is sampled at ``size_c ** exponent`` (or the fixed
+    ``probability``), so a small component is not starved by the giant
+    one's rate. Small components are skipped: their exact tables make
+    landmarks and balls unnecessary. With ``at_least_one`` an empty
+    component sample is replaced by one random member.
+    """
+    parts = [np.empty(0, dtype=np.int64)]
+    for component in components.large_components():
+        nodes = components.nodes(component)
+        p = component_probability(len(nodes), exponent, probability)
+        part = strategy.sample(graph, p, rng, nodes)
+        if at_least_one and not len(part):
+            part = nodes[rng.integers(len(nodes))].reshape(1)
+        parts.append(np.asarray(part, dtype=np.int64))
+    return np.sort(np.concatenate(parts))
+
+
+def expected_component_size(
+    strategy: SamplingStrategy,
+    graph: CompactGraph,
+    components: ComponentIndex,
+    exponent: float,
+    probability: Optional[float] = None,
+    at_least_one: bool = False
+) -> float:
+    """Expected size of a ``sample_components`` sample."""
+    total = 0.0
+    for component in components.large_components():
+        nodes = components.nodes(component)
+        p = component_probability(len(nodes), exponent, probability)
+        expected = strategy.expected_size(graph, p, nodes)
+        total += max(expected, 1.0) if at_least_one else expected
+    return total
@@ -0,0 +1,43 @@
+# tests/test_algorithms.py
+import networkx as nx
+import numpy as np
+from src.algorithms.compact_graph import as_compact_graph
+from src.algorithms.distance_storage import DistanceStorage
+from src.algorithms.landmark_sampler import LandmarkSampler
+from src.algorithms.neighborhood_sampler import NeighborhoodSampler
+
+
+def build_oracle(network: nx.Graph) -> DistanceStorage:
+    graph = as_compact_graph(network)
+    landmark_sampler = LandmarkSampler(graph, seed=1)
+    landmarks = landmark_sampler.sample_landmarks()
+    landmark_distances = landmark_sampler.compute_landmark_distances(
+        dense=True
+    )
+    neighborhood_sampler = NeighborhoodSampler(
+        graph, landmarks, landmark_distances, seed=2
+    )
+    balls = neighborhood_sampler.compute_balls(
+        neighborhood_sampler.sample_neighborhood_vertices(), compact=True
+    )
+    return DistanceStorage(graph, landmarks, balls, landmark_distances)
+
+
+def test_loaded_index_rebuilds_exact_table(tmp_path):
+    network = nx.relabel_nodes(
+        nx.powerlaw_cluster_graph(500, 2, 0.1, seed=1), lambda i: f'G{i}'
+    )
+    oracle = build_oracle(network)
+    oracle.save(tmp_path / 'index')
+    loaded = DistanceStorage.load(tmp_path / 'index')
+    assert loaded.exact_table_path is None
+    assert loaded.memory_budget is None
+
+    loaded.build_exact_distances()
+    assert len(loaded.exact_index) == len(oracle.exact_index)
+    rng = np.random.default_rng(0)
+    sources, targets = rng.integers(0, 500, (2, 2000))
+    assert (
+        loaded.query_distances(sources, targets) ==
+        oracle.query_distances(sources, targets)
+    ).all()
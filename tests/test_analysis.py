@@ -0,0 +1,43 @@
+# tests/test_analysis.py
+import networkx as nx
+from src.algorithms.compact_graph import as_compact_graph
+from src.algorithms.distance_storage import DistanceStorage
+from src.algorithms.landmark_sampler import LandmarkSampler
+from src.algorithms.neighborhood_sampler import NeighborhoodSampler
+from src.analysis.aspl_calculator import ASPLCalculator
+
+
+def build_oracle(network: nx.Graph) -> DistanceStorage:
+    graph = as_compact_graph(network)
+    landmark_sampler = LandmarkSampler(graph, seed=1)
+    landmarks = landmark_sampler.sample_landmarks()
+    landmark_distances = landmark_sampler.compute_landmark_distances(
+        dense=True
+    )
+    neighborhood_sampler = NeighborhoodSampler(
+        graph, landmarks, landmark_distances, seed=2
+    )
+    balls = neighborhood_sampler.compute_balls(
+        neighborhood_sampler.sample_neighborhood_vertices(), compact=True
+    )
+    return DistanceStorage(graph, landmarks, balls, landmark_distances)
+
+
+def test_pathway_pairs_report_unreachable_as_inf():
+    network = nx.path_graph(['A', 'B', 'C'])
+    network.add_edge('X', 'Y')
+    pathways = {'A': {'P'}, 'C': {'P'}, 'X': {'P'}}
+    calculator = ASPLCalculator(build_oracle(network), pathways)
+
+    pairs = {
+        frozenset((g1, g2)): dist
+        for g1, g2, dist in calculator.calculate_pathway_aspl(
+            'P', return_pairs=True
+        )[1]
+    }
+    assert pairs[frozenset(('A', 'C'))] == 2.0
+    assert pairs[frozenset(('A', 'X'))] == float('inf')
+    assert pairs[frozenset(('C', 'X'))] == float('inf')
+    assert pairs[frozenset(('A', 'X'))] == (
+        calculator.calculate_gene_pair_aspl('A', 'X')
+    )